@@ -148,8 +148,8 @@ class AuditLog(models.Model):
         return '\n'.join(changes_list)
 
     @classmethod
-    def log_action(cls, user, action, obj=None, changes=None, request=None, severity='INFO', notes=''):
-        """Утиліта для швидкого створення запису аудиту"""
+    def build_entry(cls, user, action, obj=None, changes=None, request=None, severity='INFO', notes=''):
+        """Створює (без збереження) запис аудиту; використовується також для bulk_create"""
         log_entry = cls(
             user=user,
             action=action,
@@ -170,6 +170,13 @@ class AuditLog(models.Model):
             if hasattr(request, 'session'):
                 log_entry.session_key = request.session.session_key or ''
 
+        return log_entry
+
+    @classmethod
+    def log_action(cls, user, action, obj=None, changes=None, request=None, severity='INFO', notes=''):
+        """Утиліта для швидкого створення запису аудиту"""
+        log_entry = cls.build_entry(user, action, obj=obj, changes=changes, request=request,
+                                    severity=severity, notes=notes)
         log_entry.save()
         return log_entry
 
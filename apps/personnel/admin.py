@@ -1,7 +1,11 @@
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from .forms import BulkStatusChangeForm
+from .services import change_status_many
 from .models import (
     Rank, Serviceman, Contract, ServiceHistoryEvent,
-    Education, FamilyMember, TemporaryArrival, IrrecoverableLoss
+    Education, FamilyMember, TemporaryArrival, IrrecoverableLoss, ImportCheckpoint
 )
 
 
@@ -48,6 +52,8 @@ class ServicemanAdmin(admin.ModelAdmin):
 
     readonly_fields = ('user',)
 
+    actions = ['change_status']
+
     fieldsets = (
         ('Основна інформація', {
             'fields': ('last_name', 'first_name', 'middle_name', 'photo')
@@ -68,6 +74,34 @@ class ServicemanAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.action(description="Змінити статус вибраних військовослужбовців", permissions=['change'])
+    def change_status(self, request, queryset):
+        """Масова зміна статусу з проміжною сторінкою для вибору статусу та підстави."""
+        if 'apply' in request.POST:
+            form = BulkStatusChangeForm(request.POST)
+            if form.is_valid():
+                changed = change_status_many(
+                    queryset,
+                    new_status=form.cleaned_data['status'],
+                    event_date=form.cleaned_data['event_date'],
+                    order_reference=form.cleaned_data['order_reference'],
+                    user=request.user,
+                    request=request
+                )
+                self.message_user(request, f"Статус змінено для {changed} військовослужбовців.")
+                return None
+        else:
+            form = BulkStatusChangeForm()
+
+        return TemplateResponse(request, 'admin/personnel/serviceman/change_status.html', {
+            **self.admin_site.each_context(request),
+            'title': "Масова зміна статусу",
+            'opts': self.model._meta,
+            'form': form,
+            'queryset': queryset,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+
 
 @admin.register(TemporaryArrival)
 class TemporaryArrivalAdmin(admin.ModelAdmin):
@@ -109,4 +143,15 @@ class IrrecoverableLossAdmin(admin.ModelAdmin):
         ('Облікова інформація', {
             'fields': ('exclusion_date', 'exclusion_order', 'notification_details')
         }),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    """
+    Контрольні точки команди import_personnel. Видалення точки змушує імпорт файлу почати спочатку.
+    """
+    list_display = ('file_name', 'rows_done', 'is_completed', 'updated_at')
+    list_filter = ('is_completed',)
+    search_fields = ('file_name', 'file_hash')
+    readonly_fields = ('file_hash', 'file_name', 'rows_done', 'counts', 'is_completed', 'updated_at')
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class PersonnelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.personnel'
-    verbose_name = 'Персональний облік'
\ No newline at end of file
+    verbose_name = 'Персональний облік'
+
+    def ready(self):
+        from . import signals  # noqa: F401
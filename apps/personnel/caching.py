@@ -0,0 +1,52 @@
+# apps/personnel/caching.py
+"""
+Версіонування кешованих фрагментів картки військовослужбовця.
+
+Ключ фрагмента містить дві версії: персональну (змінюється при зміні самого
+військовослужбовця або пов'язаних з ним записів) та загальну (змінюється при
+зміні довідників, які відображаються на всіх картках: звання, посади, підрозділи).
+Старі фрагменти не видаляються явно, а просто перестають бути досяжними.
+"""
+import time
+
+from django.core.cache import cache
+
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+_CARD_KEY = 'personnel:serviceman-card:{pk}:{global_version}:{version}'
+_VERSION_KEY = 'personnel:serviceman-card-version:{pk}'
+_GLOBAL_VERSION_KEY = 'personnel:serviceman-card-version:global'
+
+
+def _new_version():
+    # Часова мітка замість лічильника: після витіснення ключа версія не повториться
+    return time.time_ns()
+
+
+def get_card_cache_key(pk):
+    """Повертає ключ кешу для поточної версії картки військовослужбовця."""
+    version_key = _VERSION_KEY.format(pk=pk)
+    versions = cache.get_many([version_key, _GLOBAL_VERSION_KEY])
+
+    missing = {}
+    for key in (version_key, _GLOBAL_VERSION_KEY):
+        if key not in versions:
+            missing[key] = versions[key] = _new_version()
+    if missing:
+        cache.set_many(missing, None)
+
+    return _CARD_KEY.format(pk=pk, global_version=versions[_GLOBAL_VERSION_KEY], version=versions[version_key])
+
+
+def invalidate_serviceman_cards(*pks):
+    """
+    Робить неактуальними кешовані картки вказаних військовослужбовців.
+    Ключ версії видаляється, а не перезаписується: при наступному перегляді
+    буде створено нову версію, а для карток, яких немає в кеші, нічого не записується.
+    """
+    cache.delete_many([_VERSION_KEY.format(pk=pk) for pk in pks if pk is not None])
+
+
+def invalidate_all_serviceman_cards():
+    """Робить неактуальними всі кешовані картки (зміна довідників)."""
+    cache.set(_GLOBAL_VERSION_KEY, _new_version(), None)
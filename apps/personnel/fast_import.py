@@ -0,0 +1,214 @@
+# apps/personnel/fast_import.py
+"""
+Швидкий шлях первинного завантаження особового складу для PostgreSQL (import_personnel --fast).
+
+    1. рядки файлу розбираються split_row і передаються командою COPY у тимчасову
+       проміжну таблицю (тимчасові таблиці PostgreSQL не пишуться в WAL, як і UNLOGGED);
+    2. звання та індекси посад перевіряються множинними JOIN з довідниками,
+       конфлікти (дублікати у файлі, зайняті посади) позначаються в колонці error;
+    3. коректні рядки зливаються в таблицю військовослужбовців одним
+       INSERT ... ON CONFLICT (tax_id_number) DO UPDATE.
+
+Помилки по кожному рядку зчитуються з проміжної таблиці.
+"""
+import csv
+import tempfile
+
+from django.db import connection
+
+from apps.staffing.models import Position
+from .caching import invalidate_serviceman_cards
+from .importing import split_row, read_csv_rows
+from .models import Serviceman, Rank
+
+STAGING_TABLE = 'personnel_import_staging'
+
+
+class FastImportUnavailable(Exception):
+    """Швидкий імпорт неможливий на поточній БД (потрібні COPY та тимчасові таблиці PostgreSQL)."""
+    pass
+
+
+def fast_import_available():
+    """Чи підтримує поточна БД швидкий імпорт - для перевірки до початку імпорту."""
+    return connection.vendor == 'postgresql'
+
+# Колонки проміжної таблиці у порядку COPY
+STAGING_COLUMNS = [
+    ('line', 'integer'),
+    ('tax_id_number', 'text'),
+    ('rank_name', 'text'),
+    ('position_index', 'text'),
+    ('last_name', 'text'),
+    ('first_name', 'text'),
+    ('middle_name', 'text'),
+    ('date_of_birth', 'date'),
+    ('place_of_birth', 'text'),
+    ('passport_number', 'text'),
+    ('personal_number', 'text'),
+    ('enlistment_date', 'date'),
+    ('enlistment_authority', 'text'),
+    ('error', 'text'),
+]
+
+# Поля Serviceman, що заповнюються з проміжної таблиці
+MERGE_FIELDS = [
+    'tax_id_number', 'rank', 'position', 'last_name', 'first_name', 'middle_name', 'date_of_birth',
+    'place_of_birth', 'passport_number', 'personal_number', 'enlistment_date', 'enlistment_authority',
+]
+
+
+def _write_staging_csv(file, output):
+    """Розбирає вхідний файл і пише рядки проміжної таблиці у CSV для COPY."""
+    writer = csv.writer(output)
+    count = 0
+    for line, row in read_csv_rows(file):
+        count += 1
+        try:
+            data = split_row(row)
+        except (ValueError, KeyError) as e:
+            writer.writerow([line] + [None] * (len(STAGING_COLUMNS) - 2) + [f'Помилка - {e}'])
+            continue
+        writer.writerow([line] + [data[name] for name, _ in STAGING_COLUMNS[1:-1]] + [None])
+    return count
+
+
+def _validate(cursor, update_existing):
+    """Множинна перевірка рядків проміжної таблиці. Повертає кількість пропущених рядків."""
+    serviceman = connection.ops.quote_name(Serviceman._meta.db_table)
+    rank = connection.ops.quote_name(Rank._meta.db_table)
+    position = connection.ops.quote_name(Position._meta.db_table)
+
+    cursor.execute(f"""
+        UPDATE {STAGING_TABLE} s SET rank_id = r.id
+        FROM {rank} r WHERE r.name = s.rank_name AND s.error IS NULL
+    """)
+    cursor.execute(f"""
+        UPDATE {STAGING_TABLE} SET error = 'Помилка - Звання ''' || coalesce(rank_name, '') || ''' не знайдено у довіднику.'
+        WHERE error IS NULL AND rank_id IS NULL
+    """)
+    # Невідомий індекс посади, як і в звичайному імпорті, означає "без посади"
+    cursor.execute(f"""
+        UPDATE {STAGING_TABLE} s SET position_id = p.id
+        FROM {position} p WHERE p.position_index = s.position_index AND s.error IS NULL
+    """)
+    cursor.execute(f"""
+        UPDATE {STAGING_TABLE} s SET error = 'Помилка - РНОКПП повторюється у рядку ' || d.last_line || '.'
+        FROM (
+            SELECT tax_id_number, max(line) AS last_line FROM {STAGING_TABLE}
+            WHERE error IS NULL GROUP BY tax_id_number HAVING count(*) > 1
+        ) d
+        WHERE s.tax_id_number = d.tax_id_number AND s.line < d.last_line AND s.error IS NULL
+    """)
+
+    skipped = 0
+    if not update_existing:
+        cursor.execute(f"""
+            UPDATE {STAGING_TABLE} s SET skipped = true
+            FROM {serviceman} sm WHERE sm.tax_id_number = s.tax_id_number AND s.error IS NULL
+        """)
+        skipped = cursor.rowcount
+
+    cursor.execute(f"""
+        UPDATE {STAGING_TABLE} s SET error = 'Помилка - посада з ID=' || s.position_id || ' вже зайнята іншим військовослужбовцем.'
+        FROM (
+            SELECT line, row_number() OVER (PARTITION BY position_id ORDER BY line) AS n
+            FROM {STAGING_TABLE} WHERE error IS NULL AND NOT skipped AND position_id IS NOT NULL
+        ) d
+        WHERE s.line = d.line AND d.n > 1
+    """)
+    cursor.execute(f"""
+        UPDATE {STAGING_TABLE} s SET error = 'Помилка - посада з ID=' || s.position_id || ' вже зайнята іншим військовослужбовцем.'
+        FROM {serviceman} sm
+        WHERE sm.position_id = s.position_id AND sm.tax_id_number IS DISTINCT FROM s.tax_id_number
+          AND s.error IS NULL AND NOT s.skipped
+    """)
+    cursor.execute(f"""
+        UPDATE {STAGING_TABLE} s SET error = 'Помилка - особистий номер ' || s.personal_number || ' вже присвоєно іншому військовослужбовцю.'
+        FROM {serviceman} sm
+        WHERE sm.personal_number = s.personal_number AND sm.tax_id_number IS DISTINCT FROM s.tax_id_number
+          AND s.error IS NULL AND NOT s.skipped
+    """)
+    return skipped
+
+
+def _merge(cursor):
+    """Зливає коректні рядки в таблицю військовослужбовців. Повертає (створено, id оновлених)."""
+    serviceman = connection.ops.quote_name(Serviceman._meta.db_table)
+    columns = [Serviceman._meta.get_field(name).column for name in MERGE_FIELDS]
+    status_column = Serviceman._meta.get_field('status').column
+    update_columns = [column for column in columns if column != 'tax_id_number']
+
+    # Колонки проміжної таблиці названі так само, як колонки таблиці військовослужбовців
+    cursor.execute(f"""
+        INSERT INTO {serviceman} ({', '.join(columns)}, {status_column})
+        SELECT {', '.join(columns)}, %s FROM {STAGING_TABLE}
+        WHERE error IS NULL AND NOT skipped
+        ON CONFLICT (tax_id_number) DO UPDATE SET
+            {', '.join(f'{c} = EXCLUDED.{c}' for c in update_columns)}
+        WHERE ({', '.join(f'{serviceman}.{c}' for c in update_columns)})
+              IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in update_columns)})
+        RETURNING id, (xmax = 0) AS inserted
+    """, [Serviceman.Status.ON_DUTY])
+
+    created = 0
+    updated_ids = []
+    for pk, inserted in cursor.fetchall():
+        if inserted:
+            created += 1
+        else:
+            updated_ids.append(pk)
+    return created, updated_ids
+
+
+def fast_import(file, update_existing=False):
+    """
+    Завантажує відкритий CSV файл аркуша "2. ООС" через COPY та множинні запити.
+    Має викликатися всередині транзакції (проміжна таблиця видаляється при її завершенні).
+
+    Повертає словник з лічильниками та помилками [(номер рядка, опис)].
+    """
+    if not fast_import_available():
+        raise FastImportUnavailable('Швидкий імпорт підтримується лише для PostgreSQL.')
+
+    with tempfile.TemporaryFile('w+', encoding='utf-8', newline='') as staging_csv:
+        processed = _write_staging_csv(file, staging_csv)
+        staging_csv.seek(0)
+
+        with connection.cursor() as cursor:
+            columns = ', '.join(f'{name} {kind}' for name, kind in STAGING_COLUMNS)
+            cursor.execute(f"""
+                CREATE TEMPORARY TABLE {STAGING_TABLE} (
+                    {columns},
+                    rank_id bigint,
+                    position_id bigint,
+                    skipped boolean NOT NULL DEFAULT false
+                ) ON COMMIT DROP
+            """)
+            # Порожні текстові поля - порожні рядки, а не NULL; NULL лишається лише у датах та error
+            not_null = ', '.join(name for name, kind in STAGING_COLUMNS if kind == 'text' and name != 'error')
+            cursor.copy_expert(
+                f"COPY {STAGING_TABLE} ({', '.join(name for name, _ in STAGING_COLUMNS)}) "
+                f"FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL ({not_null}))",
+                staging_csv
+            )
+            cursor.execute(f'ANALYZE {STAGING_TABLE}')
+
+            skipped = _validate(cursor, update_existing)
+            created, updated_ids = _merge(cursor)
+
+            cursor.execute(f'SELECT line, error FROM {STAGING_TABLE} WHERE error IS NOT NULL ORDER BY line')
+            errors = cursor.fetchall()
+            cursor.execute(f'SELECT count(*) FROM {STAGING_TABLE} WHERE error IS NULL AND NOT skipped')
+            valid = cursor.fetchone()[0]
+
+    invalidate_serviceman_cards(*updated_ids)
+
+    return {
+        'processed': processed,
+        'created': created,
+        'updated': len(updated_ids),
+        'unchanged': valid - created - len(updated_ids),
+        'skipped': skipped,
+        'errors': errors,
+    }
@@ -0,0 +1,51 @@
+# apps/personnel/forms.py
+from django import forms
+from django.utils import timezone
+
+from apps.staffing.models import Unit
+from apps.staffing.unit_tree import get_unit_tree
+from .models import Serviceman
+
+BASE_CLASSES = 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-indigo-500 focus:ring-indigo-500 sm:text-sm'
+
+
+class BulkStatusChangeForm(forms.Form):
+    """
+    Форма масової зміни статусу (використовується також проміжною сторінкою дії в адмін-панелі).
+    """
+    status = forms.ChoiceField(label="Новий статус", choices=Serviceman.Status.choices)
+    event_date = forms.DateField(
+        label="Дата зміни статусу",
+        initial=timezone.localdate,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-input'})
+    )
+    order_reference = forms.CharField(label="Підстава (наказ)", max_length=255)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field_name, field in self.fields.items():
+            if field.widget.attrs.get('type') != 'date':
+                field.widget.attrs.update({'class': BASE_CLASSES})
+
+
+class UnitBulkStatusChangeForm(BulkStatusChangeForm):
+    """
+    Масова зміна статусу для всього особового складу підрозділу та підпорядкованих йому.
+    """
+    unit = forms.ModelChoiceField(label="Підрозділ", queryset=Unit.objects.all())
+    current_status = forms.ChoiceField(
+        label="Лише з поточним статусом",
+        choices=[('', 'Будь-який')] + Serviceman.Status.choices,
+        required=False
+    )
+
+    field_order = ['unit', 'current_status', 'status', 'event_date', 'order_reference']
+
+    def get_servicemen(self):
+        """Вибірка військовослужбовців, яких стосується зміна."""
+        servicemen = Serviceman.objects.filter(
+            position__unit__in=get_unit_tree().descendant_ids(self.cleaned_data['unit'].pk)
+        )
+        if self.cleaned_data['current_status']:
+            servicemen = servicemen.filter(status=self.cleaned_data['current_status'])
+        return servicemen
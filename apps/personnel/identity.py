@@ -0,0 +1,148 @@
+# apps/personnel/identity.py
+"""
+Пошук можливих дублікатів особи серед військовослужбовців.
+
+Для кожного військовослужбовця зберігаються нормалізовані ключі (ServicemanIdentity):
+ПІБ, прізвище, дата народження та номер документа без пробілів, знаків і з кириличними
+літерами замість схожих латинських. Попарне порівняння всього списку не виконується:
+кандидатами вважаються лише записи, що потрапили в один "блок" - мають однаковий
+індексований ключ (BLOCKS). Тому пошук займає один запит на блок і близький до лінійного.
+"""
+import re
+from collections import defaultdict
+from itertools import combinations, groupby
+
+from django.db.models import Count, F, Q, Window
+
+from .models import Serviceman, ServicemanIdentity
+
+IDENTITY_CHUNK_SIZE = 2000
+
+# Блоки з їхніми ключовими полями та умовою (порожні ключі блоком не вважаються)
+BLOCKS = {
+    'passport': (['passport_key'], ~Q(passport_key='')),
+    'name_dob': (['name_key', 'date_of_birth'], Q()),
+    'last_name_dob': (['last_name_key', 'date_of_birth'], Q()),
+}
+
+BLOCK_LABELS = {
+    'passport': 'номер документа',
+    'name_dob': 'ПІБ і дата народження',
+    'last_name_dob': 'прізвище і дата народження',
+}
+
+# Блоки, більші за цей розмір (напр. поширене прізвище з тією ж датою), не розкриваються в пари
+MAX_BLOCK_SIZE = 50
+
+# Латинські літери, що пишуться так само, як кириличні
+_LOOKALIKES = str.maketrans('ABCEHIKMOPTXYaceiopxy', 'АВСЕНІКМОРТХУасеіорху')
+_APOSTROPHES = str.maketrans({'’': "'", 'ʼ': "'", '‘': "'", '`': "'"})
+
+_PASSPORT_BOOK = re.compile(r'([А-ЯІЇЄҐ]{2})\s*№?\s*(\d{6})(?!\d)')
+_ID_CARD = re.compile(r'(?<!\d)(\d{9})(?!\d)')
+
+
+def normalize_name(value):
+    """Нижній регістр, кирилиця замість латинських двійників, без апострофів і зайвих пробілів."""
+    value = (value or '').translate(_APOSTROPHES).translate(_LOOKALIKES).casefold()
+    return ' '.join(value.replace("'", '').replace('-', ' ').split())
+
+
+def normalize_passport(value):
+    """
+    Номер документа без серії-пробілів, знаків "№" та назви документа:
+    "кк 123456 паспорт" і "KK№123456" дають "КК123456", ID-картка - 9 цифр.
+    """
+    value = (value or '').upper().translate(_LOOKALIKES)
+    if match := _PASSPORT_BOOK.search(value):
+        return ''.join(match.groups())
+    if match := _ID_CARD.search(value):
+        return match.group(1)
+    return ''
+
+
+# Поля Serviceman, з яких обчислюються ключі
+IDENTITY_SOURCE_FIELDS = ['last_name', 'first_name', 'middle_name', 'date_of_birth', 'passport_number']
+
+
+def build_identity(serviceman_id, last_name, first_name, middle_name, date_of_birth, passport_number):
+    return ServicemanIdentity(
+        serviceman_id=serviceman_id,
+        name_key=normalize_name(f'{last_name} {first_name} {middle_name}'),
+        last_name_key=normalize_name(last_name),
+        date_of_birth=date_of_birth,
+        passport_key=normalize_passport(passport_number),
+    )
+
+
+def refresh_identities(servicemen=None):
+    """
+    Перераховує ключі ідентичності для вибірки військовослужбовців (за замовчуванням - усіх)
+    порціями з одним upsert на порцію. Повертає кількість оброблених записів.
+    """
+    servicemen = Serviceman.objects.all() if servicemen is None else servicemen
+
+    count = 0
+    batch = []
+    values_iter = servicemen.order_by().values_list('pk', *IDENTITY_SOURCE_FIELDS).iterator(chunk_size=IDENTITY_CHUNK_SIZE)
+    for values in values_iter:
+        batch.append(build_identity(*values))
+        if len(batch) == IDENTITY_CHUNK_SIZE:
+            count += _save_identities(batch)
+            batch = []
+    return count + _save_identities(batch)
+
+
+def save_identity(serviceman):
+    """Оновлює ключі одного збереженого військовослужбовця (викликається з сигналу post_save)."""
+    _save_identities([build_identity(serviceman.pk, *(getattr(serviceman, name) for name in IDENTITY_SOURCE_FIELDS))])
+
+
+def _save_identities(identities):
+    ServicemanIdentity.objects.bulk_create(
+        identities,
+        update_conflicts=True,
+        unique_fields=['serviceman'],
+        update_fields=['name_key', 'last_name_key', 'date_of_birth', 'passport_key'],
+    )
+    return len(identities)
+
+
+def refresh_missing_identities():
+    """Додає ключі для військовослужбовців, створених масовими операціями без сигналів."""
+    return refresh_identities(Serviceman.objects.filter(identity__isnull=True))
+
+
+def find_duplicate_candidates(max_block_size=MAX_BLOCK_SIZE):
+    """
+    Повертає (пари кандидатів у дублікати [(id, id, [назви блоків])] - найімовірніші першими,
+    кількість пропущених груп, більших за max_block_size).
+
+    Для кожного блоку один запит вибирає лише записи, чий ключ зустрічається більше одного разу
+    (віконна функція COUNT(*) OVER (PARTITION BY ключ)); пари утворюються в межах групи.
+    """
+    pairs = defaultdict(list)
+    oversized = 0
+
+    for block, (fields, condition) in BLOCKS.items():
+        rows = (
+            ServicemanIdentity.objects.filter(condition)
+            .annotate(block_size=Window(Count('pk'), partition_by=[F(name) for name in fields]))
+            .filter(block_size__gt=1)
+            .order_by(*fields, 'serviceman_id')
+            .values_list(*fields, 'serviceman_id')
+        )
+        key_length = len(fields)
+        for _, group in groupby(rows.iterator(chunk_size=IDENTITY_CHUNK_SIZE), key=lambda row: row[:key_length]):
+            group = list(group)
+            if len(group) > max_block_size:
+                oversized += 1
+                continue
+            for first, second in combinations([row[key_length] for row in group], 2):
+                pairs[(first, second)].append(block)
+
+    candidates = sorted(
+        ((first, second, blocks) for (first, second), blocks in pairs.items()),
+        key=lambda candidate: (-len(candidate[2]), candidate[0], candidate[1])
+    )
+    return candidates, oversized
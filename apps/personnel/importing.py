@@ -0,0 +1,392 @@
+# apps/personnel/importing.py
+"""
+Пакетний конвеєр імпорту військовослужбовців з аркуша "2. ООС" Електронного журналу.
+
+Етапи конвеєра:
+    1. читання рядків файлу порціями (chunked);
+    2. розбір і перевірка рядка (parse_row) - чиста функція без звернень до БД,
+       що працює з довідниками {назва: id}; порції розбираються паралельно
+       у пулі процесів (parse_chunks);
+    3. запис порції (PersonnelWriter.write_chunk): один запит tax_id_number__in
+       для пошуку існуючих записів, далі один bulk_create з оновленням при конфлікті (upsert).
+
+Відхилені рядки записуються у CSV звіт (ErrorReport), а прогрес імпорту файлу -
+у контрольну точку ImportCheckpoint, за якою перерваний імпорт продовжується.
+"""
+import csv
+import hashlib
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import islice
+
+from django.db import transaction, DatabaseError
+
+from apps.staffing.models import Position
+from .caching import invalidate_serviceman_cards
+from .journal import (
+    HEADER_ROWS, POSITION_INDEX_SEPARATOR, COL_FULL_NAME, COL_RANK, COL_POSITION_INDEX, COL_DATE_OF_BIRTH,
+    COL_PLACE_OF_BIRTH, COL_TAX_ID, COL_PASSPORT, COL_ENLISTMENT
+)
+from .models import Serviceman, Rank
+
+IMPORT_CHUNK_SIZE = 1000
+
+# Службові колонки звіту про помилки (далі йдуть колонки вихідного рядка)
+ERROR_LINE_COLUMN = 'Рядок'
+ERROR_REASON_COLUMN = 'Причина'
+ERROR_PREFIX = 'Помилка - '
+ERROR_REPORT_TITLE = 'Звіт про відхилені рядки імпорту'
+
+# Поля, які імпорт встановлює (і оновлює в режимі --update)
+IMPORT_FIELDS = [
+    'rank_id', 'last_name', 'first_name', 'middle_name', 'date_of_birth', 'place_of_birth',
+    'passport_number', 'personal_number', 'enlistment_date', 'enlistment_authority', 'position_id',
+]
+
+# Ті самі поля за іменами моделі - для update_fields при upsert
+UPSERT_FIELDS = [field.removesuffix('_id') for field in IMPORT_FIELDS]
+
+# Найбільша довжина текстових полів Serviceman: задовге значення відхиляє рядок під час розбору,
+# а не зриває запис порції помилкою БД (у PostgreSQL - DataError)
+FIELD_MAX_LENGTHS = {
+    field.name: field.max_length
+    for field in Serviceman._meta.concrete_fields if field.get_internal_type() == 'CharField'
+}
+
+
+def load_reference_maps():
+    """Довідники для розбору рядків: {назва звання: id} та {індекс посади: id}."""
+    ranks = dict(Rank.objects.values_list('name', 'pk'))
+    positions = dict(Position.objects.values_list('position_index', 'pk'))
+    return ranks, positions
+
+
+def read_csv_rows(file):
+    """
+    Повертає пари (номер рядка у файлі, рядок-словник) для CSV аркуша "2. ООС",
+    пропускаючи службові рядки над заголовком.
+    """
+    for _ in range(HEADER_ROWS):
+        next(file)
+
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num + HEADER_ROWS, row
+
+
+def file_sha256(path):
+    """SHA-256 вмісту файлу - ідентифікатор файлу для контрольної точки імпорту."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while block := file.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunked(iterable, size):
+    """Розбиває ітерабельний об'єкт на списки довжиною size."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _parse_date(value):
+    return date.fromisoformat(value.strip())
+
+
+def split_row(row):
+    """
+    Розбирає текст рядка журналу без звернень до довідників: ПІБ, дати, орган призову.
+    Повертає словник полів Serviceman, де звання та посада ще подані назвою та індексом
+    (rank_name, position_index). При некоректних даних піднімає ValueError.
+    """
+    tax_id = (row.get(COL_TAX_ID) or '').strip()
+    if not tax_id:
+        raise ValueError('відсутній РНОКПП.')
+
+    full_name = (row.get(COL_FULL_NAME) or '').split()
+    if not full_name:
+        raise ValueError('відсутнє ПІБ.')
+
+    enlistment = (row.get(COL_ENLISTMENT) or '').split(',')
+    enlistment_date = _parse_date(enlistment[-1]) if enlistment[-1].strip() else None
+
+    data = {
+        'tax_id_number': tax_id,
+        'rank_name': row.get(COL_RANK),
+        # Перший індекс колонки - поточна посада (порожній - посади немає), решта - попередні
+        'position_index': (row.get(COL_POSITION_INDEX) or '').split(POSITION_INDEX_SEPARATOR)[0].strip(),
+        'last_name': full_name[0],
+        'first_name': full_name[1] if len(full_name) > 1 else '',
+        'middle_name': ' '.join(full_name[2:]),
+        'date_of_birth': _parse_date(row[COL_DATE_OF_BIRTH]),
+        'place_of_birth': row[COL_PLACE_OF_BIRTH],
+        'passport_number': row[COL_PASSPORT],
+        'personal_number': tax_id,
+        'enlistment_date': enlistment_date,
+        'enlistment_authority': ','.join(enlistment[:-1]),
+    }
+    for field, value in data.items():
+        max_length = FIELD_MAX_LENGTHS.get(field)
+        if max_length and isinstance(value, str) and len(value) > max_length:
+            raise ValueError(
+                f"значення поля '{Serviceman._meta.get_field(field).verbose_name}' довше за {max_length} символів."
+            )
+    return data
+
+
+def parse_row(row, ranks, positions):
+    """
+    Розбирає рядок журналу у словник полів Serviceman (з tax_id_number).
+    Не звертається до БД; при некоректних даних піднімає ValueError.
+    """
+    data = split_row(row)
+
+    rank_name = data.pop('rank_name')
+    data['rank_id'] = ranks.get(rank_name)
+    if not data['rank_id']:
+        raise ValueError(f"Звання '{rank_name}' не знайдено у довіднику.")
+
+    data['position_id'] = positions.get(data.pop('position_index'))
+    return data
+
+
+def parse_chunk(rows, ranks, positions):
+    """
+    Розбирає порцію рядків [(номер рядка, рядок)].
+    Повертає (розібрані [(номер рядка, дані)], помилки [(номер рядка, опис)]).
+    """
+    parsed = []
+    errors = []
+    for line, row in rows:
+        try:
+            parsed.append((line, parse_row(row, ranks, positions)))
+        except (ValueError, KeyError) as e:
+            errors.append((line, f'{ERROR_PREFIX}{e}'))
+    return parsed, errors
+
+
+class PersonnelWriter:
+    """
+    Записує розібрані порції до БД.
+
+    Займаність посад завантажується один раз на початку і підтримується в пам'яті,
+    щоб рядок, який призначає на вже зайняту посаду, відхилявся до запису,
+    а не зривав bulk-операцію всієї порції порушенням унікальності.
+    """
+
+    def __init__(self, update_existing=False):
+        self.update_existing = update_existing
+        self.counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+        # {position_id: РНОКПП того, хто обіймає посаду (None - особа без РНОКПП)}
+        self.occupancy = dict(
+            Serviceman.objects.filter(position__isnull=False).values_list('position_id', 'tax_id_number')
+        )
+
+    def write_chunk(self, parsed):
+        """
+        Записує порцію [(номер рядка, дані)]. Повертає помилки [(номер рядка, опис)].
+
+        Нові та змінені записи пишуться одним INSERT ... ON CONFLICT (tax_id_number) DO UPDATE,
+        який оновлює лише поля імпорту. Порція пишеться в окремій точці збереження;
+        якщо пакетний запис не вдався, рядки записуються поштучно, щоб відхилити лише проблемні.
+        """
+        existing = Serviceman.objects.in_bulk(
+            [data['tax_id_number'] for _, data in parsed], field_name='tax_id_number'
+        )
+
+        errors = []
+        rows = {}
+        for line, data in parsed:
+            tax_id = data['tax_id_number']
+            serviceman = existing.get(tax_id)
+
+            if (serviceman is not None or tax_id in rows) and not self.update_existing:
+                self.counts['skipped'] += 1
+                continue
+
+            if serviceman is not None and tax_id not in rows and all(
+                    getattr(serviceman, field) == data[field] for field in IMPORT_FIELDS):
+                # Повторний імпорт того ж файлу не переписує незмінені записи
+                self.counts['unchanged'] += 1
+                continue
+
+            position_id = data['position_id']
+            if position_id is not None and self.occupancy.get(position_id, tax_id) != tax_id:
+                errors.append((line, f'Помилка - посада з ID={position_id} вже зайнята іншим військовослужбовцем.'))
+                continue
+
+            previous_position_id = rows[tax_id][1].position_id if tax_id in rows else (
+                serviceman.position_id if serviceman else None)
+            if previous_position_id is not None:
+                self.occupancy.pop(previous_position_id, None)
+            if position_id is not None:
+                self.occupancy[position_id] = tax_id
+
+            rows[tax_id] = (line, Serviceman(**data))
+
+        try:
+            with transaction.atomic():
+                Serviceman.objects.bulk_create(
+                    [serviceman for _, serviceman in rows.values()],
+                    update_conflicts=True,
+                    unique_fields=['tax_id_number'],
+                    update_fields=UPSERT_FIELDS,
+                )
+        except DatabaseError:
+            # Порушення унікальності або інша помилка даних окремого рядка: порція пишеться по одному
+            errors.extend(self._write_one_by_one(rows, existing))
+        else:
+            updated = sum(1 for tax_id in rows if tax_id in existing)
+            self.counts['updated'] += updated
+            self.counts['created'] += len(rows) - updated
+
+        invalidate_serviceman_cards(*(existing[tax_id].pk for tax_id in rows if tax_id in existing))
+        return errors
+
+    def _write_one_by_one(self, rows, existing):
+        errors = []
+        for tax_id, (line, serviceman) in rows.items():
+            try:
+                with transaction.atomic():
+                    if tax_id in existing:
+                        serviceman.pk = existing[tax_id].pk
+                        serviceman.save(update_fields=UPSERT_FIELDS)
+                    else:
+                        serviceman.save()
+            except DatabaseError as e:
+                errors.append((line, f'{ERROR_PREFIX}{e}'))
+            else:
+                self.counts['updated' if tax_id in existing else 'created'] += 1
+        return errors
+
+
+# Довідники процесу-обробника пулу розбору (заповнюються ініціалізатором пулу)
+_worker_ranks = None
+_worker_positions = None
+
+
+def _init_parse_worker(ranks, positions):
+    global _worker_ranks, _worker_positions
+    _worker_ranks, _worker_positions = ranks, positions
+
+
+def _parse_chunk_in_worker(rows):
+    return parse_chunk(rows, _worker_ranks, _worker_positions)
+
+
+def parse_chunks(chunks, ranks, positions, workers=1):
+    """
+    Розбирає порції рядків і повертає трійки (рядки, розібрані, помилки) у вихідному порядку,
+    щоб запис до БД лишався одним послідовним етапом.
+
+    При workers > 1 порції розбираються у пулі процесів. Довідники передаються кожному
+    процесу один раз при старті, а в роботі одночасно перебуває не більше workers * 2 порцій,
+    тож файл не читається в пам'ять повністю. Процеси створюються через fork: вони
+    успадковують налаштований Django і не звертаються до БД.
+    """
+    if workers <= 1:
+        for rows in chunks:
+            yield rows, *parse_chunk(rows, ranks, positions)
+        return
+
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_parse_worker,
+            initargs=(ranks, positions),
+    ) as executor:
+        pending = deque()
+        for rows in chunks:
+            pending.append((rows, executor.submit(_parse_chunk_in_worker, rows)))
+            if len(pending) >= workers * 2:
+                rows, future = pending.popleft()
+                yield rows, *future.result()
+        while pending:
+            rows, future = pending.popleft()
+            yield rows, *future.result()
+
+
+class ErrorReport:
+    """
+    CSV звіт про відхилені рядки: усі колонки вихідного рядка в тому ж порядку, далі номер
+    рядка у вхідному файлі та причина відхилення. Над заголовком - title_rows службових рядків,
+    як у вхідному файлі, тож виправлений звіт імпортується повторно тією ж командою
+    (зайві колонки номера рядка та причини імпорт ігнорує).
+
+    Файл відкривається при першій помилці. У режимі append (продовження імпорту)
+    рядки дописуються до звіту попереднього запуску, інакше старий звіт видаляється.
+    """
+
+    def __init__(self, path, append=False, title_rows=HEADER_ROWS):
+        self.path = path
+        self.append = append
+        self.title_rows = title_rows
+        self.count = 0
+        self._file = None
+        self._writer = None
+        if not append and os.path.exists(path):
+            os.remove(path)
+
+    def write(self, errors, rows):
+        """Записує помилки [(номер рядка, опис)] порції рядків [(номер рядка, рядок)]."""
+        if not errors:
+            return
+        rows = dict(rows)
+        for line, message in sorted(errors):
+            row = rows.get(line, {})
+            if self._writer is None:
+                self._open([column for column in row if column is not None])
+            self._writer.writerow({
+                **row,
+                ERROR_LINE_COLUMN: line,
+                ERROR_REASON_COLUMN: message.removeprefix(ERROR_PREFIX),
+            })
+            self.count += 1
+        self._file.flush()
+
+    def _open(self, columns):
+        write_header = not (self.append and os.path.exists(self.path) and os.path.getsize(self.path))
+        self._file = open(self.path, 'a' if self.append else 'w', encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(
+            self._file, fieldnames=columns + [ERROR_LINE_COLUMN, ERROR_REASON_COLUMN], extrasaction='ignore'
+        )
+        if write_header:
+            # Службові рядки над заголовком, які пропускає read_csv_rows
+            title = csv.writer(self._file)
+            for number in range(self.title_rows):
+                title.writerow([ERROR_REPORT_TITLE] if number == 0 else [])
+            self._writer.writeheader()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ImportProgress:
+    """Лічильник оброблених рядків зі швидкістю в рядках за секунду."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.processed = 0
+
+    def advance(self, rows):
+        self.processed += rows
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
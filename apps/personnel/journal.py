@@ -0,0 +1,211 @@
+# apps/personnel/journal.py
+"""
+Макет книги "Електронного журналу обліку особового складу" та потоковий експорт у xlsx.
+
+Назви аркушів і заголовки колонок збігаються з паперовим журналом, тому
+експортований аркуш "2. ООС", збережений як CSV, приймає команда import_personnel,
+а всю книгу - команда import_journal (аркуші пов'язуються за РНОКПП).
+"""
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from apps.staffing.models import Unit
+from .models import Serviceman, PositionHistory, Education, FamilyMember, TemporaryArrival, IrrecoverableLoss
+
+# Кількість службових рядків над рядком заголовків на кожному аркуші
+HEADER_ROWS = 3
+
+# Розмір порції, якою читаються записи з БД під час експорту
+EXPORT_CHUNK_SIZE = 2000
+
+# Роздільник індексів посад у колонці "Індекс посади" (буквальний "\n", як у журналі).
+# Перший індекс у колонці - поточна посада, порожній для особи без посади
+POSITION_INDEX_SEPARATOR = '\\n'
+
+OOS_SHEET = '2. ООС'
+EDUCATION_SHEET = str(Education._meta.verbose_name_plural)
+FAMILY_SHEET = str(FamilyMember._meta.verbose_name_plural)
+ARRIVALS_SHEET = str(TemporaryArrival._meta.verbose_name_plural)
+LOSSES_SHEET = str(IrrecoverableLoss._meta.verbose_name_plural)
+
+# Колонки аркуша "2. ООС"
+COL_FULL_NAME = 'ПРІЗВИЩЕ (за наявності) Ім\'я По батькові (за наявності)'
+COL_RANK = 'Звання'
+COL_POSITION_INDEX = 'Індекс посади /\\nІндексм посад, які обіймав(ла)'
+COL_DATE_OF_BIRTH = 'Дата народження'
+COL_PLACE_OF_BIRTH = 'Місце народження'
+COL_TAX_ID = 'РНОКПП  (за наявності)'
+COL_PASSPORT = 'Серія (за наявності) і номер документа, що посвідчує особу та назва документа'
+COL_ENLISTMENT = 'Ким і коли призваний (прийнятий) на військову службу'
+COL_POSITION = 'Посада'
+COL_UNIT = 'Підрозділ'
+COL_STATUS = 'Статус'
+
+OOS_COLUMNS = [
+    '№ з/п', COL_FULL_NAME, COL_RANK, COL_POSITION_INDEX, COL_POSITION, COL_UNIT, COL_DATE_OF_BIRTH,
+    COL_PLACE_OF_BIRTH, COL_TAX_ID, COL_PASSPORT, COL_ENLISTMENT, COL_STATUS,
+]
+
+EDUCATION_FIELDS = ['level', 'institution_name', 'graduation_year', 'specialty']
+
+FAMILY_FIELDS = ['relationship', 'last_name', 'first_name', 'middle_name', 'date_of_birth', 'address']
+
+ARRIVAL_FIELDS = [
+    'full_name', 'rank_name', 'position_name', 'origin_unit', 'arrival_reason', 'arrival_date',
+    'arrival_order', 'departure_date', 'departure_order', 'notes',
+]
+
+LOSS_FIELDS = [
+    'loss_type', 'loss_date', 'circumstances', 'loss_location', 'exclusion_date', 'exclusion_order',
+    'notification_details', 'burial_location',
+]
+
+
+def _format_date(value):
+    return value.isoformat() if value else ''
+
+
+def _verbose(model, field_name):
+    return str(model._meta.get_field(field_name).verbose_name)
+
+
+def _cell(obj, field_name):
+    """Значення поля для комірки: назва варіанту для полів з choices, ISO-рядок для дат."""
+    if obj._meta.get_field(field_name).choices:
+        return getattr(obj, f'get_{field_name}_display')()
+    value = getattr(obj, field_name)
+    return _format_date(value) if field_name.endswith('_date') else value
+
+
+def _write_title(ws, title, unit):
+    """Заповнює службові рядки над заголовком (їх пропускає імпорт)."""
+    ws.append([title])
+    ws.append([f"Підрозділ: {unit.name if unit else 'Всі підрозділи'}",
+               f"Станом на: {timezone.now().strftime('%d.%m.%Y %H:%M')}"])
+    ws.append([])
+
+
+def _write_oos_sheet(wb, unit, units):
+    ws = wb.create_sheet(OOS_SHEET)
+    _write_title(ws, 'Облік особового складу', unit)
+    ws.append(OOS_COLUMNS)
+
+    servicemen = Serviceman.objects.select_related('rank', 'position__unit').prefetch_related(
+        Prefetch(
+            'position_history',
+            queryset=PositionHistory.objects.select_related('position').order_by('-start_date'),
+        )
+    ).order_by('position__unit__tree_id', 'position__unit__lft', 'last_name', 'first_name')
+    if units is not None:
+        servicemen = servicemen.filter(position__unit__in=units)
+
+    count = 0
+    for serviceman in servicemen.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        count += 1
+        # Перший індекс - завжди поточна посада (порожній, якщо посади немає), далі - попередні:
+        # імпорт (importing.split_row) вважає поточною саме перший
+        indexes = [serviceman.position.position_index if serviceman.position else '']
+        for record in serviceman.position_history.all():
+            if record.position.position_index not in indexes:
+                indexes.append(record.position.position_index)
+
+        enlistment = ''
+        if serviceman.enlistment_date:
+            enlistment = f"{serviceman.enlistment_authority}, {_format_date(serviceman.enlistment_date)}"
+
+        ws.append([
+            count,
+            serviceman.full_name,
+            serviceman.rank.name,
+            POSITION_INDEX_SEPARATOR.join(indexes),
+            serviceman.position.name if serviceman.position else '',
+            serviceman.position.unit.name if serviceman.position else '',
+            _format_date(serviceman.date_of_birth),
+            serviceman.place_of_birth,
+            serviceman.tax_id_number or '',
+            serviceman.passport_number,
+            enlistment,
+            serviceman.get_status_display(),
+        ])
+    return count
+
+
+def _write_serviceman_records_sheet(wb, model, fields, title, unit, units):
+    """Аркуш записів, що належать військовослужбовцю (освіта, члени сім'ї), з РНОКПП для зв'язку з "2. ООС"."""
+    ws = wb.create_sheet(str(model._meta.verbose_name_plural))
+    _write_title(ws, title, unit)
+    ws.append(['№ з/п', COL_FULL_NAME, COL_TAX_ID] + [_verbose(model, name) for name in fields])
+
+    records = model.objects.select_related('serviceman').order_by('serviceman__last_name', 'serviceman_id', 'pk')
+    if units is not None:
+        records = records.filter(serviceman__position__unit__in=units)
+
+    count = 0
+    for record in records.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        count += 1
+        ws.append([count, record.serviceman.full_name, record.serviceman.tax_id_number or '']
+                  + [_cell(record, name) for name in fields])
+    return count
+
+
+def _write_arrivals_sheet(wb, unit):
+    """
+    Тимчасово прибулі не прив'язані до штатних підрозділів,
+    тому аркуш завжди містить усі записи.
+    """
+    ws = wb.create_sheet(ARRIVALS_SHEET)
+    _write_title(ws, 'Облік тимчасово прибулого особового складу', unit)
+    ws.append(['№ з/п'] + [_verbose(TemporaryArrival, name) for name in ARRIVAL_FIELDS])
+
+    count = 0
+    for arrival in TemporaryArrival.objects.order_by('arrival_date', 'pk').iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        count += 1
+        ws.append([count] + [_cell(arrival, name) for name in ARRIVAL_FIELDS])
+    return count
+
+
+def _write_losses_sheet(wb, unit, units):
+    """Втрати відносяться до підрозділу за будь-якою посадою з історії посад військовослужбовця."""
+    ws = wb.create_sheet(LOSSES_SHEET)
+    _write_title(ws, 'Облік безповоротних втрат', unit)
+    ws.append(['№ з/п', COL_FULL_NAME, COL_RANK, COL_TAX_ID] + [_verbose(IrrecoverableLoss, name) for name in LOSS_FIELDS])
+
+    losses = IrrecoverableLoss.objects.select_related('serviceman__rank').order_by('loss_date', 'pk')
+    if units is not None:
+        losses = losses.filter(
+            serviceman_id__in=PositionHistory.objects.filter(position__unit__in=units).values('serviceman_id')
+        )
+
+    count = 0
+    for loss in losses.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        count += 1
+        ws.append([count, loss.serviceman.full_name, loss.serviceman.rank.name, loss.serviceman.tax_id_number or '']
+                  + [_cell(loss, name) for name in LOSS_FIELDS])
+    return count
+
+
+def export_journal(output, unit: Unit = None):
+    """
+    Записує повну книгу Електронного журналу для підрозділу та всіх підпорядкованих йому
+    (або для всієї структури, якщо підрозділ не вказано) у файл чи файлоподібний об'єкт.
+
+    Книга створюється в режимі write-only: рядки одразу скидаються на диск,
+    а записи з БД читаються порціями по EXPORT_CHUNK_SIZE.
+    Повертає кількість експортованих рядків по аркушах.
+    """
+    from openpyxl import Workbook
+
+    units = unit.get_descendants(include_self=True) if unit else None
+
+    wb = Workbook(write_only=True)
+    counts = {
+        OOS_SHEET: _write_oos_sheet(wb, unit, units),
+        EDUCATION_SHEET: _write_serviceman_records_sheet(
+            wb, Education, EDUCATION_FIELDS, 'Освіта військовослужбовців', unit, units),
+        FAMILY_SHEET: _write_serviceman_records_sheet(
+            wb, FamilyMember, FAMILY_FIELDS, "Члени сімей військовослужбовців", unit, units),
+        ARRIVALS_SHEET: _write_arrivals_sheet(wb, unit),
+        LOSSES_SHEET: _write_losses_sheet(wb, unit, units),
+    }
+    wb.save(output)
+    return counts
@@ -0,0 +1,234 @@
+# apps/personnel/journal_import.py
+"""
+Потоковий імпорт книги Електронного журналу (xlsx) - команда import_journal.
+
+Книга читається openpyxl у режимі read-only: рядки аркушів надходять потоком,
+без завантаження всієї книги в пам'ять, і записуються порціями.
+Аркуш "2. ООС" проходить той самий конвеєр, що й import_personnel (importing.py);
+освіта, члени сім'ї та втрати прив'язуються до військовослужбовців за РНОКПП
+одним запитом на порцію. Аркуші імпортуються після "2. ООС", тож посилатися
+можна й на військовослужбовців, створених цим же імпортом.
+"""
+from datetime import date, datetime
+
+from django.db import models
+
+from .caching import invalidate_serviceman_cards
+from .importing import IMPORT_CHUNK_SIZE, PersonnelWriter, chunked, load_reference_maps, parse_chunks
+from .journal import (
+    HEADER_ROWS, OOS_SHEET, EDUCATION_SHEET, FAMILY_SHEET, ARRIVALS_SHEET, LOSSES_SHEET, COL_TAX_ID,
+    EDUCATION_FIELDS, FAMILY_FIELDS, ARRIVAL_FIELDS, LOSS_FIELDS
+)
+from .loss_stats import rebuild_loss_statistics
+from .models import Serviceman, Education, FamilyMember, TemporaryArrival, IrrecoverableLoss
+
+
+def cell_text(value):
+    """Приводить значення комірки до тексту, як у CSV: дати - ISO, цілі числа (РНОКПП) - без '.0'."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def read_sheet_rows(wb, title):
+    """
+    Повертає пари (номер рядка, рядок-словник) аркуша книги, відкритої в режимі read-only.
+    Службові рядки над заголовком та порожні рядки пропускаються; відсутній аркуш - порожній.
+    """
+    if title not in wb.sheetnames:
+        return
+
+    rows = wb[title].iter_rows(min_row=HEADER_ROWS + 1, values_only=True)
+    header = [cell_text(value) for value in next(rows, ())]
+    for number, values in enumerate(rows, start=HEADER_ROWS + 2):
+        if all(value is None or value == '' for value in values):
+            continue
+        yield number, {column: cell_text(value) for column, value in zip(header, values) if column}
+
+
+def parse_model_row(model, fields, row):
+    """
+    Розбирає колонки рядка, названі за verbose_name полів моделі, у словник полів.
+    Для полів з choices приймається як назва варіанту, так і його код. При некоректних даних - ValueError.
+    """
+    data = {}
+    for name in fields:
+        field = model._meta.get_field(name)
+        column = str(field.verbose_name)
+        value = row.get(column, '')
+
+        if value == '':
+            if not field.blank:
+                raise ValueError(f"не заповнено колонку '{column}'.")
+            data[name] = None if field.null else ''
+        elif field.choices:
+            choices = {str(label): key for key, label in field.choices}
+            choices.update((key, key) for key, _ in field.choices)
+            if value not in choices:
+                raise ValueError(f"невідоме значення '{value}' у колонці '{column}'.")
+            data[name] = choices[value]
+        elif isinstance(field, models.DateField):
+            data[name] = date.fromisoformat(value)
+        elif isinstance(field, models.IntegerField):
+            data[name] = int(value)
+        else:
+            data[name] = value
+    return data
+
+
+class JournalImporter:
+    """
+    Імпортує аркуші відкритої книги журналу. Кожен метод import_* повертає лічильники аркуша,
+    а помилки накопичуються в errors як (аркуш, номер рядка, опис).
+    """
+
+    def __init__(self, wb, update_existing=False, batch_size=IMPORT_CHUNK_SIZE, workers=1):
+        self.wb = wb
+        self.update_existing = update_existing
+        self.batch_size = batch_size
+        self.workers = workers
+        self.errors = []
+
+    def _chunks(self, sheet):
+        return chunked(read_sheet_rows(self.wb, sheet), self.batch_size)
+
+    def import_servicemen(self):
+        """Аркуш "2. ООС" - конвеєром import_personnel (розбір у пулі процесів, пакетний upsert)."""
+        ranks, positions = load_reference_maps()
+        writer = PersonnelWriter(update_existing=self.update_existing)
+        for rows, parsed, errors in parse_chunks(self._chunks(OOS_SHEET), ranks, positions, self.workers):
+            errors += writer.write_chunk(parsed)
+            self.errors.extend((OOS_SHEET, line, message) for line, message in errors)
+        return writer.counts
+
+    def _parse_linked(self, sheet, model, fields, rows):
+        """Розбирає порцію рядків аркуша, пов'язаного з "2. ООС". Повертає [(id військовослужбовця, дані)]."""
+        tax_ids = {row.get(COL_TAX_ID, '') for _, row in rows} - {''}
+        servicemen = dict(
+            Serviceman.objects.filter(tax_id_number__in=tax_ids).values_list('tax_id_number', 'pk')
+        )
+
+        parsed = []
+        for line, row in rows:
+            tax_id = row.get(COL_TAX_ID, '')
+            try:
+                if not tax_id:
+                    raise ValueError('відсутній РНОКПП.')
+                if tax_id not in servicemen:
+                    raise ValueError(f'військовослужбовця з РНОКПП {tax_id} не знайдено.')
+                parsed.append((servicemen[tax_id], parse_model_row(model, fields, row)))
+            except ValueError as e:
+                self.errors.append((sheet, line, f'Помилка - {e}'))
+        return parsed
+
+    def _import_serviceman_records(self, sheet, model, fields, key_fields):
+        """
+        Освіта та члени сім'ї. Записи, що вже є у військовослужбовця (за key_fields),
+        пропускаються, тож повторний імпорт тієї ж книги не створює дублікатів.
+        """
+        counts = {'created': 0, 'skipped': 0}
+        for rows in self._chunks(sheet):
+            parsed = self._parse_linked(sheet, model, fields, rows)
+            existing = set(
+                model.objects.filter(serviceman_id__in={pk for pk, _ in parsed})
+                .values_list('serviceman_id', *key_fields)
+            )
+
+            records = []
+            for serviceman_id, data in parsed:
+                key = (serviceman_id, *(data[name] for name in key_fields))
+                if key in existing:
+                    counts['skipped'] += 1
+                    continue
+                existing.add(key)
+                records.append(model(serviceman_id=serviceman_id, **data))
+
+            model.objects.bulk_create(records)
+            counts['created'] += len(records)
+            # bulk_create не надсилає сигналів, тому інвалідуємо картки явно
+            invalidate_serviceman_cards(*{record.serviceman_id for record in records})
+        return counts
+
+    def import_education(self):
+        return self._import_serviceman_records(
+            EDUCATION_SHEET, Education, EDUCATION_FIELDS, ['level', 'institution_name', 'graduation_year']
+        )
+
+    def import_family(self):
+        return self._import_serviceman_records(
+            FAMILY_SHEET, FamilyMember, FAMILY_FIELDS, ['relationship', 'last_name', 'first_name', 'date_of_birth']
+        )
+
+    def import_arrivals(self):
+        """Тимчасово прибулі не мають РНОКПП; запис вважається наявним за ПІБ та датою прибуття."""
+        counts = {'created': 0, 'skipped': 0}
+        for rows in self._chunks(ARRIVALS_SHEET):
+            parsed = []
+            for line, row in rows:
+                try:
+                    parsed.append(parse_model_row(TemporaryArrival, ARRIVAL_FIELDS, row))
+                except ValueError as e:
+                    self.errors.append((ARRIVALS_SHEET, line, f'Помилка - {e}'))
+
+            existing = set(
+                TemporaryArrival.objects.filter(full_name__in={data['full_name'] for data in parsed})
+                .values_list('full_name', 'arrival_date')
+            )
+            arrivals = []
+            for data in parsed:
+                key = (data['full_name'], data['arrival_date'])
+                if key in existing:
+                    counts['skipped'] += 1
+                    continue
+                existing.add(key)
+                arrivals.append(TemporaryArrival(**data))
+
+            TemporaryArrival.objects.bulk_create(arrivals)
+            counts['created'] += len(arrivals)
+        return counts
+
+    def import_losses(self):
+        """
+        Безповоротні втрати (одна на військовослужбовця). Наявні записи оновлюються
+        лише в режимі --update одним INSERT ... ON CONFLICT (serviceman_id) DO UPDATE.
+        """
+        counts = {'created': 0, 'updated': 0, 'skipped': 0}
+        for rows in self._chunks(LOSSES_SHEET):
+            # Якщо військовослужбовець трапляється в порції кілька разів, діє останній рядок
+            parsed = dict(self._parse_linked(LOSSES_SHEET, IrrecoverableLoss, LOSS_FIELDS, rows))
+            existing = set(
+                IrrecoverableLoss.objects.filter(serviceman_id__in=parsed).values_list('serviceman_id', flat=True)
+            )
+            if not self.update_existing:
+                counts['skipped'] += len(existing)
+                parsed = {pk: data for pk, data in parsed.items() if pk not in existing}
+                existing = set()
+
+            IrrecoverableLoss.objects.bulk_create(
+                [IrrecoverableLoss(serviceman_id=pk, **data) for pk, data in parsed.items()],
+                update_conflicts=True,
+                unique_fields=['serviceman'],
+                update_fields=LOSS_FIELDS,
+            )
+            counts['updated'] += len(existing)
+            counts['created'] += len(parsed) - len(existing)
+            invalidate_serviceman_cards(*parsed)
+        # Upsert сигналів не надсилає, а старі комірки змінених записів невідомі - перебудовуємо статистику
+        rebuild_loss_statistics()
+        return counts
+
+    def import_all(self):
+        """Імпортує всі аркуші книги. Повертає {назва аркуша: лічильники}."""
+        return {
+            OOS_SHEET: self.import_servicemen(),
+            EDUCATION_SHEET: self.import_education(),
+            FAMILY_SHEET: self.import_family(),
+            ARRIVALS_SHEET: self.import_arrivals(),
+            LOSSES_SHEET: self.import_losses(),
+        }
@@ -0,0 +1,113 @@
+# apps/personnel/loss_stats.py
+"""
+Статистика безповоротних втрат за місяцями, видами втрат і підрозділами (таблиця LossStatistic).
+
+При збереженні чи видаленні одного запису IrrecoverableLoss перераховуються лише комірки
+(місяць, вид, підрозділ), яких він стосувався до та після зміни - один COUNT по індексу
+loss_stat_bucket_idx на комірку. Масові операції (bulk_create, імпорт журналу, тестові дані)
+сигналів не надсилають і викликають rebuild_loss_statistics().
+
+Підрозділом втрати вважається підрозділ посади, яку військовослужбовець обіймав останньою:
+поточна посада, а якщо її вже звільнено - посада з останнього запису історії посад.
+"""
+from datetime import date
+
+from django.db import transaction, IntegrityError
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, TruncMonth
+
+from .models import Serviceman, PositionHistory, IrrecoverableLoss, LossStatistic
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    """Перше число місяця, зсунутого на count місяців (count може бути від'ємним)."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def statistic_key(loss_date, loss_type, unit_id):
+    """Комірка статистики, до якої належить запис втрати."""
+    return month_start(loss_date), loss_type, unit_id
+
+
+def loss_unit_id(serviceman_id):
+    """Підрозділ останньої посади військовослужбовця (None, якщо посад не було)."""
+    unit_id = Serviceman.objects.filter(pk=serviceman_id).values_list('position__unit', flat=True).first()
+    if unit_id is None:
+        unit_id = (
+            PositionHistory.objects.filter(serviceman_id=serviceman_id)
+            .order_by('-start_date', '-pk')
+            .values_list('position__unit', flat=True)
+            .first()
+        )
+    return unit_id
+
+
+def refresh_loss_units(losses=None):
+    """Заповнює підрозділ для записів втрат без нього (за замовчуванням - для всіх) одним UPDATE."""
+    losses = IrrecoverableLoss.objects.all() if losses is None else losses
+    last_history = PositionHistory.objects.filter(serviceman=OuterRef('serviceman')).order_by('-start_date', '-pk')
+    return losses.filter(unit__isnull=True).update(unit=Coalesce(
+        Subquery(Serviceman.objects.filter(pk=OuterRef('serviceman')).values('position__unit')[:1]),
+        Subquery(last_history.values('position__unit')[:1]),
+    ))
+
+
+@transaction.atomic
+def refresh_loss_statistics(*keys):
+    """Перераховує комірки статистики, задані як (місяць, вид втрати, id підрозділу)."""
+    for month, loss_type, unit_id in set(keys):
+        count = IrrecoverableLoss.objects.filter(
+            loss_type=loss_type,
+            unit_id=unit_id,
+            loss_date__gte=month,
+            loss_date__lt=add_months(month, 1),
+        ).count()
+
+        cell = LossStatistic.objects.filter(month=month, loss_type=loss_type, unit_id=unit_id)
+        if not count:
+            cell.delete()
+        elif not cell.update(count=count):
+            try:
+                with transaction.atomic():
+                    LossStatistic.objects.create(month=month, loss_type=loss_type, unit_id=unit_id, count=count)
+            except IntegrityError:
+                # Комірку щойно створила паралельна транзакція (унікальність - і для комірок без підрозділу)
+                cell.update(count=count)
+
+
+def _rebuild(condition):
+    rows = (
+        IrrecoverableLoss.objects.filter(condition)
+        .annotate(month=TruncMonth('loss_date'))
+        .values('month', 'loss_type', 'unit')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+    cells = [
+        LossStatistic(month=row['month'], loss_type=row['loss_type'], unit_id=row['unit'], count=row['count'])
+        for row in rows
+    ]
+    LossStatistic.objects.filter(condition).delete()
+    LossStatistic.objects.bulk_create(cells)
+    return len(cells)
+
+
+@transaction.atomic
+def rebuild_loss_statistics():
+    """
+    Перебудовує всю статистику одним групувальним запитом (після масових операцій).
+    Спочатку заповнює підрозділ записам без нього. Повертає кількість комірок.
+    """
+    refresh_loss_units()
+    return _rebuild(Q())
+
+
+@transaction.atomic
+def refresh_unassigned_loss_statistics():
+    """Перераховує комірки втрат без підрозділу (напр. після видалення підрозділу)."""
+    return _rebuild(Q(unit__isnull=True))
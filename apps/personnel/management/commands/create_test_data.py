@@ -1,34 +1,173 @@
 # apps/personnel/management/commands/create_test_data.py
-from django.core.management.base import BaseCommand
-from django.contrib.auth import get_user_model
-from datetime import date, timedelta
+"""
+Генератор синтетичних даних production-розміру для профілювання звітів і представлень.
+Використання: python manage.py create_test_data --scale 5 --seed 42 --no-input
+
+Масштаб 1 - одна бригада (управління, 4 батальйони по 3 роти по 3 взводи), близько
+1300 посад, укомплектованих на ~85%. Для кожного військовослужбовця створюються освіта,
+члени сім'ї, контракти, історія посад, події служби, а також рапорти та записи аудиту.
+Усі записи створюються через bulk_create; дерево підрозділів перебудовується один раз.
+"""
 import random
-from apps.personnel.models import Rank, Serviceman, Contract, ServiceHistoryEvent, Education, FamilyMember
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.auditing.models import AuditLog
 from apps.documents.models import ServicemanReport
+from apps.personnel.caching import invalidate_all_serviceman_cards
+from apps.personnel.loss_stats import rebuild_loss_statistics
+from apps.personnel.services import refresh_current_contracts
+from apps.personnel.models import (
+    Rank, Serviceman, Contract, ServiceHistoryEvent, Education, FamilyMember, PositionHistory, IrrecoverableLoss
+)
 from apps.staffing.models import Unit, MilitarySpecialty, Position
+from apps.staffing.unit_tree import invalidate_unit_tree
 
 User = get_user_model()
 
+BATCH_SIZE = 2000
+
+RANKS = [('Солдат', 1), ('Старший солдат', 2), ('Молодший сержант', 3), ('Сержант', 4),
+         ('Старший сержант', 5), ('Молодший лейтенант', 11), ('Лейтенант', 12), ('Старший лейтенант', 13),
+         ('Капітан', 14), ('Майор', 15), ('Підполковник', 16), ('Полковник', 17)]
+
+SPECIALTIES = [('100100', 'Стрілець'), ('100200', 'Командир відділення'), ('100300', 'Командир взводу'),
+               ('100400', 'Командир роти'), ('100500', 'Командир батальйону'), ('100600', 'Командир бригади'),
+               ('101100', 'Кулеметник'), ('101200', 'Навідник'), ('200100', 'Офіцер штабу'),
+               ('300100', 'Водій'), ('400100', 'Санітарний інструктор'), ('500100', "Зв'язківець")]
+
+# Штат підрозділів: (найменування посади, категорія (звання), код ВОС, тарифний розряд, кількість)
+PLATOON_STAFF = [('Командир взводу', 'Лейтенант', '100300', '15', 1),
+                 ('Головний сержант взводу', 'Старший сержант', '100200', '8', 1)]
+SQUAD_STAFF = [('Командир відділення', 'Сержант', '100200', '6', 1),
+               ('Навідник', 'Старший солдат', '101200', '5', 1),
+               ('Кулеметник', 'Солдат', '101100', '4', 1),
+               ('Водій', 'Солдат', '300100', '4', 1),
+               ('Стрілець', 'Солдат', '100100', '3', 5)]
+COMPANY_STAFF = [('Командир роти', 'Капітан', '100400', '18', 1),
+                 ('Заступник командира роти', 'Старший лейтенант', '200100', '16', 1),
+                 ('Головний сержант роти', 'Старший сержант', '100200', '9', 1),
+                 ('Санітарний інструктор', 'Молодший сержант', '400100', '6', 1),
+                 ("Старший стрілець-зв'язківець", 'Старший солдат', '500100', '5', 2),
+                 ('Водій', 'Солдат', '300100', '4', 2)]
+BATTALION_STAFF = [('Командир батальйону', 'Підполковник', '100500', '22', 1),
+                   ('Начальник штабу батальйону', 'Майор', '200100', '20', 1),
+                   ('Офіцер штабу', 'Капітан', '200100', '17', 6),
+                   ("Начальник зв'язку", 'Старший лейтенант', '500100', '16', 1),
+                   ("Зв'язківець", 'Солдат', '500100', '4', 8),
+                   ('Водій', 'Солдат', '300100', '4', 8)]
+BRIGADE_STAFF = [('Командир бригади', 'Полковник', '100600', '25', 1),
+                 ('Начальник штабу бригади', 'Полковник', '200100', '24', 1),
+                 ('Офіцер штабу', 'Майор', '200100', '19', 20),
+                 ('Офіцер штабу', 'Капітан', '200100', '17', 16),
+                 ('Діловод', 'Сержант', '200100', '6', 10),
+                 ('Водій', 'Солдат', '300100', '4', 12)]
+
+BATTALIONS_PER_BRIGADE = 4
+COMPANIES_PER_BATTALION = 3
+PLATOONS_PER_COMPANY = 3
+SQUADS_PER_PLATOON = 3
+
+FILL_RATE = 0.85
+UNASSIGNED_RATE = 0.03
+
+LAST_NAMES = ['Шевченко', 'Коваленко', 'Бондаренко', 'Ткаченко', 'Кравченко', 'Олійник', 'Шевчук', 'Коваль',
+              'Поліщук', 'Бондар', 'Ткачук', 'Марченко', 'Руденко', 'Савченко', 'Мельник', 'Лисенко', 'Мороз',
+              'Кравчук', 'Петренко', 'Клименко', 'Павленко', 'Савчук', 'Кузьменко', 'Левченко', 'Гончаренко',
+              'Харченко', 'Бойко', 'Литвиненко', 'Панченко', 'Романенко', 'Іваненко', 'Федоренко']
+FIRST_NAMES = ['Олександр', 'Андрій', 'Сергій', 'Володимир', 'Дмитро', 'Іван', 'Микола', 'Василь', 'Петро',
+               'Юрій', 'Олег', 'Віктор', 'Богдан', 'Тарас', 'Максим', 'Роман', 'Ігор', 'Артем']
+PATRONYMICS = ['Олександрович', 'Андрійович', 'Сергійович', 'Володимирович', 'Миколайович', 'Іванович',
+               'Васильович', 'Петрович', 'Юрійович', 'Вікторович', 'Богданович', 'Олегович']
+FEMALE_PATRONYMICS = ['Олександрівна', 'Андріївна', 'Сергіївна', 'Володимирівна', 'Миколаївна', 'Іванівна',
+                      'Василівна', 'Петрівна', 'Юріївна', 'Вікторівна']
+FEMALE_NAMES = ['Олена', 'Наталія', 'Тетяна', 'Ірина', 'Оксана', 'Марія', 'Юлія', 'Анна', 'Світлана', 'Катерина']
+CITIES = ['м. Київ', 'м. Львів', 'м. Харків', 'м. Одеса', 'м. Дніпро', 'м. Полтава', 'м. Вінниця', 'м. Житомир',
+          'м. Чернігів', 'м. Суми', 'м. Рівне', 'м. Черкаси']
+INSTITUTIONS = ['КНУ ім. Т. Шевченка', 'НТУУ "КПІ"', 'ЛНУ ім. І. Франка', 'ХНУ ім. В. Каразіна',
+                'НУОУ ім. І. Черняховського', 'НАСВ ім. П. Сагайдачного', 'Професійний ліцей №5', 'ЗОШ №1']
+
+STATUS_WEIGHTS = [(Serviceman.Status.ON_DUTY, 86), (Serviceman.Status.ON_LEAVE, 6),
+                  (Serviceman.Status.SICK_LEAVE, 4), (Serviceman.Status.AWOL, 1),
+                  (Serviceman.Status.KIA, 2), (Serviceman.Status.MIA, 1)]
+
 
 class Command(BaseCommand):
-    help = 'Створює тестові дані для системи обліку особового складу'
+    help = 'Створює тестові дані для системи обліку особового складу (масштабовано, через bulk_create)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=1,
+            help='Кількість бригад (одна бригада - близько 1300 посад).'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Початкове значення генератора випадкових чисел для відтворюваних даних.'
+        )
+        parser.add_argument(
+            '--no-input',
+            action='store_true',
+            help='Не ставити запитань; існуючі дані видаляються лише разом з --clear.'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Видалити існуючі дані перед генерацією.'
+        )
 
     def handle(self, *args, **options):
+        if options['scale'] < 1:
+            raise CommandError('--scale має бути не менше 1.')
+
+        clear = options['clear']
+        if not options['no_input'] and not clear:
+            clear = input('Видалити існуючі дані? Це призведе до повної очистки! (y/n): ').lower() == 'y'
+
+        self.rng = random.Random(options['seed'])
+        self.today = date.today()
+        self.started = time.monotonic()
         self.stdout.write('Початок створення тестових даних...')
 
-        if input('Видалити існуючі дані? Це призведе до повної очистки! (y/n): ').lower() == 'y':
-            self.clear_data()
+        with transaction.atomic():
+            if clear:
+                self.clear_data()
+            self.create_reference_data()
+            positions = self.create_structure(options['scale'])
+            servicemen = self.create_servicemen(positions)
+            self.create_personal_records(servicemen)
+            self.create_service_records(servicemen, positions)
+            self.create_reports(servicemen)
+            self.create_audit_log(servicemen)
+
+        # Після bulk-операцій (і можливого повторного використання id у SQLite) кешовані картки неактуальні
+        invalidate_all_serviceman_cards()
+        self.stdout.write(self.style.SUCCESS(f'Тестові дані успішно створено за {self._elapsed()}!'))
 
-        self.create_base_data()
-        self.create_personnel_data()
+    def _elapsed(self):
+        return f'{time.monotonic() - self.started:.1f} с'
 
-        self.stdout.write(self.style.SUCCESS('Тестові дані успішно створено!'))
+    def _report(self, model, count):
+        self.stdout.write(f'  {model._meta.verbose_name_plural}: {count} ({self._elapsed()})')
+
+    def _random_date(self, start, end):
+        return start + timedelta(days=self.rng.randint(0, max((end - start).days, 0)))
 
     def clear_data(self):
         self.stdout.write('Видалення існуючих даних...')
         # Видаляємо в порядку залежностей
         ServicemanReport.objects.all().delete()
         ServiceHistoryEvent.objects.all().delete()
+        PositionHistory.objects.all().delete()
+        IrrecoverableLoss.objects.all().delete()
         Contract.objects.all().delete()
         FamilyMember.objects.all().delete()
         Education.objects.all().delete()
@@ -39,99 +178,276 @@ class Command(BaseCommand):
         Rank.objects.all().delete()
         User.objects.filter(is_superuser=False).delete()
 
-    def create_base_data(self):
-        self.stdout.write('Створення базових довідників (звання, ВОС, підрозділи)...')
-        # Звання
-        ranks_data = [('Солдат', 1), ('Старший солдат', 2), ('Молодший сержант', 3), ('Сержант', 4),
-                      ('Старший сержант', 5), ('Молодший лейтенант', 11), ('Лейтенант', 12), ('Старший лейтенант', 13),
-                      ('Капітан', 14), ('Майор', 15), ('Підполковник', 16), ('Полковник', 17)]
-        for name, order in ranks_data:
-            Rank.objects.get_or_create(name=name, defaults={'order': order})
-
-        # ВОС
-        specialties_data = [('100100', 'Стрілець'), ('100300', 'Командир взводу'), ('100400', 'Командир роти')]
-        for code, name in specialties_data:
-            MilitarySpecialty.objects.get_or_create(code=code, defaults={'name': name})
-
-        # Підрозділи
-        brigade, _ = Unit.objects.get_or_create(name='24-та ОМБр', parent=None)
-        battalion_1, _ = Unit.objects.get_or_create(name='1-й механізований батальйон', parent=brigade)
-        company_1, _ = Unit.objects.get_or_create(name='1-ша механізована рота', parent=battalion_1)
-        Unit.objects.get_or_create(name='1-й механізований взвод', parent=company_1)
-
-    def create_personnel_data(self):
-        self.stdout.write('Створення посад, особового складу та пов\'язаних даних...')
-
-        # Створюємо посади
-        company = Unit.objects.get(name='1-ша механізована рота')
-        specialty = MilitarySpecialty.objects.get(code='100100')
-        positions_to_create = []
-        if not Position.objects.exists():
-            for i in range(30):
-                positions_to_create.append(
-                    Position(position_index=f'П-{i + 1:05d}', unit=company, name=f'Стрілець {i + 1}', category='Солдат',
-                             specialty=specialty, tariff_rate='4')
-                )
-            Position.objects.bulk_create(positions_to_create)
-            self.stdout.write(f'Створено {len(positions_to_create)} посад')
-
-        # Створюємо військовослужбовців
-        if not Serviceman.objects.exists():
-            ranks = {rank.name: rank for rank in Rank.objects.all()}
-            # Беремо 20 випадкових вільних посад
-            vacant_positions = list(Position.objects.filter(serviceman__isnull=True).order_by('?')[:20])
-
-            for i, position in enumerate(vacant_positions):
-                # ВИПРАВЛЕНО: Гарантований 10-значний унікальний номер
-                start_range = 2000000000
-                tax_id = str(start_range + i)
-
-                sm = Serviceman.objects.create(
-                    rank=ranks[position.category],
-                    last_name=f'Прізвище{i}',
-                    first_name=f'Ім\'я{i}',
-                    middle_name=f'По-батькові{i}',
-                    date_of_birth=date(1995, 1, 1),
-                    place_of_birth='м. Київ',
-                    passport_number=f'АА10000{i}',
-                    tax_id_number=tax_id,
-                    personal_number=tax_id,
-                    enlistment_date=date(2023, 3, 1),
-                    enlistment_authority='Київський МТЦК та СП',
-                    position=position
-                )
-                Education.objects.create(serviceman=sm, level=Education.EducationLevel.SECONDARY,
-                                         institution_name='ЗОШ №1', graduation_year=2012)
-                FamilyMember.objects.create(serviceman=sm, relationship=FamilyMember.RelationshipType.WIFE,
-                                            last_name=f'Прізвище{i}', first_name='Марія', middle_name='Іванівна',
-                                            date_of_birth=date(1996, 1, 1))
-
-            self.stdout.write(f'Створено {Serviceman.objects.count()} військовослужбовців')
-
-        # Створюємо контракти, історію служби та рапорти
-        all_servicemen = list(Serviceman.objects.all())
-        if all_servicemen and not Contract.objects.exists():
-            for sm in all_servicemen:
-                Contract.objects.create(serviceman=sm, start_date=sm.enlistment_date,
-                                        end_date=sm.enlistment_date.replace(year=sm.enlistment_date.year + 3))
-            self.stdout.write(f'Створено {Contract.objects.count()} контрактів')
-
-        if all_servicemen and not ServiceHistoryEvent.objects.exists():
-            for sm in all_servicemen:
-                ServiceHistoryEvent.objects.create(serviceman=sm, event_type=ServiceHistoryEvent.EventType.ENLISTMENT,
-                                                   event_date=sm.enlistment_date, order_reference='Наказ ТЦК №1')
-            self.stdout.write(f'Створено {ServiceHistoryEvent.objects.count()} записів в історії служби')
-
-        if all_servicemen and not ServicemanReport.objects.exists():
-            for i in range(5):
-                ServicemanReport.objects.create(
-                    registration_number=f'РАП-{i + 1:04d}',
-                    submission_date=date.today() - timedelta(days=random.randint(1, 20)),
-                    report_type=random.choice(ServicemanReport.ReportType.choices)[0],
-                    status=random.choice(
-                        [ServicemanReport.ReportStatus.SUBMITTED, ServicemanReport.ReportStatus.UNDER_REVIEW]),
-                    author=random.choice(all_servicemen),
-                    recipient_position="Командиру 1-ї механізованої роти",
-                    summary=f"Тестовий рапорт №{i + 1}"
+    def create_reference_data(self):
+        self.stdout.write('Створення базових довідників (звання, ВОС)...')
+        Rank.objects.bulk_create([Rank(name=name, order=order) for name, order in RANKS], ignore_conflicts=True)
+        MilitarySpecialty.objects.bulk_create(
+            [MilitarySpecialty(code=code, name=name) for code, name in SPECIALTIES], ignore_conflicts=True
+        )
+        self.ranks = {rank.name: rank for rank in Rank.objects.all()}
+        self.rank_order = sorted(self.ranks.values(), key=lambda rank: rank.order)
+        self.specialties = {specialty.code: specialty for specialty in MilitarySpecialty.objects.all()}
+
+    def create_structure(self, scale):
+        """
+        Створює дерево підрозділів і посади. Підрозділи вставляються bulk_create рівень за рівнем
+        (щоб мати id батьківських), поля MPTT заповнюються одним rebuild() наприкінці.
+        """
+        self.stdout.write('Створення організаційно-штатної структури...')
+        first_number = Unit.objects.filter(parent__isnull=True).count() + 1
+        staff = []  # [(підрозділ, штат)]
+        tree_fields = {'lft': 0, 'rght': 0, 'tree_id': 0, 'level': 0}
+
+        def create_level(units):
+            Unit.objects.bulk_create([unit for unit, _ in units], batch_size=BATCH_SIZE)
+            staff.extend(units)
+            return [unit for unit, _ in units]
+
+        brigades = create_level([
+            (Unit(name=f'{number}-та окрема механізована бригада', **tree_fields), BRIGADE_STAFF)
+            for number in range(first_number, first_number + scale)
+        ])
+        battalions = create_level([
+            (Unit(name=f'{number}-й механізований батальйон', parent=brigade, **tree_fields), BATTALION_STAFF)
+            for brigade in brigades for number in range(1, BATTALIONS_PER_BRIGADE + 1)
+        ])
+        companies = create_level([
+            (Unit(name=f'{number}-ша механізована рота', parent=battalion, **tree_fields), COMPANY_STAFF)
+            for battalion in battalions for number in range(1, COMPANIES_PER_BATTALION + 1)
+        ])
+        create_level([
+            (Unit(name=f'{number}-й механізований взвод', parent=company, **tree_fields),
+             PLATOON_STAFF + SQUAD_STAFF * SQUADS_PER_PLATOON)
+            for company in companies for number in range(1, PLATOONS_PER_COMPANY + 1)
+        ])
+        Unit.objects.rebuild()
+        invalidate_unit_tree()
+        self._report(Unit, len(staff))
+
+        prefix = f'Т{first_number:03d}'
+        positions = []
+        for unit, unit_staff in staff:
+            for name, category, code, tariff_rate, count in unit_staff:
+                for number in range(count):
+                    positions.append(Position(
+                        unit=unit,
+                        position_index=f'{prefix}-{len(positions) + 1:06d}',
+                        name=f'{name} {number + 1}' if count > 1 else name,
+                        category=category,
+                        specialty=self.specialties[code],
+                        tariff_rate=tariff_rate,
+                    ))
+        Position.objects.bulk_create(positions, batch_size=BATCH_SIZE)
+        self._report(Position, len(positions))
+        return positions
+
+    def _new_tax_id(self):
+        while True:
+            tax_id = str(self.rng.randint(1000000000, 3999999999))
+            if tax_id not in self.used_tax_ids:
+                self.used_tax_ids.add(tax_id)
+                return tax_id
+
+    def create_servicemen(self, positions):
+        self.stdout.write('Створення особового складу...')
+        self.used_tax_ids = set(
+            Serviceman.objects.exclude(tax_id_number=None).values_list('tax_id_number', flat=True)
+        ) | set(Serviceman.objects.exclude(personal_number=None).values_list('personal_number', flat=True))
+
+        statuses, weights = zip(*STATUS_WEIGHTS)
+        filled = [position for position in positions if self.rng.random() < FILL_RATE]
+        extra = int(len(filled) * UNASSIGNED_RATE)
+
+        servicemen = []
+        for position in filled + [None] * extra:
+            status = self.rng.choices(statuses, weights)[0]
+            if status in (Serviceman.Status.KIA, Serviceman.Status.MIA):
+                # Загиблі та зниклі безвісти посад не обіймають
+                position = None
+            rank = self.ranks[position.category] if position else self.rng.choice(self.rank_order[:5])
+            tax_id = self._new_tax_id()
+            date_of_birth = self._random_date(date(1965, 1, 1), date(2004, 12, 31))
+            servicemen.append(Serviceman(
+                rank=rank,
+                position=position,
+                status=status if position or status != Serviceman.Status.ON_DUTY else Serviceman.Status.DISMISSED,
+                last_name=self.rng.choice(LAST_NAMES),
+                first_name=self.rng.choice(FIRST_NAMES),
+                middle_name=self.rng.choice(PATRONYMICS),
+                date_of_birth=date_of_birth,
+                place_of_birth=self.rng.choice(CITIES),
+                passport_number=f'{self.rng.randint(0, 999999999):09d}',
+                tax_id_number=tax_id,
+                personal_number=tax_id,
+                enlistment_date=self._random_date(max(date_of_birth + timedelta(days=18 * 366), date(2014, 3, 1)),
+                                                  self.today - timedelta(days=30)),
+                enlistment_authority=f'{self.rng.choice(CITIES)[3:]}ський РТЦК та СП',
+            ))
+        Serviceman.objects.bulk_create(servicemen, batch_size=BATCH_SIZE)
+        self._report(Serviceman, len(servicemen))
+        return servicemen
+
+    def create_personal_records(self, servicemen):
+        self.stdout.write('Створення освіти та членів сімей...')
+        education = []
+        family = []
+        for serviceman in servicemen:
+            school_year = serviceman.date_of_birth.year + 17
+            education.append(Education(serviceman=serviceman, level=Education.EducationLevel.SECONDARY,
+                                       institution_name='ЗОШ №1', graduation_year=school_year))
+            if self.rng.random() < 0.45:
+                level = self.rng.choice([Education.EducationLevel.BACHELOR, Education.EducationLevel.MASTER,
+                                         Education.EducationLevel.VOCATIONAL])
+                education.append(Education(serviceman=serviceman, level=level,
+                                           institution_name=self.rng.choice(INSTITUTIONS),
+                                           graduation_year=school_year + self.rng.randint(2, 6),
+                                           specialty=self.rng.choice(['Право', 'Економіка', 'Інженерія', ''])))
+
+            if self.rng.random() < 0.6:
+                family.append(FamilyMember(
+                    serviceman=serviceman, relationship=FamilyMember.RelationshipType.WIFE,
+                    last_name=serviceman.last_name, first_name=self.rng.choice(FEMALE_NAMES),
+                    middle_name=self.rng.choice(FEMALE_PATRONYMICS),
+                    date_of_birth=serviceman.date_of_birth + timedelta(days=self.rng.randint(-1500, 1500)),
+                    address=f'{serviceman.place_of_birth}, вул. Центральна, {self.rng.randint(1, 200)}'
+                ))
+            for _ in range(self.rng.choice([0, 0, 1, 1, 2, 3])):
+                relationship = self.rng.choice([FamilyMember.RelationshipType.SON, FamilyMember.RelationshipType.DAUGHTER])
+                family.append(FamilyMember(
+                    serviceman=serviceman, relationship=relationship, last_name=serviceman.last_name,
+                    first_name=self.rng.choice(FIRST_NAMES if relationship == 'SON' else FEMALE_NAMES),
+                    middle_name=serviceman.first_name,
+                    date_of_birth=self._random_date(serviceman.date_of_birth + timedelta(days=20 * 365),
+                                                    self.today - timedelta(days=30)),
+                ))
+        Education.objects.bulk_create(education, batch_size=BATCH_SIZE)
+        self._report(Education, len(education))
+        FamilyMember.objects.bulk_create(family, batch_size=BATCH_SIZE)
+        self._report(FamilyMember, len(family))
+
+    def create_service_records(self, servicemen, positions):
+        """Контракти, історія посад (з попередніми посадами), події служби та безповоротні втрати."""
+        self.stdout.write('Створення контрактів, історії посад та подій служби...')
+        contracts = []
+        history = []
+        events = []
+        losses = []
+        order_number = 0
+
+        def next_order(event_date):
+            nonlocal order_number
+            order_number += 1
+            return f'Наказ №{order_number} від {event_date:%d.%m.%Y}'
+
+        for serviceman in servicemen:
+            start = serviceman.enlistment_date
+            events.append(ServiceHistoryEvent(serviceman=serviceman, event_type=ServiceHistoryEvent.EventType.ENLISTMENT,
+                                              event_date=start, order_reference=f'Наказ {serviceman.enlistment_authority}'))
+
+            # Послідовні контракти: поточний може бути продовженням попередніх
+            contract_start = start
+            while contract_start < self.today:
+                years = self.rng.choice([1, 3, 5])
+                contract_end = contract_start.replace(year=contract_start.year + years, day=min(contract_start.day, 28))
+                contracts.append(Contract(serviceman=serviceman, start_date=contract_start, end_date=contract_end,
+                                          details=f'Контракт на {years} р.'))
+                contract_start = contract_end + timedelta(days=1)
+
+            # Попередні посади в хронологічному порядку, остання - поточна
+            path = [self.rng.choice(positions) for _ in range(self.rng.choice([0, 0, 1, 1, 2]))]
+            if serviceman.position is not None:
+                path.append(serviceman.position)
+            dates = sorted(self._random_date(start, self.today - timedelta(days=1)) for _ in path)
+            previous = None
+            for index, (position, event_date) in enumerate(zip(path, dates)):
+                is_current = serviceman.position is not None and index == len(path) - 1
+                end_date = None if is_current else (dates[index + 1] if index + 1 < len(dates) else
+                                                    self._random_date(event_date, self.today))
+                order = next_order(event_date)
+                history.append(PositionHistory(serviceman=serviceman, position=position, start_date=event_date,
+                                               end_date=end_date, order_reference=order))
+                events.append(ServiceHistoryEvent(
+                    serviceman=serviceman,
+                    event_type=ServiceHistoryEvent.EventType.TRANSFER if previous else ServiceHistoryEvent.EventType.APPOINTMENT,
+                    event_date=event_date,
+                    details={
+                        'from_position_id': previous.id if previous else None,
+                        'from_position_name': previous.name if previous else 'Не було',
+                        'to_position_id': position.id,
+                        'to_position_name': position.name,
+                    },
+                    order_reference=order,
+                ))
+                previous = position
+
+            if serviceman.rank.order > 1 and self.rng.random() < 0.3:
+                previous_rank = self.rank_order[self.rank_order.index(serviceman.rank) - 1]
+                event_date = self._random_date(start, self.today)
+                events.append(ServiceHistoryEvent(
+                    serviceman=serviceman, event_type=ServiceHistoryEvent.EventType.PROMOTION, event_date=event_date,
+                    details={'previous_rank': previous_rank.name, 'new_rank': serviceman.rank.name},
+                    order_reference=next_order(event_date),
+                ))
+
+            if serviceman.status in (Serviceman.Status.KIA, Serviceman.Status.MIA):
+                loss_date = self._random_date(max(start, date(2022, 2, 24)), self.today)
+                killed = serviceman.status == Serviceman.Status.KIA
+                losses.append(IrrecoverableLoss(
+                    serviceman=serviceman,
+                    loss_type=IrrecoverableLoss.LossType.KIA if killed else IrrecoverableLoss.LossType.MIA,
+                    loss_date=loss_date,
+                    circumstances='Виконання бойового завдання',
+                    loss_location=f'Район н.п. {self.rng.choice(CITIES)[3:]}',
+                    exclusion_date=loss_date + timedelta(days=self.rng.randint(3, 30)),
+                    exclusion_order=next_order(loss_date),
+                ))
+                if killed:
+                    events.append(ServiceHistoryEvent(serviceman=serviceman, event_type=ServiceHistoryEvent.EventType.DEATH,
+                                                      event_date=loss_date, order_reference=losses[-1].exclusion_order))
+
+        for model, objects in ((Contract, contracts), (PositionHistory, history),
+                               (ServiceHistoryEvent, events), (IrrecoverableLoss, losses)):
+            model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+            self._report(model, len(objects))
+        # bulk_create не надсилає сигналів; один UPDATE по всіх записах дешевший за список id
+        refresh_current_contracts()
+        rebuild_loss_statistics()
+
+    def create_reports(self, servicemen):
+        self.stdout.write('Створення рапортів...')
+        prefix = f'РАП-{ServicemanReport.objects.count() + 1:06d}'
+        statuses = [choice for choice, _ in ServicemanReport.ReportStatus.choices]
+        report_types = [choice for choice, _ in ServicemanReport.ReportType.choices]
+        reports = []
+        for serviceman in self.rng.sample(servicemen, len(servicemen) // 5):
+            reports.append(ServicemanReport(
+                registration_number=f'{prefix}-{len(reports) + 1:06d}',
+                submission_date=self._random_date(serviceman.enlistment_date, self.today),
+                report_type=self.rng.choice(report_types),
+                status=self.rng.choice(statuses),
+                author=serviceman,
+                recipient_position=f'Командиру {serviceman.position.unit.name}' if serviceman.position else 'Командиру частини',
+                summary=f'Тестовий рапорт №{len(reports) + 1}',
+            ))
+        ServicemanReport.objects.bulk_create(reports, batch_size=BATCH_SIZE)
+        self._report(ServicemanReport, len(reports))
+
+    def create_audit_log(self, servicemen):
+        """Записи про створення кожного військовослужбовця та випадкові зміни статусу за останній рік."""
+        self.stdout.write('Створення записів аудиту...')
+        user = User.objects.filter(is_superuser=True).first()
+        now = timezone.now()
+        entries = []
+        for serviceman in servicemen:
+            entry = AuditLog.build_entry(user=user, action='CREATE', obj=serviceman, notes='Згенеровано create_test_data')
+            entry.timestamp = now - timedelta(days=self.rng.randint(30, 365), seconds=self.rng.randint(0, 86399))
+            entries.append(entry)
+            if serviceman.status != Serviceman.Status.ON_DUTY:
+                entry = AuditLog.build_entry(
+                    user=user, action='UPDATE', obj=serviceman,
+                    changes={'old': {'status': Serviceman.Status.ON_DUTY}, 'new': {'status': serviceman.status}}
                 )
-            self.stdout.write(f'Створено {ServicemanReport.objects.count()} рапортів')
\ No newline at end of file
+                entry.timestamp = now - timedelta(days=self.rng.randint(0, 29), seconds=self.rng.randint(0, 86399))
+                entries.append(entry)
+        AuditLog.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+        self._report(AuditLog, len(entries))
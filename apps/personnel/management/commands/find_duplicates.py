@@ -0,0 +1,76 @@
+# apps/personnel/management/commands/find_duplicates.py
+"""
+Management command для пошуку можливих дублікатів особи серед військовослужбовців.
+Використання: python manage.py find_duplicates [--rebuild] [--output кандидати.csv]
+
+Порівнюються лише записи з однаковими нормалізованими ключами (див. apps/personnel/identity.py),
+тому команда придатна для всього особового складу.
+"""
+import csv
+
+from django.core.management.base import BaseCommand
+from apps.personnel.identity import (
+    BLOCK_LABELS, MAX_BLOCK_SIZE, find_duplicate_candidates, refresh_identities, refresh_missing_identities
+)
+from apps.personnel.models import Serviceman
+
+
+class Command(BaseCommand):
+    help = 'Шукає військовослужбовців, які могли бути внесені до обліку двічі'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Перерахувати ключі ідентичності для всіх записів (після масового імпорту з оновленням).'
+        )
+        parser.add_argument(
+            '--max-block-size',
+            type=int,
+            default=MAX_BLOCK_SIZE,
+            help=f'Групи з однаковим ключем, більші за цей розмір, пропускаються (за замовчуванням {MAX_BLOCK_SIZE}).'
+        )
+        parser.add_argument('--output', type=str, help='Записати пари кандидатів у CSV файл.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            count = refresh_identities()
+            self.stdout.write(f'Перераховано ключів ідентичності: {count}')
+        else:
+            # Записи, створені масовими операціями, ключів ще не мають
+            count = refresh_missing_identities()
+            if count:
+                self.stdout.write(f'Додано ключів ідентичності: {count}')
+
+        candidates, oversized = find_duplicate_candidates(options['max_block_size'])
+        if oversized:
+            self.stdout.write(self.style.WARNING(
+                f'Пропущено груп, більших за {options["max_block_size"]} записів: {oversized}'
+            ))
+
+        servicemen = Serviceman.objects.select_related('rank').in_bulk(
+            {pk for first, second, _ in candidates for pk in (first, second)}
+        )
+
+        rows = []
+        for first, second, blocks in candidates:
+            reasons = ', '.join(BLOCK_LABELS[block] for block in blocks)
+            rows.append([servicemen[first], servicemen[second], reasons])
+            self.stdout.write(
+                f'{self._describe(servicemen[first])}  <->  {self._describe(servicemen[second])}: {reasons}'
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(['ID 1', 'ПІБ 1', 'РНОКПП 1', 'ID 2', 'ПІБ 2', 'РНОКПП 2', 'Збіги'])
+                for first, second, reasons in rows:
+                    writer.writerow([first.pk, first.full_name, first.tax_id_number or '',
+                                     second.pk, second.full_name, second.tax_id_number or '', reasons])
+
+        self.stdout.write(self.style.SUCCESS(f'Знайдено пар кандидатів: {len(candidates)}'))
+
+    @staticmethod
+    def _describe(serviceman):
+        return (f'[{serviceman.pk}] {serviceman.full_name}, {serviceman.date_of_birth:%d.%m.%Y}, '
+                f'РНОКПП {serviceman.tax_id_number or "—"}')
@@ -0,0 +1,89 @@
+# apps/personnel/management/commands/import_journal.py
+"""
+Management command для імпорту повної книги Електронного журналу з xlsx файлу.
+Використання: python manage.py import_journal /шлях/до/журналу.xlsx
+
+Імпортуються аркуші "2. ООС", освіти, членів сім'ї, тимчасово прибулих та безповоротних втрат
+(див. apps/personnel/journal_import.py). Книга читається потоково, тому збереження
+аркуша в CSV для import_personnel не потрібне.
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.personnel.importing import IMPORT_CHUNK_SIZE
+from apps.personnel.journal_import import JournalImporter
+
+
+class Command(BaseCommand):
+    help = 'Імпортує книгу Електронного журналу (xlsx): особовий склад, освіту, членів сімей, прибулих і втрати'
+
+    def add_arguments(self, parser):
+        parser.add_argument('xlsx_file', type=str, help='Шлях до xlsx файлу Електронного журналу')
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Оновити існуючих військовослужбовців (за РНОКПП) та записи про втрати.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Тестовий запуск без збереження даних до БД.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help=f'Кількість рядків в одній порції запису (за замовчуванням {IMPORT_CHUNK_SIZE}).'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Кількість процесів для розбору аркуша "2. ООС" (за замовчуванням - кількість ядер).'
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        from openpyxl import load_workbook
+
+        file_path = options['xlsx_file']
+        dry_run = options['dry_run']
+
+        self.stdout.write(self.style.SUCCESS(f'Починаю імпорт журналу з файлу: {file_path}'))
+        if dry_run:
+            self.stdout.write(self.style.WARNING('РЕЖИМ ТЕСТОВОГО ЗАПУСКУ: Зміни не буде збережено.'))
+
+        try:
+            wb = load_workbook(file_path, read_only=True, data_only=True)
+        except FileNotFoundError:
+            raise CommandError(f'Файл не знайдено: {file_path}')
+        except Exception as e:
+            raise CommandError(f'Не вдалося відкрити книгу: {e}')
+
+        importer = JournalImporter(
+            wb,
+            update_existing=options['update'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+        )
+        try:
+            results = importer.import_all()
+        except Exception as e:
+            raise CommandError(f'Загальна помилка обробки файлу: {e}')
+        finally:
+            wb.close()
+
+        for sheet, line, message in importer.errors:
+            self.stdout.write(self.style.ERROR(f'Аркуш "{sheet}", рядок {line}: {message}'))
+
+        if dry_run:
+            transaction.set_rollback(True)
+            self.stdout.write(self.style.WARNING('Відкат транзакції. Жодних змін не було внесено.'))
+
+        self.stdout.write(self.style.SUCCESS('----- РЕЗУЛЬТАТИ ІМПОРТУ -----'))
+        labels = {'created': 'створено', 'updated': 'оновлено', 'unchanged': 'без змін', 'skipped': 'пропущено'}
+        for sheet, counts in results.items():
+            summary = ', '.join(f'{labels[key]}: {value}' for key, value in counts.items())
+            self.stdout.write(f'{sheet}: {summary}')
+        self.stdout.write(self.style.ERROR(f'Помилок: {len(importer.errors)}'))
@@ -2,13 +2,28 @@
 """
 Management command для імпорту даних військовослужбовців з CSV файлу.
 Використання: python manage.py import_personnel /шлях/до/файлу.csv
+
+Файл обробляється порціями: для кожної порції виконується один запит пошуку існуючих
+записів за РНОКПП та один пакетний upsert (див. apps/personnel/importing.py).
+Кожна порція фіксується окремою транзакцією разом з контрольною точкою файлу,
+тому перерваний імпорт можна продовжити з першої незбереженої порції (--resume).
+Відхилені рядки записуються у CSV звіт (--errors-file).
+
+Розбір рядків виконується паралельно у пулі процесів (--workers), а запис до БД -
+одним послідовним етапом, тож тестовий запуск (--dry-run) великого файлу
+використовує всі ядра.
 """
-import csv
-from datetime import datetime
+import os
+from itertools import islice
+
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from apps.personnel.models import Serviceman, Rank, Education, FamilyMember
-from apps.staffing.models import Position
+from apps.personnel.fast_import import fast_import, fast_import_available
+from apps.personnel.importing import (
+    IMPORT_CHUNK_SIZE, ErrorReport, ImportProgress, PersonnelWriter, chunked, file_sha256, load_reference_maps,
+    parse_chunks, read_csv_rows
+)
+from apps.personnel.models import ImportCheckpoint
 
 
 class Command(BaseCommand):
@@ -26,110 +41,174 @@ class Command(BaseCommand):
             action='store_true',
             help='Тестовий запуск без збереження даних до БД.'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help=f'Кількість рядків в одній порції запису (за замовчуванням {IMPORT_CHUNK_SIZE}).'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Кількість процесів для розбору рядків (за замовчуванням - кількість ядер; 1 - без пулу).'
+        )
+        parser.add_argument(
+            '--fast',
+            action='store_true',
+            help='Швидке первинне завантаження через COPY та множинні SQL-запити (лише PostgreSQL).'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продовжити перерваний імпорт цього файлу з контрольної точки.'
+        )
+        parser.add_argument(
+            '--errors-file',
+            type=str,
+            help='Шлях до CSV звіту про відхилені рядки (за замовчуванням <файл>.errors.csv).'
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):
         file_path = options['csv_file']
-        update_existing = options['update']
         dry_run = options['dry_run']
 
+        if options['resume'] and (options['fast'] or dry_run):
+            raise CommandError('--resume не сумісний з --fast та --dry-run: ці режими виконуються однією транзакцією.')
+        if options['fast'] and not fast_import_available():
+            raise CommandError('--fast підтримується лише для PostgreSQL; запустіть імпорт без --fast.')
+
         self.stdout.write(self.style.SUCCESS(f'Починаю імпорт з файлу: {file_path}'))
         if dry_run:
             self.stdout.write(self.style.WARNING('РЕЖИМ ТЕСТОВОГО ЗАПУСКУ: Зміни не буде збережено.'))
 
-        # Словники для кешування, щоб уникнути повторних запитів до БД
-        ranks_cache = {rank.name: rank for rank in Rank.objects.all()}
-        positions_cache = {pos.position_index: pos for pos in Position.objects.all()}
-
-        processed_count = 0
-        created_count = 0
-        updated_count = 0
-        skipped_count = 0
-        error_count = 0
-
+        self.checkpoint = None
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
-                # Пропускаємо перші 3 рядки заголовку, як у вашому файлі
-                for _ in range(3):
-                    next(file)
-
-                reader = csv.DictReader(file)
-                for row in reader:
-                    processed_count += 1
-                    tax_id = row.get('РНОКПП  (за наявності)')
-                    if not tax_id:
-                        self.stdout.write(
-                            self.style.ERROR(f'Рядок {processed_count + 3}: Пропущено - відсутній РНОКПП.'))
-                        error_count += 1
-                        continue
-
-                    try:
-                        serviceman = Serviceman.objects.filter(tax_id_number=tax_id).first()
-
-                        if serviceman and not update_existing:
-                            skipped_count += 1
-                            continue
-
-                        # Розбір ПІБ
-                        full_name = row['ПРІЗВИЩЕ (за наявності) Ім\'я По батькові (за наявності)'].split()
-                        last_name = full_name[0]
-                        first_name = full_name[1] if len(full_name) > 1 else ''
-                        middle_name = ' '.join(full_name[2:])
-
-                        # Отримання пов'язаних об'єктів з кешу
-                        rank = ranks_cache.get(row['Звання'])
-                        position_index = row['Індекс посади /\\nІндексм посад, які обіймав(ла)'].split('\\n')[0]
-                        position = positions_cache.get(position_index)
-
-                        if not rank:
-                            raise ValueError(f"Звання '{row['Звання']}' не знайдено у довіднику.")
-
-                        # Створення або оновлення об'єкта
-                        defaults = {
-                            'rank': rank,
-                            'last_name': last_name,
-                            'first_name': first_name,
-                            'middle_name': middle_name,
-                            'date_of_birth': datetime.strptime(row['Дата народження'], '%Y-%m-%d').date(),
-                            'place_of_birth': row['Місце народження'],
-                            'passport_number': row[
-                                'Серія (за наявності) і номер документа, що посвідчує особу та назва документа'],
-                            'personal_number': tax_id,
-                            'enlistment_date': datetime.strptime(
-                                row['Ким і коли призваний (прийнятий) на військову службу'].split(',')[-1].strip(),
-                                '%Y-%m-%d').date(),
-                            'enlistment_authority': ','.join(
-                                row['Ким і коли призваний (прийнятий) на військову службу'].split(',')[:-1]),
-                            'position': position,
-                        }
-
-                        if serviceman:
-                            # Оновлення
-                            for key, value in defaults.items():
-                                setattr(serviceman, key, value)
-                            serviceman.save()
-                            updated_count += 1
-                        else:
-                            # Створення
-                            Serviceman.objects.create(tax_id_number=tax_id, **defaults)
-                            created_count += 1
-
-                    except Exception as e:
-                        self.stdout.write(self.style.ERROR(f'Рядок {processed_count + 3}: Помилка - {e}'))
-                        error_count += 1
+                if not options['fast'] and not dry_run:
+                    self.checkpoint = self._get_checkpoint(file_path, options['resume'])
+
+                append = bool(self.checkpoint and self.checkpoint.rows_done)
+                with ErrorReport(options['errors_file'] or f'{file_path}.errors.csv', append=append) as report:
+                    if options['fast']:
+                        with transaction.atomic():
+                            counts, progress = self._import_fast(file, options, report)
+                            transaction.set_rollback(dry_run)
+                    elif dry_run:
+                        with transaction.atomic():
+                            counts, progress = self._import_batched(file, options, report)
+                            transaction.set_rollback(True)
+                    else:
+                        counts, progress = self._import_batched(file, options, report)
 
         except FileNotFoundError:
             raise CommandError(f'Файл не знайдено: {file_path}')
+        except CommandError:
+            raise
         except Exception as e:
-            raise CommandError(f'Загальна помилка обробки файлу: {e}')
+            message = f'Загальна помилка обробки файлу: {e}'
+            if self.checkpoint is not None:
+                message += ' Збережені порції залишаються в БД; для продовження запустіть команду з --resume.'
+            raise CommandError(message)
 
         if dry_run:
-            transaction.set_rollback(True)
             self.stdout.write(self.style.WARNING('Відкат транзакції. Жодних змін не було внесено.'))
 
         self.stdout.write(self.style.SUCCESS('----- РЕЗУЛЬТАТИ ІМПОРТУ -----'))
-        self.stdout.write(f'Оброблено рядків: {processed_count}')
-        self.stdout.write(f'Створено нових записів: {created_count}')
-        self.stdout.write(f'Оновлено існуючих записів: {updated_count}')
-        self.stdout.write(f'Пропущено (дублікати): {skipped_count}')
-        self.stdout.write(self.style.ERROR(f'Помилок: {error_count}'))
\ No newline at end of file
+        self.stdout.write(f'Оброблено рядків: {progress.processed}')
+        self.stdout.write(f'Створено нових записів: {counts["created"]}')
+        self.stdout.write(f'Оновлено існуючих записів: {counts["updated"]}')
+        self.stdout.write(f'Без змін: {counts["unchanged"]}')
+        self.stdout.write(f'Пропущено (дублікати): {counts["skipped"]}')
+        self.stdout.write(self.style.ERROR(f'Помилок: {report.count}'))
+        if report.count:
+            self.stdout.write(f'Звіт про відхилені рядки: {report.path}')
+        self.stdout.write(f'Час імпорту: {progress.elapsed:.1f} с ({progress.rate:.0f} рядків/с)')
+
+    def _get_checkpoint(self, file_path, resume):
+        """
+        Повертає контрольну точку файлу (за SHA-256 вмісту, тож перейменування файлу її не губить).
+        Без --resume імпорт починається спочатку, а точка скидається.
+        """
+        checkpoint, created = ImportCheckpoint.objects.get_or_create(
+            file_hash=file_sha256(file_path),
+            defaults={'file_name': os.path.basename(file_path)}
+        )
+        if created:
+            return checkpoint
+
+        if resume:
+            if checkpoint.is_completed:
+                raise CommandError(f'Файл вже повністю імпортовано ({checkpoint.rows_done} рядків).')
+            self.stdout.write(self.style.WARNING(
+                f'Продовжую імпорт: пропускаю {checkpoint.rows_done} раніше збережених рядків.'
+            ))
+            return checkpoint
+
+        if not checkpoint.is_completed and checkpoint.rows_done:
+            self.stdout.write(self.style.WARNING(
+                f'Знайдено незавершений імпорт цього файлу ({checkpoint.rows_done} рядків). '
+                f'Починаю спочатку; для продовження використовуйте --resume.'
+            ))
+        checkpoint.file_name = os.path.basename(file_path)
+        checkpoint.rows_done = 0
+        checkpoint.counts = {}
+        checkpoint.is_completed = False
+        checkpoint.save()
+        return checkpoint
+
+    def _import_batched(self, file, options, report):
+        """Імпорт через ORM порціями; кожна порція фіксується разом з контрольною точкою."""
+        # Довідники завантажуються один раз, щоб уникнути повторних запитів до БД
+        ranks, positions = load_reference_maps()
+        writer = PersonnelWriter(update_existing=options['update'])
+        progress = ImportProgress()
+        checkpoint = self.checkpoint
+
+        rows_iter = read_csv_rows(file)
+        previous_counts = {}
+        if checkpoint is not None:
+            rows_iter = islice(rows_iter, checkpoint.rows_done, None)
+            previous_counts = dict(checkpoint.counts)
+
+        chunks = parse_chunks(chunked(rows_iter, options['batch_size']), ranks, positions, options['workers'])
+        for rows, parsed, errors in chunks:
+            with transaction.atomic():
+                errors += writer.write_chunk(parsed)
+                if checkpoint is not None:
+                    checkpoint.rows_done += len(rows)
+                    checkpoint.counts = {
+                        key: previous_counts.get(key, 0) + value
+                        for key, value in {**writer.counts, 'errors': report.count + len(errors)}.items()
+                    }
+                    checkpoint.save(update_fields=['rows_done', 'counts', 'updated_at'])
+            report.write(errors, rows)
+            self._report_errors(errors)
+
+            progress.advance(len(rows))
+            self.stdout.write(f'Оброблено {progress.processed} рядків ({progress.rate:.0f} рядків/с)')
+
+        if checkpoint is not None:
+            checkpoint.is_completed = True
+            checkpoint.save(update_fields=['is_completed', 'updated_at'])
+
+        return writer.counts, progress
+
+    def _import_fast(self, file, options, report):
+        """Імпорт через COPY у проміжну таблицю та злиття одним запитом."""
+        progress = ImportProgress()
+        result = fast_import(file, update_existing=options['update'])
+
+        self._report_errors(result['errors'])
+        if result['errors']:
+            # Вихідні рядки для звіту - повторним потоковим читанням лише відхилених рядків
+            lines = {line for line, _ in result['errors']}
+            file.seek(0)
+            report.write(result['errors'], [(line, row) for line, row in read_csv_rows(file) if line in lines])
+
+        progress.advance(result['processed'])
+        return result, progress
+
+    def _report_errors(self, errors):
+        for line, message in sorted(errors):
+            self.stdout.write(self.style.ERROR(f'Рядок {line}: {message}'))
@@ -0,0 +1,82 @@
+# apps/personnel/management/commands/import_photos.py
+"""
+Management command для пакетного імпорту фото військовослужбовців.
+Використання: python manage.py import_photos /шлях/до/фото.zip [--overwrite] [--workers 4]
+
+Файли в архіві (або каталозі) мають називатися за особистим номером чи РНОКПП,
+напр. 1234567890.jpg. Фото зменшуються, для них створюються мініатюри
+(див. apps/personnel/photo_import.py). Незіставлені файли виводяться у звіт.
+"""
+import csv
+import os
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.personnel.photo_import import PhotoImporter, PhotoSource
+
+
+class Command(BaseCommand):
+    help = 'Імпортує фото військовослужбовців з ZIP архіву або каталогу (імена файлів - особисті номери чи РНОКПП)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Шлях до ZIP архіву або каталогу з фото')
+        parser.add_argument(
+            '--overwrite',
+            action='store_true',
+            help='Замінити фото тих, у кого воно вже є (за замовчуванням такі файли пропускаються).'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Лише зіставити файли з обліком, без обробки та збереження фото.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Кількість процесів для обробки фото (за замовчуванням - кількість ядер).'
+        )
+        parser.add_argument(
+            '--unmatched-file',
+            type=str,
+            help='Записати незіставлені та необроблені файли з причинами у CSV файл.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            source = PhotoSource(options['path'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        except (zipfile.BadZipFile, OSError) as e:
+            raise CommandError(f'Не вдалося відкрити архів: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f'Починаю імпорт фото з: {options["path"]}'))
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('РЕЖИМ ТЕСТОВОГО ЗАПУСКУ: Фото не буде збережено.'))
+
+        importer = PhotoImporter(
+            source,
+            overwrite=options['overwrite'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+        )
+        try:
+            counts = importer.run()
+        finally:
+            source.close()
+
+        for name, reason in importer.unmatched:
+            self.stdout.write(self.style.ERROR(f'{name}: {reason}'))
+
+        if options['unmatched_file'] and importer.unmatched:
+            with open(options['unmatched_file'], 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(['Файл', 'Причина'])
+                writer.writerows(importer.unmatched)
+            self.stdout.write(f'Звіт про незіставлені файли: {options["unmatched_file"]}')
+
+        self.stdout.write(self.style.SUCCESS('----- РЕЗУЛЬТАТИ ІМПОРТУ -----'))
+        self.stdout.write(f'Зіставлено файлів: {counts["matched"]}')
+        self.stdout.write(self.style.SUCCESS(f'Імпортовано фото: {counts["imported"]}'))
+        self.stdout.write(self.style.WARNING(f'Пропущено (фото вже є): {counts["skipped"]}'))
+        self.stdout.write(self.style.ERROR(f'Незіставлено або не оброблено: {len(importer.unmatched)}'))
@@ -0,0 +1,52 @@
+# apps/personnel/management/commands/rebuild_thumbnails.py
+"""
+Management command для створення мініатюр наявних фото військовослужбовців.
+Використання: python manage.py rebuild_thumbnails [--force] [--workers 4]
+
+За замовчуванням створюються лише відсутні мініатюри, тож команду можна повторювати
+після перерваного запуску. Фото обробляються у пулі процесів (див. apps/personnel/thumbnails.py).
+"""
+import os
+
+from django.core.management.base import BaseCommand
+from apps.personnel.models import Serviceman
+from apps.personnel.thumbnails import generate_many
+
+
+class Command(BaseCommand):
+    help = 'Створює мініатюри фото військовослужбовців'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Перестворити всі мініатюри, навіть наявні (напр. після зміни розмірів чи якості).'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Кількість процесів для обробки фото (за замовчуванням - кількість ядер).'
+        )
+
+    def handle(self, *args, **options):
+        photo_names = list(
+            Serviceman.objects.exclude(photo='').exclude(photo__isnull=True)
+            .order_by().values_list('photo', flat=True).distinct()
+        )
+        self.stdout.write(f'Фото для обробки: {len(photo_names)}')
+
+        processed = created = failed = 0
+        for name, count in generate_many(photo_names, overwrite=options['force'], workers=options['workers']):
+            processed += 1
+            if count is None:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'Не вдалося обробити фото: {name}'))
+            else:
+                created += count
+            if processed % 1000 == 0:
+                self.stdout.write(f'Оброблено фото: {processed}')
+
+        self.stdout.write(self.style.SUCCESS(f'Оброблено фото: {processed}, створено мініатюр: {created}'))
+        if failed:
+            self.stdout.write(self.style.ERROR(f'Помилок: {failed}'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personnel', '0006_irrecoverableloss'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='servicehistoryevent',
+            name='event_type',
+            field=models.CharField(choices=[('ENLISTMENT', 'Зарахування на службу'), ('APPOINTMENT', 'Призначення на посаду'), ('TRANSFER', 'Переведення'), ('PROMOTION', 'Підвищення у званні'), ('STATUS_CHANGE', 'Зміна статусу'), ('DISMISSAL', 'Звільнення'), ('DEATH', 'Загибель/Смерть')], max_length=20, verbose_name='Тип події'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personnel', '0007_servicehistoryevent_status_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(max_length=64, unique=True, verbose_name='SHA-256 файлу')),
+                ('file_name', models.CharField(max_length=255, verbose_name="Ім'я файлу")),
+                ('rows_done', models.PositiveIntegerField(default=0, verbose_name='Оброблено рядків')),
+                ('counts', models.JSONField(default=dict, help_text='created, updated, unchanged, skipped, errors', verbose_name='Лічильники')),
+                ('is_completed', models.BooleanField(default=False, verbose_name='Завершено')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Оновлено')),
+            ],
+            options={
+                'verbose_name': 'Контрольна точка імпорту',
+                'verbose_name_plural': 'Контрольні точки імпорту',
+                'ordering': ['-updated_at'],
+            },
+        ),
+    ]
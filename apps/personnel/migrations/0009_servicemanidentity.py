@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personnel', '0008_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServicemanIdentity',
+            fields=[
+                ('serviceman', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='identity', serialize=False, to='personnel.serviceman', verbose_name='Військовослужбовець')),
+                ('name_key', models.CharField(max_length=300, verbose_name='Нормалізоване ПІБ')),
+                ('last_name_key', models.CharField(max_length=100, verbose_name='Нормалізоване прізвище')),
+                ('date_of_birth', models.DateField(verbose_name='Дата народження')),
+                ('passport_key', models.CharField(blank=True, max_length=50, verbose_name='Нормалізований номер документа')),
+            ],
+            options={
+                'verbose_name': 'Ключ ідентичності',
+                'verbose_name_plural': 'Ключі ідентичності',
+                'indexes': [models.Index(fields=['name_key', 'date_of_birth'], name='identity_name_dob_idx'), models.Index(fields=['last_name_key', 'date_of_birth'], name='identity_last_name_dob_idx'), models.Index(condition=models.Q(('passport_key', ''), _negated=True), fields=['passport_key'], name='identity_passport_idx')],
+            },
+        ),
+    ]
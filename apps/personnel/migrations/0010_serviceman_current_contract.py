@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:33
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_current_contracts(apps, schema_editor):
+    Serviceman = apps.get_model('personnel', 'Serviceman')
+    Contract = apps.get_model('personnel', 'Contract')
+    latest = Contract.objects.filter(serviceman=OuterRef('pk')).order_by('-end_date', '-start_date')
+    Serviceman.objects.update(
+        contract_start_date=Subquery(latest.values('start_date')[:1]),
+        contract_end_date=Subquery(latest.values('end_date')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personnel', '0009_servicemanidentity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='serviceman',
+            name='contract_end_date',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, verbose_name='Закінчення поточного контракту'),
+        ),
+        migrations.AddField(
+            model_name='serviceman',
+            name='contract_start_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Початок поточного контракту'),
+        ),
+        migrations.RunPython(fill_current_contracts, migrations.RunPython.noop),
+    ]
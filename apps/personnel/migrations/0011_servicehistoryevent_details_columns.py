@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:34
+
+import django.db.models.fields.json
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personnel', '0010_serviceman_current_contract'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicehistoryevent',
+            name='from_position_id',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(django.db.models.fields.json.KeyTextTransform('from_position_id', 'details'), models.BigIntegerField(null=True)), output_field=models.BigIntegerField(null=True)),
+        ),
+        migrations.AddField(
+            model_name='servicehistoryevent',
+            name='new_rank',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(django.db.models.fields.json.KeyTextTransform('new_rank', 'details'), models.CharField(max_length=100, null=True)), output_field=models.CharField(max_length=100, null=True)),
+        ),
+        migrations.AddField(
+            model_name='servicehistoryevent',
+            name='previous_rank',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(django.db.models.fields.json.KeyTextTransform('previous_rank', 'details'), models.CharField(max_length=100, null=True)), output_field=models.CharField(max_length=100, null=True)),
+        ),
+        migrations.AddField(
+            model_name='servicehistoryevent',
+            name='to_position_id',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(django.db.models.fields.json.KeyTextTransform('to_position_id', 'details'), models.BigIntegerField(null=True)), output_field=models.BigIntegerField(null=True)),
+        ),
+        migrations.AddIndex(
+            model_name='servicehistoryevent',
+            index=models.Index(condition=models.Q(('from_position_id__isnull', False)), fields=['from_position_id', 'event_date'], name='event_from_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicehistoryevent',
+            index=models.Index(condition=models.Q(('to_position_id__isnull', False)), fields=['to_position_id', 'event_date'], name='event_to_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicehistoryevent',
+            index=models.Index(condition=models.Q(('new_rank__isnull', False)), fields=['new_rank', 'event_date'], name='event_new_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personnel', '0011_servicehistoryevent_details_columns'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='temporaryarrival',
+            index=models.Index(condition=models.Q(('departure_date__isnull', True)), fields=['arrival_date', 'origin_unit'], name='arrival_present_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='temporaryarrival',
+            index=models.Index(fields=['departure_date', 'arrival_date'], name='arrival_departure_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, TruncMonth
+
+
+def fill_loss_statistics(apps, schema_editor):
+    Serviceman = apps.get_model('personnel', 'Serviceman')
+    PositionHistory = apps.get_model('personnel', 'PositionHistory')
+    IrrecoverableLoss = apps.get_model('personnel', 'IrrecoverableLoss')
+    LossStatistic = apps.get_model('personnel', 'LossStatistic')
+
+    last_history = PositionHistory.objects.filter(serviceman=OuterRef('serviceman')).order_by('-start_date', '-pk')
+    IrrecoverableLoss.objects.update(unit=Coalesce(
+        Subquery(Serviceman.objects.filter(pk=OuterRef('serviceman')).values('position__unit')[:1]),
+        Subquery(last_history.values('position__unit')[:1]),
+    ))
+    rows = (
+        IrrecoverableLoss.objects.annotate(month=TruncMonth('loss_date'))
+        .values('month', 'loss_type', 'unit')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+    LossStatistic.objects.bulk_create([
+        LossStatistic(month=row['month'], loss_type=row['loss_type'], unit_id=row['unit'], count=row['count'])
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personnel', '0012_temporaryarrival_indexes'),
+        ('staffing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LossStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Перше число місяця', verbose_name='Місяць')),
+                ('loss_type', models.CharField(choices=[('KIA', 'Загинув'), ('DIED', 'Помер (від хвороби, нещасного випадку)'), ('MIA', 'Зник безвісти'), ('CAPTURED', 'Полонений')], max_length=10, verbose_name='Вид втрати')),
+                ('count', models.PositiveIntegerField(verbose_name='Кількість')),
+            ],
+            options={
+                'verbose_name': 'Статистика втрат',
+                'verbose_name_plural': 'Статистика втрат',
+                'ordering': ['-month', 'loss_type'],
+            },
+        ),
+        migrations.AddField(
+            model_name='irrecoverableloss',
+            name='unit',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='staffing.unit', verbose_name='Підрозділ (остання посада)'),
+        ),
+        migrations.AddIndex(
+            model_name='irrecoverableloss',
+            index=models.Index(fields=['loss_type', 'unit', 'loss_date'], name='loss_stat_bucket_idx'),
+        ),
+        migrations.AddField(
+            model_name='lossstatistic',
+            name='unit',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='staffing.unit', verbose_name='Підрозділ'),
+        ),
+        migrations.AddIndex(
+            model_name='lossstatistic',
+            index=models.Index(fields=['month', 'loss_type'], name='loss_statistic_month_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='lossstatistic',
+            constraint=models.UniqueConstraint(fields=('month', 'loss_type', 'unit'), name='unique_loss_statistic'),
+        ),
+        migrations.AddConstraint(
+            model_name='lossstatistic',
+            constraint=models.UniqueConstraint(condition=models.Q(('unit__isnull', True)), fields=('month', 'loss_type'), name='unique_unassigned_loss_statistic'),
+        ),
+        migrations.RunPython(fill_loss_statistics, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,14 @@
 # apps/personnel/models.py
+from datetime import timedelta
+
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast
+
+from .thumbnails import thumbnail_urls
+
 
 class Rank(models.Model):
     """Військове звання - довідник"""
@@ -73,6 +80,13 @@ class Serviceman(models.Model):
 
     photo = models.ImageField("Фото", upload_to='servicemen_photos/', null=True, blank=True)
 
+    # Поточний (останній за датою закінчення) контракт - денормалізовано з Contract
+    # для звітів про закінчення контрактів; оновлюється refresh_current_contracts()
+    contract_start_date = models.DateField("Початок поточного контракту", null=True, blank=True, editable=False)
+    contract_end_date = models.DateField(
+        "Закінчення поточного контракту", null=True, blank=True, editable=False, db_index=True
+    )
+
     class Meta:
         verbose_name = "Військовослужбовець"
         verbose_name_plural = "Військовослужбовці"
@@ -85,6 +99,11 @@ class Serviceman(models.Model):
     def full_name(self):
         return f"{self.last_name} {self.first_name} {self.middle_name}".strip()
 
+    @property
+    def photo_thumbnails(self):
+        """URL мініатюр фото {розмір: {розширення: URL}} або None, якщо фото немає."""
+        return thumbnail_urls(self.photo.name) if self.photo else None
+
     def save(self, *args, **kwargs):
         # Автоматично заповнюємо personal_number з РНОКПП, якщо він порожній
         if not self.personal_number and self.tax_id_number:
@@ -154,6 +173,46 @@ class Contract(models.Model):
         verbose_name_plural = "Контракти"
         ordering = ['-start_date']
 
+def _details_key(key, output_field):
+    """Типізована згенерована колонка з ключа details (зберігається в таблиці та індексується)."""
+    return models.GeneratedField(
+        expression=Cast(KT(f'details__{key}'), output_field),
+        output_field=output_field,
+        db_persist=True,
+    )
+
+
+class ServiceHistoryEventQuerySet(models.QuerySet):
+    """Запити до історії служби за типізованими колонками з details (використовують індекси)."""
+
+    def in_period(self, start_date=None, end_date=None):
+        queryset = self
+        if start_date:
+            queryset = queryset.filter(event_date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(event_date__lte=end_date)
+        return queryset
+
+    def promotions_to(self, rank, start_date=None, end_date=None):
+        """Присвоєння звання rank (Rank або назва), напр. всі присвоєння "Капітан" за рік."""
+        return self.filter(new_rank=getattr(rank, 'name', rank)).in_period(start_date, end_date)
+
+    def moves_from_position(self, position, start_date=None, end_date=None):
+        """Переведення та призначення з посади position (Position або id)."""
+        return self.filter(from_position_id=getattr(position, 'pk', position)).in_period(start_date, end_date)
+
+    def moves_to_position(self, position, start_date=None, end_date=None):
+        """Переведення та призначення на посаду position (Position або id)."""
+        return self.filter(to_position_id=getattr(position, 'pk', position)).in_period(start_date, end_date)
+
+    def involving_position(self, position, start_date=None, end_date=None):
+        """Усі переміщення з посади або на посаду position."""
+        position_id = getattr(position, 'pk', position)
+        return self.filter(
+            models.Q(from_position_id=position_id) | models.Q(to_position_id=position_id)
+        ).in_period(start_date, end_date)
+
+
 class ServiceHistoryEvent(models.Model):
     """Журнал подій в історії служби"""
     class EventType(models.TextChoices):
@@ -161,6 +220,7 @@ class ServiceHistoryEvent(models.Model):
         APPOINTMENT = 'APPOINTMENT', 'Призначення на посаду'
         TRANSFER = 'TRANSFER', 'Переведення'
         PROMOTION = 'PROMOTION', 'Підвищення у званні'
+        STATUS_CHANGE = 'STATUS_CHANGE', 'Зміна статусу'
         DISMISSAL = 'DISMISSAL', 'Звільнення'
         DEATH = 'DEATH', 'Загибель/Смерть'
 
@@ -170,10 +230,26 @@ class ServiceHistoryEvent(models.Model):
     details = models.JSONField("Деталі", default=dict, help_text="Зберігає деталі, напр. new_rank, new_position")
     order_reference = models.CharField("Посилання на наказ", max_length=255)
 
+    # Колонки, що обчислюються БД з details - для індексованих запитів (див. ServiceHistoryEventQuerySet)
+    from_position_id = _details_key('from_position_id', models.BigIntegerField(null=True))
+    to_position_id = _details_key('to_position_id', models.BigIntegerField(null=True))
+    previous_rank = _details_key('previous_rank', models.CharField(max_length=100, null=True))
+    new_rank = _details_key('new_rank', models.CharField(max_length=100, null=True))
+
+    objects = ServiceHistoryEventQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Подія в історії служби"
         verbose_name_plural = "Історія служби"
         ordering = ['-event_date']
+        indexes = [
+            models.Index(fields=['from_position_id', 'event_date'], name='event_from_position_idx',
+                         condition=models.Q(from_position_id__isnull=False)),
+            models.Index(fields=['to_position_id', 'event_date'], name='event_to_position_idx',
+                         condition=models.Q(to_position_id__isnull=False)),
+            models.Index(fields=['new_rank', 'event_date'], name='event_new_rank_idx',
+                         condition=models.Q(new_rank__isnull=False)),
+        ]
 
 
 class PositionHistory(models.Model):
@@ -201,6 +277,72 @@ class PositionHistory(models.Model):
             raise ValidationError('Дата звільнення з посади не може бути раніше дати призначення.')
 
 
+class TemporaryArrivalQuerySet(models.QuerySet):
+    """
+    Вибірки тимчасово прибулих на дату та за період.
+    День вибуття вважається днем, коли особа вже не перебуває в частині.
+    """
+
+    def present(self):
+        """Ті, хто перебуває в частині зараз (не вибули) - частковий індекс arrival_present_idx."""
+        return self.filter(departure_date__isnull=True)
+
+    def present_on(self, day):
+        """Присутні на дату day: прибули не пізніше day і не вибули на цю дату."""
+        return self.present_during(day, day)
+
+    def present_during(self, start_date, end_date):
+        """Перебували в частині хоча б один день періоду [start_date, end_date]."""
+        return self.filter(arrival_date__lte=end_date).filter(
+            models.Q(departure_date__isnull=True) | models.Q(departure_date__gt=start_date)
+        )
+
+    def headcount_by_origin(self, start_date, end_date=None):
+        """
+        Чисельність прибулих за підрозділами, звідки вони прибули, за період (за замовчуванням - один день).
+        Один агрегатний запит; для кожного origin_unit повертає:
+        total - перебували в частині протягом періоду, arrived / departed - прибули / вибули за період,
+        present - перебувають на кінець періоду.
+        """
+        end_date = end_date or start_date
+        return (
+            self.present_during(start_date, end_date)
+            .values('origin_unit')
+            .annotate(
+                total=models.Count('pk'),
+                arrived=models.Count('pk', filter=models.Q(arrival_date__gte=start_date)),
+                departed=models.Count('pk', filter=models.Q(departure_date__lte=end_date)),
+                present=models.Count('pk', filter=models.Q(departure_date__isnull=True)
+                                     | models.Q(departure_date__gt=end_date)),
+            )
+            .order_by('-present', 'origin_unit')
+        )
+
+    def daily_headcount(self, start_date, end_date):
+        """
+        Кількість присутніх на кожен день періоду: [(дата, кількість)].
+        Вибираються лише дати прибуття та вибуття записів, що перетинають період, тож
+        обчислення лінійне за кількістю таких записів і днів, а не по запиту на день.
+        """
+        days = (end_date - start_date).days + 1
+        if days <= 0:
+            return []
+
+        changes = [0] * (days + 1)
+        for arrival_date, departure_date in self.present_during(start_date, end_date).values_list(
+                'arrival_date', 'departure_date'):
+            changes[max((arrival_date - start_date).days, 0)] += 1
+            if departure_date is not None and departure_date <= end_date:
+                changes[(departure_date - start_date).days] -= 1
+
+        result = []
+        count = 0
+        for offset in range(days):
+            count += changes[offset]
+            result.append((start_date + timedelta(days=offset), count))
+        return result
+
+
 class TemporaryArrival(models.Model):
     """
     Облік тимчасово прибулого особового складу з інших військових частин.
@@ -220,10 +362,19 @@ class TemporaryArrival(models.Model):
 
     notes = models.TextField("Додаткова інформація", blank=True)
 
+    objects = TemporaryArrivalQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Тимчасово прибулий"
         verbose_name_plural = "4. Тимчасово прибулі"
         ordering = ['-arrival_date']
+        indexes = [
+            # Лише ті, хто ще не вибув: розмір не зростає з накопиченням архівних записів
+            models.Index(fields=['arrival_date', 'origin_unit'], name='arrival_present_idx',
+                         condition=models.Q(departure_date__isnull=True)),
+            # Присутні на минулу дату: departure_date > D відсікає давно вибулих
+            models.Index(fields=['departure_date', 'arrival_date'], name='arrival_departure_idx'),
+        ]
 
     def __str__(self):
         return f"{self.rank_name} {self.full_name} (прибув {self.arrival_date})"
@@ -266,10 +417,114 @@ class IrrecoverableLoss(models.Model):
         blank=True
     )
 
+    # Підрозділ останньої посади на момент внесення запису - для статистики втрат (див. loss_stats.py)
+    unit = models.ForeignKey(
+        'staffing.Unit',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name="Підрозділ (остання посада)"
+    )
+
     class Meta:
         verbose_name = "Безповоротна втрата"
         verbose_name_plural = "7. Безповоротні втрати"
         ordering = ['-loss_date']
+        indexes = [
+            # Перерахунок однієї комірки статистики (вид, підрозділ, місяць)
+            models.Index(fields=['loss_type', 'unit', 'loss_date'], name='loss_stat_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_loss_type_display()} - {self.serviceman.full_name}"
+
+class ImportCheckpoint(models.Model):
+    """
+    Контрольна точка імпорту файлу особового складу.
+    Дозволяє продовжити перерваний імпорт з першого необробленого рядка (import_personnel --resume).
+    """
+    file_hash = models.CharField("SHA-256 файлу", max_length=64, unique=True)
+    file_name = models.CharField("Ім'я файлу", max_length=255)
+    rows_done = models.PositiveIntegerField("Оброблено рядків", default=0)
+    counts = models.JSONField("Лічильники", default=dict, help_text="created, updated, unchanged, skipped, errors")
+    is_completed = models.BooleanField("Завершено", default=False)
+    updated_at = models.DateTimeField("Оновлено", auto_now=True)
+
+    class Meta:
+        verbose_name = "Контрольна точка імпорту"
+        verbose_name_plural = "Контрольні точки імпорту"
+        ordering = ['-updated_at']
+
+    def __str__(self):
+        return f"{self.file_name}: {self.rows_done} рядків"
+
+
+class LossStatistic(models.Model):
+    """
+    Кількість безповоротних втрат за місяць, видом втрати та підрозділом.
+    Таблиця підтримується сигналами IrrecoverableLoss (див. loss_stats.py);
+    звіти читають лише її, а не всю історію втрат.
+    """
+    month = models.DateField("Місяць", help_text="Перше число місяця")
+    loss_type = models.CharField("Вид втрати", max_length=10, choices=IrrecoverableLoss.LossType.choices)
+    unit = models.ForeignKey(
+        'staffing.Unit',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Підрозділ"
+    )
+    count = models.PositiveIntegerField("Кількість")
+
+    class Meta:
+        verbose_name = "Статистика втрат"
+        verbose_name_plural = "Статистика втрат"
+        ordering = ['-month', 'loss_type']
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'loss_type', 'unit'], name='unique_loss_statistic'),
+            # NULL у unit не порушує попереднє обмеження, тож комірки без підрозділу - окремим умовним
+            models.UniqueConstraint(
+                fields=['month', 'loss_type'],
+                condition=models.Q(unit__isnull=True),
+                name='unique_unassigned_loss_statistic'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['month', 'loss_type'], name='loss_statistic_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%m.%Y} {self.get_loss_type_display()}: {self.count}"
+
+
+class ServicemanIdentity(models.Model):
+    """
+    Нормалізовані ключі ідентичності військовослужбовця для пошуку дублікатів (див. identity.py).
+    Кожен індекс - окремий "блок": кандидатами в дублікати вважаються лише записи з однаковим ключем блоку.
+    """
+    serviceman = models.OneToOneField(
+        Serviceman,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='identity',
+        verbose_name="Військовослужбовець"
+    )
+    name_key = models.CharField("Нормалізоване ПІБ", max_length=300)
+    last_name_key = models.CharField("Нормалізоване прізвище", max_length=100)
+    date_of_birth = models.DateField("Дата народження")
+    passport_key = models.CharField("Нормалізований номер документа", max_length=50, blank=True)
+
+    class Meta:
+        verbose_name = "Ключ ідентичності"
+        verbose_name_plural = "Ключі ідентичності"
+        indexes = [
+            models.Index(fields=['name_key', 'date_of_birth'], name='identity_name_dob_idx'),
+            models.Index(fields=['last_name_key', 'date_of_birth'], name='identity_last_name_dob_idx'),
+            models.Index(fields=['passport_key'], name='identity_passport_idx', condition=~models.Q(passport_key='')),
+        ]
 
     def __str__(self):
-        return f"{self.get_loss_type_display()} - {self.serviceman.full_name}"
\ No newline at end of file
+        return f"{self.name_key} ({self.date_of_birth})"
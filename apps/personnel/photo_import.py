@@ -0,0 +1,203 @@
+# apps/personnel/photo_import.py
+"""
+Пакетний імпорт фото військовослужбовців з ZIP архіву або каталогу - команда import_photos.
+
+Ім'я файлу (без розширення) - особистий номер або РНОКПП військовослужбовця; воно служить
+лише для зіставлення, а у сховище фото записується під випадковим ім'ям (медіа роздаються
+без авторизації, тож URL фото та мініатюр не повинні виводитися з номера особи).
+Усі імена зіставляються з обліком одним запитом, після чого фото обробляються у пулі
+процесів: кожен процес сам читає файл з архіву, зменшує фото, записує його до сховища
+разом з мініатюрами (thumbnails.py) і повертає лише ім'я збереженого файлу.
+Поле photo оновлюється порціями через bulk_update.
+"""
+import multiprocessing
+import os
+import posixpath
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from PIL import Image
+
+from .caching import invalidate_serviceman_cards
+from .importing import chunked
+from .models import Serviceman
+from .thumbnails import normalize_photo, render_thumbnails, save_thumbnails
+
+PHOTO_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tif', '.tiff'}
+
+PHOTO_UPDATE_CHUNK_SIZE = 200
+
+
+class PhotoSource:
+    """Файли фото в ZIP архіві або в каталозі (з підкаталогами); імена - відносні шляхи."""
+
+    def __init__(self, path):
+        self.path = path
+        self.archive = zipfile.ZipFile(path) if zipfile.is_zipfile(path) else None
+        if self.archive is None and not os.path.isdir(path):
+            raise ValueError(f'{path} не є ZIP архівом або каталогом.')
+
+    def names(self):
+        if self.archive is not None:
+            names = (info.filename for info in self.archive.infolist() if not info.is_dir())
+        else:
+            names = (
+                os.path.relpath(os.path.join(root, filename), self.path).replace(os.sep, '/')
+                for root, _, filenames in os.walk(self.path) for filename in filenames
+            )
+        for name in names:
+            filename = posixpath.basename(name)
+            # Службові файли архіваторів macOS та приховані файли
+            if name.startswith('__MACOSX/') or filename.startswith('.'):
+                continue
+            if posixpath.splitext(filename)[1].lower() in PHOTO_EXTENSIONS:
+                yield name
+
+    def open(self, name):
+        if self.archive is not None:
+            return self.archive.open(name)
+        return open(os.path.join(self.path, name), 'rb')
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+
+
+def photo_key(name):
+    """Особистий номер або РНОКПП з імені файлу фото."""
+    return posixpath.splitext(posixpath.basename(name))[0].strip()
+
+
+def match_photos(names):
+    """
+    Зіставляє файли з військовослужбовцями одним запитом за особистим номером або РНОКПП.
+    Повертає ({ім'я файлу: (id, чи є вже фото)}, [(ім'я файлу, причина)] для незіставлених).
+    """
+    keys = {photo_key(name) for name in names} - {''}
+    servicemen = {}
+    ambiguous = set()
+    rows = Serviceman.objects.filter(
+        Q(personal_number__in=keys) | Q(tax_id_number__in=keys)
+    ).values_list('pk', 'personal_number', 'tax_id_number', 'photo')
+    for pk, personal_number, tax_id_number, photo in rows:
+        for key in {personal_number, tax_id_number} & keys:
+            if key in servicemen and servicemen[key][0] != pk:
+                ambiguous.add(key)
+            servicemen[key] = (pk, bool(photo))
+
+    matched = {}
+    unmatched = []
+    seen = {}
+    for name in names:
+        key = photo_key(name)
+        if key in ambiguous:
+            unmatched.append((name, f'"{key}" відповідає кільком військовослужбовцям.'))
+        elif key not in servicemen:
+            unmatched.append((name, f'військовослужбовця з номером "{key}" не знайдено.'))
+        elif servicemen[key][0] in seen:
+            unmatched.append((name, f'повторне фото того ж військовослужбовця (вже є {seen[servicemen[key][0]]}).'))
+        else:
+            seen[servicemen[key][0]] = name
+            matched[name] = servicemen[key]
+    return matched, unmatched
+
+
+def store_photo(source, name):
+    """Зменшує фото з джерела, записує його та мініатюри до сховища. Повертає ім'я збереженого фото."""
+    with source.open(name) as file:
+        content = normalize_photo(file)
+    photo_dir = Serviceman._meta.get_field('photo').upload_to.rstrip('/')
+    # Випадкове ім'я: не розкриває РНОКПП у публічному URL, а нове фото отримує нові URL мініатюр
+    photo_name = default_storage.save(f'{photo_dir}/{uuid.uuid4().hex}.jpg', ContentFile(content))
+    save_thumbnails(photo_name, render_thumbnails(BytesIO(content)))
+    return photo_name
+
+
+def _store_photo_safely(source, name):
+    try:
+        return store_photo(source, name), None
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        return None, f'не вдалося обробити зображення: {e}'
+
+
+_worker_source = None
+
+
+def _init_photo_worker(path):
+    global _worker_source
+    _worker_source = PhotoSource(path)
+
+
+def _store_photo_in_worker(name):
+    return _store_photo_safely(_worker_source, name)
+
+
+class PhotoImporter:
+    """
+    Імпортує фото з джерела. Лічильники - у counts, файли, які не вдалося
+    зіставити чи обробити, - у unmatched як (ім'я файлу, причина).
+    """
+
+    def __init__(self, source, overwrite=False, workers=1, dry_run=False):
+        self.source = source
+        self.overwrite = overwrite
+        self.workers = workers
+        self.dry_run = dry_run
+        self.counts = {'matched': 0, 'imported': 0, 'skipped': 0}
+        self.unmatched = []
+
+    def _process(self, names):
+        """Повертає пари (ім'я файлу, (ім'я збереженого фото, помилка)) у вихідному порядку."""
+        if self.workers <= 1:
+            for name in names:
+                yield name, _store_photo_safely(self.source, name)
+            return
+
+        with ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('fork'),
+                initializer=_init_photo_worker,
+                initargs=(self.source.path,),
+        ) as executor:
+            pending = deque()
+            for name in names:
+                pending.append((name, executor.submit(_store_photo_in_worker, name)))
+                if len(pending) >= self.workers * 4:
+                    name, future = pending.popleft()
+                    yield name, future.result()
+            while pending:
+                name, future = pending.popleft()
+                yield name, future.result()
+
+    def run(self):
+        names = list(self.source.names())
+        matched, self.unmatched = match_photos(names)
+        self.counts['matched'] = len(matched)
+
+        to_import = []
+        for name, (pk, has_photo) in matched.items():
+            if has_photo and not self.overwrite:
+                self.counts['skipped'] += 1
+            else:
+                to_import.append(name)
+        if self.dry_run:
+            return self.counts
+
+        for chunk in chunked(self._process(to_import), PHOTO_UPDATE_CHUNK_SIZE):
+            updates = []
+            for name, (photo_name, error) in chunk:
+                if error:
+                    self.unmatched.append((name, error))
+                else:
+                    updates.append(Serviceman(pk=matched[name][0], photo=photo_name))
+            # bulk_update не надсилає сигналів: мініатюри вже створено, картки інвалідуємо явно
+            Serviceman.objects.bulk_update(updates, ['photo'])
+            invalidate_serviceman_cards(*(serviceman.pk for serviceman in updates))
+            self.counts['imported'] += len(updates)
+        return self.counts
@@ -1,8 +1,23 @@
 # apps/personnel/services.py
+import logging
+from datetime import date
+
 from django.db import transaction
-from .models import Serviceman, ServiceHistoryEvent, PositionHistory  # <-- Додайте імпорт PositionHistory
+from django.db.models import Q, OuterRef, Subquery
+from apps.auditing.models import AuditLog
+from .caching import invalidate_serviceman_cards
+from .models import Serviceman, ServiceHistoryEvent, PositionHistory, Contract
 from apps.staffing.models import Position
-from datetime import date
+
+logger = logging.getLogger(__name__)
+
+
+class TransferError(ValueError):
+    """Помилка перевірки переміщень; errors містить опис кожного конфлікту."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors))
 
 
 @transaction.atomic
@@ -11,46 +26,173 @@ def transfer_serviceman(serviceman: Serviceman, new_position: Position, order_re
     """
     Виконує повний процес переведення або первинного призначення військовослужбовця.
     """
-    old_position = serviceman.position
+    try:
+        transfer_many([(serviceman, new_position)], order_reference, event_date, event_type)
+    except TransferError as e:
+        raise ValueError(e.errors[0]) from e
+    return serviceman
 
-    # Оновлюємо запис в історії посад для старої посади (якщо вона була)
-    if old_position:
-        PositionHistory.objects.filter(
-            serviceman=serviceman,
-            position=old_position,
-            end_date__isnull=True
-        ).update(end_date=event_date)
 
-        old_position.serviceman = None
-        old_position.save()
+@transaction.atomic
+def transfer_many(moves, order_reference: str, event_date: date, event_type: str):
+    """
+    Виконує масове переведення (призначення) військовослужбовців за одним наказом.
+
+    moves - послідовність пар (військовослужбовець, нова посада).
+    Посада вважається вільною, якщо вона вакантна або її звільняє інший учасник
+    цього ж переміщення, тому обміни посадами та ланцюжки переведень дозволені.
+    Усі конфлікти перевіряються заздалегідь одним запитом; якщо є хоча б один,
+    жодних змін не вноситься і піднімається TransferError зі списком помилок.
+    """
+    moves = list(moves)
+    if not moves:
+        return []
+
+    errors = []
+    servicemen = {}
+    targets = {}
+    for serviceman, new_position in moves:
+        if serviceman.pk in servicemen:
+            errors.append(f"Військовослужбовця {serviceman} вказано в переміщенні більше одного разу.")
+        if new_position.pk in targets:
+            errors.append(f"На посаду '{new_position}' призначається більше одного військовослужбовця.")
+        servicemen[serviceman.pk] = serviceman
+        targets[new_position.pk] = serviceman.pk
+
+    # Поточні посади учасників та поточні особи на цільових посадах - одним запитом з блокуванням рядків
+    current = Serviceman.objects.select_for_update().filter(
+        Q(pk__in=servicemen.keys()) | Q(position_id__in=targets.keys())
+    )
+    old_position_ids = {}
+    occupants = {}
+    for pk, position_id in current.values_list('pk', 'position_id'):
+        if pk in servicemen:
+            old_position_ids[pk] = position_id
+        if position_id in targets:
+            occupants[position_id] = pk
 
-    if hasattr(new_position, 'serviceman') and new_position.serviceman is not None:
-        raise ValueError(f"Посада '{new_position}' вже зайнята військовослужбовцем {new_position.serviceman}.")
+    for position_id, serviceman_pk in targets.items():
+        occupant_pk = occupants.get(position_id)
+        if occupant_pk == serviceman_pk:
+            errors.append(f"Військовослужбовець {servicemen[serviceman_pk]} вже обіймає посаду з ID={position_id}.")
+        elif occupant_pk is not None and occupant_pk not in servicemen:
+            errors.append(f"Посада з ID={position_id} вже зайнята іншим військовослужбовцем (ID={occupant_pk}).")
 
-    serviceman.position = new_position
-    serviceman.save()
+    if errors:
+        raise TransferError(errors)
 
-    # Створюємо новий запис в історії посад для нової посади
-    PositionHistory.objects.create(
-        serviceman=serviceman,
-        position=new_position,
-        start_date=event_date,
-        order_reference=order_reference
+    positions = Position.objects.select_related('unit').in_bulk(
+        set(targets) | {pk for pk in old_position_ids.values() if pk}
     )
 
-    # Створюємо загальний запис в історії служби (як і раніше)
-    ServiceHistoryEvent.objects.create(
-        serviceman=serviceman,
-        event_type=event_type,
-        event_date=event_date,
-        details={
-            'from_position_id': old_position.id if old_position else None,
-            'from_position_name': str(old_position) if old_position else 'Не було',
-            'to_position_id': new_position.id,
-            'to_position_name': str(new_position),
-        },
-        order_reference=order_reference
+    # Спочатку звільняємо посади всіх учасників, щоб обміни не порушили унікальність посади
+    Serviceman.objects.filter(pk__in=servicemen.keys(), position__isnull=False).update(position=None)
+    PositionHistory.objects.filter(
+        serviceman_id__in=servicemen.keys(),
+        end_date__isnull=True
+    ).update(end_date=event_date)
+
+    history = []
+    events = []
+    for serviceman, new_position in moves:
+        old_position = positions.get(old_position_ids.get(serviceman.pk))
+        new_position = positions[new_position.pk]
+        serviceman.position = new_position
+
+        history.append(PositionHistory(
+            serviceman=serviceman,
+            position=new_position,
+            start_date=event_date,
+            order_reference=order_reference
+        ))
+        events.append(ServiceHistoryEvent(
+            serviceman=serviceman,
+            event_type=event_type,
+            event_date=event_date,
+            details={
+                'from_position_id': old_position.id if old_position else None,
+                'from_position_name': str(old_position) if old_position else 'Не було',
+                'to_position_id': new_position.id,
+                'to_position_name': str(new_position),
+            },
+            order_reference=order_reference
+        ))
+
+    Serviceman.objects.bulk_update(servicemen.values(), ['position'])
+    PositionHistory.objects.bulk_create(history)
+    ServiceHistoryEvent.objects.bulk_create(events)
+
+    # Масові операції не надсилають сигналів, тому інвалідуємо картки явно
+    invalidate_serviceman_cards(*servicemen.keys())
+
+    logger.info("За наказом '%s' переведено/призначено %d військовослужбовців.", order_reference, len(moves))
+    return [serviceman for serviceman, _ in moves]
+
+
+@transaction.atomic
+def change_status_many(servicemen, new_status: str, event_date: date, order_reference: str, user=None, request=None):
+    """
+    Масово змінює статус військовослужбовців (напр. уся рота у відпустці).
+
+    servicemen - QuerySet військовослужбовців. Ті, хто вже має new_status, пропускаються.
+    Кількість запитів не залежить від розміру вибірки: читання попередніх статусів,
+    один UPDATE, bulk_create подій історії служби та bulk_create записів аудиту.
+    Повертає кількість військовослужбовців, статус яких змінено.
+    """
+    targets = list(
+        servicemen.exclude(status=new_status).select_related('rank').select_for_update(of=('self',))
     )
+    if not targets:
+        return 0
+
+    pks = [serviceman.pk for serviceman in targets]
+    Serviceman.objects.filter(pk__in=pks).update(status=new_status)
+
+    new_status_label = Serviceman.Status(new_status).label
+    events = []
+    audit_entries = []
+    for serviceman in targets:
+        previous_status = serviceman.status
+        serviceman.status = new_status
 
-    print(f"Військовослужбовця {serviceman} призначено/переведено на посаду {new_position}.")
-    return serviceman
\ No newline at end of file
+        events.append(ServiceHistoryEvent(
+            serviceman=serviceman,
+            event_type=ServiceHistoryEvent.EventType.STATUS_CHANGE,
+            event_date=event_date,
+            details={'previous_status': previous_status, 'new_status': new_status},
+            order_reference=order_reference
+        ))
+        audit_entries.append(AuditLog.build_entry(
+            user=user,
+            action='UPDATE',
+            obj=serviceman,
+            changes={'old': {'status': previous_status}, 'new': {'status': new_status}},
+            request=request,
+            notes=f"Масова зміна статусу на '{new_status_label}' ({order_reference})"
+        ))
+
+    ServiceHistoryEvent.objects.bulk_create(events)
+    AuditLog.objects.bulk_create(audit_entries)
+
+    invalidate_serviceman_cards(*pks)
+
+    logger.info("Статус '%s' встановлено для %d військовослужбовців.", new_status, len(targets))
+    return len(targets)
+
+
+def refresh_current_contracts(serviceman_ids=None):
+    """
+    Перераховує поля поточного контракту (contract_start_date, contract_end_date)
+    для вказаних військовослужбовців (за замовчуванням - для всіх) одним UPDATE.
+
+    Поточним вважається контракт з найпізнішою датою закінчення, тому після
+    продовження контракту попередній більше не потрапляє до протермінованих.
+    """
+    latest = Contract.objects.filter(serviceman=OuterRef('pk')).order_by('-end_date', '-start_date')
+    servicemen = Serviceman.objects.all()
+    if serviceman_ids is not None:
+        servicemen = servicemen.filter(pk__in=serviceman_ids)
+    return servicemen.update(
+        contract_start_date=Subquery(latest.values('start_date')[:1]),
+        contract_end_date=Subquery(latest.values('end_date')[:1]),
+    )
@@ -0,0 +1,116 @@
+# apps/personnel/signals.py
+"""
+Обробники сигналів для інвалідації кешованих карток військовослужбовців,
+оновлення ключів ідентичності для пошуку дублікатів, полів поточного контракту,
+статистики безповоротних втрат та мініатюр фото.
+
+Масові операції (QuerySet.update, bulk_create, bulk_update) сигналів не надсилають,
+тому сервіси, що їх використовують, викликають функції з caching.py самостійно,
+а ключі ідентичності перераховує команда find_duplicates.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.auditing.models import AuditLog
+from apps.staffing.models import Unit, Position, MilitarySpecialty
+from .caching import invalidate_serviceman_cards, invalidate_all_serviceman_cards
+from .identity import IDENTITY_SOURCE_FIELDS, save_identity
+from .loss_stats import statistic_key, loss_unit_id, refresh_loss_statistics, refresh_unassigned_loss_statistics
+from .services import refresh_current_contracts
+from .thumbnails import safe_generate_thumbnails
+from .models import (
+    Rank, Serviceman, Education, FamilyMember, Contract, ServiceHistoryEvent,
+    PositionHistory, IrrecoverableLoss
+)
+
+SERVICEMAN_RELATED_MODELS = (
+    Education, FamilyMember, Contract, ServiceHistoryEvent, PositionHistory, IrrecoverableLoss
+)
+
+REFERENCE_MODELS = (Rank, Unit, MilitarySpecialty)
+
+
+@receiver([post_save, post_delete], sender=Serviceman)
+def serviceman_changed(sender, instance, **kwargs):
+    invalidate_serviceman_cards(instance.pk)
+
+
+@receiver(post_save, sender=Serviceman)
+def serviceman_identity_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or not update_fields.isdisjoint(IDENTITY_SOURCE_FIELDS):
+        save_identity(instance)
+
+
+@receiver(post_save, sender=Serviceman)
+def serviceman_photo_changed(sender, instance, update_fields=None, **kwargs):
+    # Створюються лише відсутні мініатюри: для незміненого фото це лише перевірка наявності файлів
+    if instance.photo and (update_fields is None or 'photo' in update_fields):
+        safe_generate_thumbnails(instance.photo.name)
+
+
+def serviceman_related_changed(sender, instance, **kwargs):
+    invalidate_serviceman_cards(instance.serviceman_id)
+
+
+for model in SERVICEMAN_RELATED_MODELS:
+    post_save.connect(serviceman_related_changed, sender=model, dispatch_uid=f'card-{model.__name__}-save')
+    post_delete.connect(serviceman_related_changed, sender=model, dispatch_uid=f'card-{model.__name__}-delete')
+
+
+@receiver(post_save, sender=AuditLog)
+def audit_entry_added(sender, instance, created, **kwargs):
+    # Записи аудиту (крім переглядів) входять до хронології на картці
+    if created and instance.action != 'VIEW' and instance.content_type_id is not None \
+            and instance.content_type.model_class() is Serviceman:
+        invalidate_serviceman_cards(instance.object_id)
+
+
+@receiver([post_save, post_delete], sender=Contract)
+def contract_changed(sender, instance, **kwargs):
+    refresh_current_contracts([instance.serviceman_id])
+
+
+@receiver(pre_save, sender=IrrecoverableLoss)
+def loss_saving(sender, instance, **kwargs):
+    # Комірка статистики, до якої запис належав до зміни (вид чи дата могли змінитися)
+    previous = None
+    if instance.pk:
+        previous = IrrecoverableLoss.objects.filter(pk=instance.pk).values_list('loss_date', 'loss_type', 'unit').first()
+    instance._previous_statistic_key = statistic_key(*previous) if previous else None
+    if instance.unit_id is None:
+        instance.unit_id = loss_unit_id(instance.serviceman_id)
+
+
+@receiver(post_save, sender=IrrecoverableLoss)
+def loss_saved(sender, instance, **kwargs):
+    keys = [statistic_key(instance.loss_date, instance.loss_type, instance.unit_id)]
+    if getattr(instance, '_previous_statistic_key', None):
+        keys.append(instance._previous_statistic_key)
+    refresh_loss_statistics(*keys)
+
+
+@receiver(post_delete, sender=IrrecoverableLoss)
+def loss_deleted(sender, instance, **kwargs):
+    refresh_loss_statistics(statistic_key(instance.loss_date, instance.loss_type, instance.unit_id))
+
+
+@receiver(post_delete, sender=Unit)
+def unit_deleted(sender, instance, **kwargs):
+    # Статистика підрозділу видалена каскадно, а його втрати лишилися без підрозділу
+    refresh_unassigned_loss_statistics()
+
+
+@receiver([post_save, post_delete], sender=Position)
+def position_changed(sender, instance, **kwargs):
+    # Назва посади відображається лише на картці того, хто її обіймає
+    occupant_id = Serviceman.objects.filter(position_id=instance.pk).values_list('pk', flat=True).first()
+    invalidate_serviceman_cards(occupant_id)
+
+
+def reference_changed(sender, instance, **kwargs):
+    invalidate_all_serviceman_cards()
+
+
+for model in REFERENCE_MODELS:
+    post_save.connect(reference_changed, sender=model, dispatch_uid=f'card-{model.__name__}-save')
+    post_delete.connect(reference_changed, sender=model, dispatch_uid=f'card-{model.__name__}-delete')
@@ -0,0 +1,167 @@
+import os
+import tempfile
+from datetime import date
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from openpyxl import load_workbook
+from PIL import Image
+
+from apps.staffing.models import MilitarySpecialty, Position, Unit
+from .importing import ErrorReport, PersonnelWriter, load_reference_maps, parse_chunk, read_csv_rows
+from .journal import COL_PASSPORT, COL_POSITION_INDEX, COL_RANK, COL_TAX_ID, OOS_SHEET, export_journal
+from .journal_import import read_sheet_rows
+from .models import IrrecoverableLoss, LossStatistic, PositionHistory, Rank, Serviceman
+from .photo_import import PhotoImporter, PhotoSource
+
+
+class PersonnelImportTestCase(TestCase):
+    """Спільні дані: підрозділ з двома посадами і двоє військовослужбовців з історією посад."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rank = Rank.objects.create(name='Солдат', order=1)
+        unit = Unit.objects.create(name='1-ша рота')
+        specialty = MilitarySpecialty.objects.create(code='100100', name='Стрілець')
+        cls.former, cls.current = [
+            Position.objects.create(unit=unit, position_index=f'Т001-00000{number}', name=f'Стрілець {number}',
+                                    category='Солдат', specialty=specialty, tariff_rate='2')
+            for number in (1, 2)
+        ]
+        cls.assigned = cls._serviceman('1000000001', 'Коваль', cls.current)
+        cls.unassigned = cls._serviceman('1000000002', 'Бойко', None)
+        for serviceman, end_date in ((cls.assigned, date(2024, 1, 1)), (cls.unassigned, date(2024, 6, 1))):
+            PositionHistory.objects.create(serviceman=serviceman, position=cls.former, start_date=date(2023, 1, 1),
+                                           end_date=end_date, order_reference='Наказ №1')
+        PositionHistory.objects.create(serviceman=cls.assigned, position=cls.current, start_date=date(2024, 1, 2),
+                                       order_reference='Наказ №2')
+
+    @classmethod
+    def _serviceman(cls, tax_id, last_name, position):
+        return Serviceman.objects.create(
+            rank=cls.rank, last_name=last_name, first_name='Іван', middle_name='Петрович', position=position,
+            tax_id_number=tax_id, date_of_birth=date(1990, 5, 1), place_of_birth='м. Київ',
+            passport_number='АА123456', enlistment_date=date(2022, 3, 1), enlistment_authority='Київський ТЦК',
+        )
+
+    def journal_rows(self):
+        """Рядки аркуша "2. ООС" експортованого журналу: [(номер рядка, рядок)]."""
+        output = BytesIO()
+        export_journal(output)
+        output.seek(0)
+        return list(read_sheet_rows(load_workbook(output, read_only=True), OOS_SHEET))
+
+    def import_rows(self, rows, update_existing=True):
+        """Розбирає та записує рядки [(номер рядка, рядок)] як import_personnel. Повертає (лічильники, помилки)."""
+        ranks, positions = load_reference_maps()
+        parsed, errors = parse_chunk(rows, ranks, positions)
+        writer = PersonnelWriter(update_existing=update_existing)
+        errors += writer.write_chunk(parsed)
+        return writer.counts, errors
+
+
+class JournalRoundTripTests(PersonnelImportTestCase):
+
+    def test_export_then_import_changes_nothing(self):
+        counts, errors = self.import_rows(self.journal_rows())
+
+        self.assertEqual(errors, [])
+        self.assertEqual(counts['unchanged'], 2)
+        self.unassigned.refresh_from_db()
+        self.assertIsNone(self.unassigned.position_id)
+        self.assigned.refresh_from_db()
+        self.assertEqual(self.assigned.position_id, self.current.pk)
+
+
+class FieldLengthTests(PersonnelImportTestCase):
+
+    def test_overlong_value_rejects_only_its_row(self):
+        (line, row), (other_line, other_row) = self.journal_rows()
+        # Нові особи без посад, щоб рядки не конфліктували з займаністю посад
+        rows = [
+            (line, {**row, COL_TAX_ID: '1000000003', COL_POSITION_INDEX: '', COL_PASSPORT: 'А' * 51}),
+            (other_line, {**other_row, COL_TAX_ID: '1000000004', COL_POSITION_INDEX: ''}),
+        ]
+        counts, errors = self.import_rows(rows)
+
+        self.assertEqual([number for number, _ in errors], [line])
+        self.assertIn('50', errors[0][1])
+        self.assertEqual(counts['created'], 1)
+        self.assertTrue(Serviceman.objects.filter(tax_id_number='1000000004').exists())
+
+
+class ErrorReportTests(PersonnelImportTestCase):
+
+    def test_corrected_report_is_reimported(self):
+        # Рядок особи без посади: новий РНОКПП не конфліктує з займаністю посад
+        line, row = next(item for item in self.journal_rows() if item[1][COL_TAX_ID] == self.unassigned.tax_id_number)
+        rows = [(line, {**row, COL_TAX_ID: '1000000003', COL_RANK: 'Невідоме звання'})]
+        counts, errors = self.import_rows(rows)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(counts['created'], 0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'journal.csv.errors.csv')
+            with ErrorReport(path) as report:
+                report.write(errors, rows)
+            with open(path, encoding='utf-8') as file:
+                content = file.read()
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                file.write(content.replace('Невідоме звання', self.rank.name))
+            with open(path, encoding='utf-8') as file:
+                corrected = list(read_csv_rows(file))
+
+        self.assertEqual(list(corrected[0][1])[:len(row)], list(row))
+        counts, errors = self.import_rows(corrected)
+        self.assertEqual(errors, [])
+        self.assertEqual(counts['created'], 1)
+        self.assertTrue(Serviceman.objects.filter(tax_id_number='1000000003', rank=self.rank).exists())
+
+
+class LossStatisticTests(TestCase):
+
+    def test_unassigned_cell_is_unique(self):
+        cell = {'month': date(2024, 1, 1), 'loss_type': IrrecoverableLoss.LossType.KIA, 'unit': None}
+        LossStatistic.objects.create(count=1, **cell)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            LossStatistic.objects.create(count=1, **cell)
+
+
+class JournalExportPermissionTests(PersonnelImportTestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='operator', password='password')
+        self.client.force_login(self.user)
+
+    def test_export_requires_export_report_permission(self):
+        url = reverse('personnel:electronic-journal-export')
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        content_type, _ = ContentType.objects.get_or_create(app_label='reporting', model='report')
+        permission, _ = Permission.objects.get_or_create(
+            codename='export_report', content_type=content_type, defaults={'name': 'Може експортувати звіти'}
+        )
+        self.user.user_permissions.add(permission)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(url, {'unit_id': 'abc'}).status_code, 404)
+
+
+class PhotoImportTests(PersonnelImportTestCase):
+
+    def test_stored_photo_name_does_not_reveal_tax_id(self):
+        with tempfile.TemporaryDirectory() as media_root, tempfile.TemporaryDirectory() as photos:
+            Image.new('RGB', (40, 60), 'gray').save(os.path.join(photos, f'{self.assigned.tax_id_number}.jpg'))
+            with override_settings(MEDIA_ROOT=media_root):
+                source = PhotoSource(photos)
+                counts = PhotoImporter(source).run()
+                source.close()
+
+        self.assertEqual(counts['imported'], 1)
+        self.assigned.refresh_from_db()
+        self.assertTrue(self.assigned.photo.name)
+        self.assertNotIn(self.assigned.tax_id_number, self.assigned.photo.name)
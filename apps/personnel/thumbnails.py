@@ -0,0 +1,164 @@
+# apps/personnel/thumbnails.py
+"""
+Мініатюри фото військовослужбовців.
+
+Для кожного фото створюються квадратні мініатюри фіксованих розмірів (THUMBNAIL_SIZES)
+у форматах WebP та JPEG (для браузерів без WebP). Вони зберігаються поруч з оригіналом
+у підкаталозі thumbs: servicemen_photos/thumbs/<ім'я оригіналу>.<розмір>.<формат>.
+Ім'я оригіналу входить до імені мініатюри, тож за іменем мініатюри оригінал знаходиться
+без запиту до БД, а нове фото завжди отримує нові імена мініатюр - nginx може віддавати
+їх з довготривалим кешем.
+
+Мініатюри створюються при збереженні фото (сигнал post_save), а відсутні - при першому
+запиті (ThumbnailView, на який nginx передає запит, коли файлу ще немає).
+Наявні фото обробляє команда rebuild_thumbnails.
+"""
+import logging
+import multiprocessing
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = 'thumbs'
+
+# Розмір сторони в пікселях; з запасом для екранів з подвійною щільністю пікселів
+THUMBNAIL_SIZES = {
+    'small': 96,
+    'card': 256,
+}
+
+# Найбільша сторона фото, що зберігається при пакетному імпорті (import_photos)
+PHOTO_MAX_SIZE = 1600
+
+# Розширення: (формат Pillow, параметри збереження, content type)
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}, 'image/webp'),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}, 'image/jpeg'),
+}
+
+
+def thumbnail_name(photo_name, size, extension):
+    """Ім'я мініатюри у сховищі для фото photo_name."""
+    directory, filename = posixpath.split(photo_name)
+    return posixpath.join(directory, THUMBNAIL_DIR, f'{filename}.{size}.{extension}')
+
+
+def parse_thumbnail_name(directory, filename):
+    """
+    Повертає (ім'я оригіналу, розмір, розширення) для файлу мініатюри filename
+    з каталогу фото directory. Некоректне ім'я - ValueError.
+    """
+    original, size, extension = filename.rsplit('.', 2)
+    if size not in THUMBNAIL_SIZES or extension not in THUMBNAIL_FORMATS or not original or '/' in original:
+        raise ValueError(f'Некоректне ім\'я мініатюри: {filename}')
+    return posixpath.join(directory, original), size, extension
+
+
+def thumbnail_urls(photo_name):
+    """{розмір: {розширення: URL}} мініатюр фото (без звернення до сховища)."""
+    return {
+        size: {extension: default_storage.url(thumbnail_name(photo_name, size, extension))
+               for extension in THUMBNAIL_FORMATS}
+        for size in THUMBNAIL_SIZES
+    }
+
+
+def render_thumbnails(source):
+    """
+    Створює всі мініатюри з відкритого файлу зображення. Повертає {(розмір, розширення): bytes}.
+    Фото декодується один раз; для JPEG - одразу зменшеним (draft), що значно швидше
+    для фото з телефону на кілька мегапікселів.
+    """
+    with Image.open(source) as image:
+        largest = max(THUMBNAIL_SIZES.values())
+        image.draft('RGB', (largest * 2, largest * 2))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+
+        result = {}
+        for size, side in THUMBNAIL_SIZES.items():
+            thumbnail = ImageOps.fit(image, (side, side), Image.Resampling.LANCZOS)
+            for extension, (image_format, options, _) in THUMBNAIL_FORMATS.items():
+                output = BytesIO()
+                thumbnail.save(output, image_format, **options)
+                result[size, extension] = output.getvalue()
+        return result
+
+
+def generate_thumbnails(photo_name, overwrite=False):
+    """
+    Створює відсутні мініатюри фото (усі - при overwrite). Повертає кількість записаних файлів.
+    Якщо всі мініатюри вже є, оригінал не відкривається.
+    """
+    names = {
+        (size, extension): thumbnail_name(photo_name, size, extension)
+        for size in THUMBNAIL_SIZES for extension in THUMBNAIL_FORMATS
+    }
+    if not overwrite:
+        names = {key: name for key, name in names.items() if not default_storage.exists(name)}
+    if not names:
+        return 0
+
+    with default_storage.open(photo_name) as source:
+        rendered = render_thumbnails(source)
+    return save_thumbnails(photo_name, {key: rendered[key] for key in names})
+
+
+def save_thumbnails(photo_name, rendered):
+    """Записує мініатюри {(розмір, розширення): bytes} фото photo_name, замінюючи наявні."""
+    for (size, extension), content in rendered.items():
+        name = thumbnail_name(photo_name, size, extension)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        saved = default_storage.save(name, ContentFile(content))
+        if saved != name:
+            # Паралельний запит уже записав цю мініатюру, сховище дало файлу інше ім'я
+            default_storage.delete(saved)
+    return len(rendered)
+
+
+def normalize_photo(source):
+    """
+    Зменшує фото до PHOTO_MAX_SIZE по більшій стороні з урахуванням орієнтації EXIF
+    і повертає JPEG (bytes) без метаданих - для фото, що імпортуються пакетно.
+    """
+    with Image.open(source) as image:
+        # draft зменшує JPEG при декодуванні, доки обидві сторони не менші за задані
+        ratio = PHOTO_MAX_SIZE / max(image.size)
+        if ratio < 1:
+            image.draft('RGB', (int(image.width * ratio), int(image.height * ratio)))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        image.thumbnail((PHOTO_MAX_SIZE, PHOTO_MAX_SIZE), Image.Resampling.LANCZOS)
+        output = BytesIO()
+        image.save(output, 'JPEG', quality=88, optimize=True, progressive=True)
+        return output.getvalue()
+
+
+def safe_generate_thumbnails(photo_name, overwrite=False):
+    """generate_thumbnails, що не перериває збереження чи обробку через пошкоджене або відсутнє фото."""
+    try:
+        return generate_thumbnails(photo_name, overwrite)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning("Не вдалося створити мініатюри для %s: %s", photo_name, e)
+        return None
+
+
+def generate_many(photo_names, overwrite=False, workers=1):
+    """
+    Створює мініатюри для списку фото, при workers > 1 - у пулі процесів (декодування
+    зображень обмежене процесором). Повертає пари (ім'я фото, кількість файлів або None при помилці)
+    у вихідному порядку. Процеси не звертаються до БД, лише до сховища файлів.
+    """
+    if workers <= 1:
+        for name in photo_names:
+            yield name, safe_generate_thumbnails(name, overwrite)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as executor:
+        results = executor.map(safe_generate_thumbnails, photo_names, [overwrite] * len(photo_names), chunksize=8)
+        yield from zip(photo_names, results)
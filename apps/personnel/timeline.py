@@ -0,0 +1,150 @@
+# apps/personnel/timeline.py
+"""
+Єдина хронологія військовослужбовця: події служби, призначення на посади, контракти,
+освіта, безповоротна втрата та записи аудиту в одному потоці, впорядкованому за датою.
+
+Кожне джерело проєктується на однаковий набір колонок (TIMELINE_COLUMNS), і всі вибірки
+об'єднуються одним UNION ALL. Сторінки вибираються за курсором (keyset pagination):
+умова "раніше за останній запис попередньої сторінки" додається до кожної вибірки,
+тому сторінка - це один запит незалежно від її номера.
+"""
+import json
+from datetime import date
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import BigIntegerField, CharField, DateField, F, Q, TextField, Value
+from django.db.models.functions import Cast, Concat, TruncDate
+
+from apps.auditing.models import AuditLog
+from .models import Serviceman, ServiceHistoryEvent, PositionHistory, Contract, Education, IrrecoverableLoss
+
+TIMELINE_PAGE_SIZE = 20
+
+# Колонки проєкції; порядок сортування - (дата, джерело, id) за спаданням
+TIMELINE_COLUMNS = ['t_date', 't_source', 't_pk', 't_kind', 't_title', 't_note', 't_end_date']
+
+SOURCE_EVENT = 'event'
+SOURCE_POSITION = 'position'
+SOURCE_CONTRACT = 'contract'
+SOURCE_EDUCATION = 'education'
+SOURCE_LOSS = 'loss'
+SOURCE_AUDIT = 'audit'
+
+SOURCE_LABELS = {
+    SOURCE_EVENT: 'Історія служби',
+    SOURCE_POSITION: 'Посада',
+    SOURCE_CONTRACT: 'Контракт',
+    SOURCE_EDUCATION: 'Освіта',
+    SOURCE_LOSS: 'Безповоротна втрата',
+    SOURCE_AUDIT: 'Журнал аудиту',
+}
+
+# Назви варіантів для колонки t_kind кожного джерела
+KIND_LABELS = {
+    SOURCE_EVENT: dict(ServiceHistoryEvent.EventType.choices),
+    SOURCE_EDUCATION: dict(Education.EducationLevel.choices),
+    SOURCE_LOSS: dict(IrrecoverableLoss.LossType.choices),
+    SOURCE_AUDIT: dict(AuditLog.ACTION_CHOICES),
+}
+
+
+def _text(value):
+    return Value(value, output_field=CharField())
+
+
+def _project(queryset, source, date_expression, kind, title, note, end_date=None):
+    """Приводить вибірку джерела до колонок TIMELINE_COLUMNS."""
+    return queryset.annotate(
+        t_date=Cast(date_expression, DateField()),
+        t_source=_text(source),
+        t_pk=Cast('pk', BigIntegerField()),
+        t_kind=Cast(kind, CharField()),
+        t_title=Cast(title, CharField()),
+        t_note=Cast(note, TextField()),
+        t_end_date=Cast(end_date if end_date is not None else Value(None), DateField()),
+    ).order_by().values_list(*TIMELINE_COLUMNS)
+
+
+def _sources(serviceman_id):
+    serviceman_type = ContentType.objects.get_for_model(Serviceman)
+    return [
+        _project(ServiceHistoryEvent.objects.filter(serviceman_id=serviceman_id), SOURCE_EVENT,
+                 'event_date', 'event_type', 'order_reference', Cast('details', TextField())),
+        _project(PositionHistory.objects.filter(serviceman_id=serviceman_id), SOURCE_POSITION,
+                 'start_date', _text(''), F('position__name'), 'order_reference', F('end_date')),
+        _project(Contract.objects.filter(serviceman_id=serviceman_id), SOURCE_CONTRACT,
+                 'start_date', _text(''), _text('Контракт'), 'details', F('end_date')),
+        # Для освіти відома лише дата закінчення (рік) - запис ставиться на 1 липня
+        _project(Education.objects.filter(serviceman_id=serviceman_id), SOURCE_EDUCATION,
+                 Concat(Cast('graduation_year', CharField()), _text('-07-01')), 'level',
+                 'institution_name', 'specialty'),
+        _project(IrrecoverableLoss.objects.filter(serviceman_id=serviceman_id), SOURCE_LOSS,
+                 'loss_date', 'loss_type', 'loss_location', 'circumstances'),
+        # Перегляди картки подіями хронології не вважаються
+        _project(AuditLog.objects.filter(content_type=serviceman_type, object_id=serviceman_id).exclude(action='VIEW'),
+                 SOURCE_AUDIT, TruncDate('timestamp'), 'action', 'object_repr', 'notes'),
+    ]
+
+
+def encode_cursor(entry):
+    return f"{entry['date'].isoformat()}~{entry['source']}~{entry['pk']}"
+
+
+def decode_cursor(cursor):
+    """Курсор - "дата~джерело~id" останнього запису попередньої сторінки. Некоректний - ValueError."""
+    try:
+        day, source, pk = cursor.split('~')
+        return date.fromisoformat(day), source, int(pk)
+    except (AttributeError, TypeError) as e:
+        raise ValueError(f'Некоректний курсор: {cursor}') from e
+
+
+def _before(cursor):
+    """Умова "запис іде після курсора" при сортуванні (дата, джерело, id) за спаданням."""
+    day, source, pk = cursor
+    return (
+        Q(t_date__lt=day)
+        | Q(t_date=day, t_source__lt=source)
+        | Q(t_date=day, t_source=source, t_pk__lt=pk)
+    )
+
+
+def get_timeline(serviceman_id, cursor=None, limit=TIMELINE_PAGE_SIZE):
+    """
+    Повертає сторінку хронології: {'entries': [...], 'next_cursor': str або None}.
+    cursor - значення next_cursor попередньої сторінки.
+    """
+    ordering = ['-t_date', '-t_source', '-t_pk']
+    branches = _sources(serviceman_id)
+    if cursor:
+        condition = _before(decode_cursor(cursor))
+        branches = [branch.filter(condition) for branch in branches]
+    if connection.features.supports_slicing_ordering_in_compound:
+        # Кожна вибірка віддає не більше сторінки - об'єднання не матеріалізує всю історію
+        branches = [branch.order_by(*ordering)[:limit + 1] for branch in branches]
+
+    first, *rest = branches
+    rows = list(first.union(*rest, all=True).order_by(*ordering)[:limit + 1])
+
+    entries = []
+    for day, source, pk, kind, title, note, end_date in rows[:limit]:
+        details = None
+        if source == SOURCE_EVENT:
+            # Для подій служби в t_note передаються деталі (JSON)
+            details, note = json.loads(note or '{}'), ''
+        entries.append({
+            'date': day,
+            'source': source,
+            'source_label': SOURCE_LABELS[source],
+            'pk': pk,
+            'kind': kind,
+            'kind_label': KIND_LABELS.get(source, {}).get(kind, kind),
+            'title': title,
+            'note': note,
+            'details': details,
+            'end_date': end_date,
+        })
+
+    next_cursor = encode_cursor(entries[-1]) if len(rows) > limit else None
+    return {'entries': entries, 'next_cursor': next_cursor}
@@ -1,5 +1,10 @@
+from django.conf import settings
 from django.urls import path
-from .views import ServicemanListView, ServicemanDetailView, ElectronicJournalView
+from .views import (
+    ServicemanListView, ServicemanDetailView, ServicemanTimelineView, ServicemanBulkStatusView,
+    ElectronicJournalView, ElectronicJournalExportView, TemporaryArrivalListView, ThumbnailView,
+)
+from .thumbnails import THUMBNAIL_DIR
 
 app_name = 'personnel'
 
@@ -10,6 +15,25 @@ urlpatterns = [
     # Детальна картка військовослужбовця
     path('serviceman/<int:pk>/', ServicemanDetailView.as_view(), name='serviceman-detail'),
 
+    # Повна хронологія військовослужбовця (HTML або ?format=json)
+    path('serviceman/<int:pk>/timeline/', ServicemanTimelineView.as_view(), name='serviceman-timeline'),
+
+    # Масова зміна статусу особового складу підрозділу
+    path('serviceman/bulk-status/', ServicemanBulkStatusView.as_view(), name='serviceman-bulk-status'),
+
     # Новий маршрут для Електронного журналу
     path('journal/', ElectronicJournalView.as_view(), name='electronic-journal'),
-]
\ No newline at end of file
+
+    # Вивантаження Електронного журналу у xlsx
+    path('journal/export/', ElectronicJournalExportView.as_view(), name='electronic-journal-export'),
+
+    # Тимчасово прибулі на дату та їх чисельність за період
+    path('arrivals/', TemporaryArrivalListView.as_view(), name='temporary-arrivals'),
+
+    # Мініатюри фото, яких ще немає у сховищі (наявні віддає nginx за тим самим шляхом)
+    path(
+        f'{settings.MEDIA_URL.lstrip("/")}{ThumbnailView.photo_dir}/{THUMBNAIL_DIR}/<str:filename>',
+        ThumbnailView.as_view(),
+        name='photo-thumbnail'
+    ),
+]
@@ -1,5 +1,27 @@
-from django.views.generic import ListView, DetailView, TemplateView
+import tempfile
+from datetime import date
+
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.template.loader import render_to_string
+from django.urls import reverse_lazy
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.generic import ListView, DetailView, TemplateView, View, FormView
+from apps.auditing.models import AuditLog, DataExportLog
+from apps.staffing.models import Unit
+from .caching import get_card_cache_key, CARD_CACHE_TIMEOUT
+from .forms import UnitBulkStatusChangeForm
+from .journal import export_journal
 from .models import Serviceman, TemporaryArrival, IrrecoverableLoss
+from .services import change_status_many
+from .thumbnails import THUMBNAIL_FORMATS, generate_thumbnails, parse_thumbnail_name, thumbnail_name
+from .timeline import get_timeline
 
 
 class ServicemanListView(ListView):
@@ -14,13 +36,105 @@ class ServicemanDetailView(DetailView):
     template_name = 'personnel/serviceman_detail.html'
     context_object_name = 'serviceman'
 
+    # Пов'язані записи, що відображаються на картці
+    card_prefetch = ('education_history', 'family_members')
+
+    def get_queryset(self):
+        return Serviceman.objects.select_related('rank', 'position__unit')
+
+    def get_context_data(self, **kwargs):
+        """
+        Додаємо відрендерену картку до контексту.
+        Картка береться з кешу за ключем поточної версії військовослужбовця;
+        пов'язані записи завантажуються лише при промаху кешу.
+        """
+        context = super().get_context_data(**kwargs)
+        serviceman = self.object
+
+        cache_key = get_card_cache_key(serviceman.pk)
+        card = cache.get(cache_key)
+        if card is None:
+            prefetch_related_objects([serviceman], *self.card_prefetch)
+            card = render_to_string('personnel/_serviceman_card.html', {
+                'serviceman': serviceman,
+                'education_history': serviceman.education_history.all(),
+                'family_members': list(serviceman.family_members.all()),
+                'timeline': get_timeline(serviceman.pk),
+            })
+            cache.set(cache_key, card, CARD_CACHE_TIMEOUT)
+
+        context['card'] = card
+        return context
+
+
+class ServicemanTimelineView(LoginRequiredMixin, View):
+    """
+    Повна хронологія військовослужбовця посторінково (курсор у параметрі ?cursor=).
+    З параметром ?format=json повертає сторінку у JSON.
+    """
+    template_name = 'personnel/serviceman_timeline.html'
+
+    def get(self, request, pk):
+        serviceman = get_object_or_404(Serviceman, pk=pk)
+        try:
+            page = get_timeline(serviceman.pk, cursor=request.GET.get('cursor'))
+        except ValueError:
+            raise Http404('Некоректний курсор хронології.')
+
+        if request.GET.get('format') == 'json':
+            return JsonResponse(page, json_dumps_params={'ensure_ascii': False})
+
+        return render(request, self.template_name, {'serviceman': serviceman, 'timeline': page})
+
+
+class ThumbnailView(LoginRequiredMixin, View):
+    """
+    Мініатюра фото, якої ще немає у сховищі: створюється при першому запиті.
+    nginx віддає наявні мініатюри сам і передає сюди лише запити до відсутніх файлів.
+    """
+    # Каталог фото у сховищі (upload_to поля Serviceman.photo)
+    photo_dir = Serviceman._meta.get_field('photo').upload_to.rstrip('/')
+
+    def get(self, request, filename):
+        try:
+            photo_name, size, extension = parse_thumbnail_name(self.photo_dir, filename)
+            generate_thumbnails(photo_name)
+        except (OSError, ValueError):
+            raise Http404('Мініатюру не знайдено.')
+
+        response = FileResponse(
+            default_storage.open(thumbnail_name(photo_name, size, extension)),
+            content_type=THUMBNAIL_FORMATS[extension][2]
+        )
+        # Ім'я мініатюри змінюється разом з фото, тож її можна кешувати безстроково
+        patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+        return response
+
+
+class ServicemanBulkStatusView(LoginRequiredMixin, PermissionRequiredMixin, FormView):
+    """
+    Масова зміна статусу особового складу підрозділу (відпустка, повернення з ротації тощо).
+    """
+    form_class = UnitBulkStatusChangeForm
+    template_name = 'personnel/bulk_status_form.html'
+    permission_required = 'personnel.change_serviceman'
+    success_url = reverse_lazy('personnel:serviceman-list')
+
+    def form_valid(self, form):
+        changed = change_status_many(
+            form.get_servicemen(),
+            new_status=form.cleaned_data['status'],
+            event_date=form.cleaned_data['event_date'],
+            order_reference=form.cleaned_data['order_reference'],
+            user=self.request.user,
+            request=self.request
+        )
+        messages.success(self.request, f"Статус змінено для {changed} військовослужбовців.")
+        return super().form_valid(form)
+
     def get_context_data(self, **kwargs):
-        """Додаємо пов'язані дані до контексту."""
         context = super().get_context_data(**kwargs)
-        serviceman = self.get_object()
-        context['education_history'] = serviceman.education_history.all()
-        context['family_members'] = serviceman.family_members.all()
-        context['service_history'] = serviceman.service_history.all()
+        context['page_title'] = "Масова зміна статусу"
         return context
 
 
@@ -53,7 +167,8 @@ class ElectronicJournalView(TemplateView):
             ]
         ).select_related('rank')
 
-        context['temporary_arrivals'] = TemporaryArrival.objects.all()
+        # Лише ті, хто ще перебуває в частині; архів вибулих - на сторінці тимчасово прибулих
+        context['temporary_arrivals'] = TemporaryArrival.objects.present()
 
         # НОВИЙ ЗАПИТ: Отримуємо дані про безповоротні втрати
         context['irrecoverable_losses'] = IrrecoverableLoss.objects.select_related(
@@ -65,11 +180,73 @@ class ElectronicJournalView(TemplateView):
         return context
 
 
-class TemporaryArrivalListView(ListView):
+class ElectronicJournalExportView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    Вивантаження Електронного журналу у форматі книги xlsx.
+    Параметр unit_id обмежує журнал підрозділом та всіма підпорядкованими йому.
+    Журнал містить персональні дані всього особового складу, тож потрібен той самий дозвіл,
+    що й для експорту звітів.
+    """
+    permission_required = 'reporting.export_report'
+
+    def get(self, request):
+        unit = None
+        unit_id = request.GET.get('unit_id')
+        if unit_id:
+            if not unit_id.isdigit():
+                raise Http404
+            unit = get_object_or_404(Unit, pk=unit_id)
+
+        # Книга пишеться на диск, щоб не тримати великий журнал у пам'яті
+        output = tempfile.TemporaryFile(suffix='.xlsx')
+        counts = export_journal(output, unit=unit)
+        output.seek(0)
+
+        DataExportLog.objects.create(
+            user=request.user,
+            model_name='electronic_journal',
+            format='EXCEL',
+            records_count=sum(counts.values()),
+            filters_applied={'unit_id': unit.pk if unit else None},
+            ip_address=AuditLog.get_client_ip(request)
+        )
+
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f'journal_{timezone.now().strftime("%Y%m%d")}.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+
+
+class TemporaryArrivalListView(LoginRequiredMixin, ListView):
     """
     Представлення для окремої сторінки "Тимчасово прибулі".
+    Показує присутніх на дату ?date= (за замовчуванням - сьогодні) та чисельність
+    за підрозділами, звідки прибули, за період ?start= - ?end= (за замовчуванням - ця ж дата).
     """
     model = TemporaryArrival
     template_name = 'personnel/temporary_arrival_list.html'
     context_object_name = 'arrivals'
     paginate_by = 20
+
+    def _get_date(self, name, default):
+        try:
+            return date.fromisoformat(self.request.GET.get(name, ''))
+        except ValueError:
+            return default
+
+    def get_queryset(self):
+        self.day = self._get_date('date', timezone.localdate())
+        return TemporaryArrival.objects.present_on(self.day).order_by('-arrival_date', 'pk')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        start_date = self._get_date('start', self.day)
+        end_date = max(self._get_date('end', self.day), start_date)
+
+        context['day'] = self.day
+        context['start_date'] = start_date
+        context['end_date'] = end_date
+        context['headcount'] = TemporaryArrival.objects.headcount_by_origin(start_date, end_date)
+        return context
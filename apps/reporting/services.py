@@ -6,8 +6,10 @@
 from django.db.models import Count, Q, F, Sum, Avg, ExpressionWrapper, fields
 from django.utils import timezone
 from datetime import datetime, timedelta
-from apps.personnel.models import Serviceman, Contract, ServiceHistoryEvent, Rank
+from apps.personnel.loss_stats import month_start, add_months
+from apps.personnel.models import Serviceman, ServiceHistoryEvent, Rank, IrrecoverableLoss, LossStatistic
 from apps.staffing.models import Unit, Position, MilitarySpecialty
+from apps.staffing.unit_tree import get_unit_tree
 import pandas as pd
 from typing import Dict, List, Any
 
@@ -23,8 +25,7 @@ class StaffingReportService:
         unit = Unit.objects.get(pk=unit_id)
 
         # Отримуємо всі позиції в підрозділі та його підпорядкованих
-        all_units = unit.get_descendants(include_self=True)
-        positions = Position.objects.filter(unit__in=all_units)
+        positions = Position.objects.filter(unit__in=get_unit_tree().descendant_ids(unit.pk))
 
         # Рахуємо статистику
         total_positions = positions.count()
@@ -64,19 +65,25 @@ class StaffingReportService:
         """
         Зведений звіт по всіх батальйонах бригади
         """
-        battalions = Unit.objects.filter(name__contains='батальйон')
+        tree = get_unit_tree()
+        battalions = [pk for pk, name in zip(tree.ids, tree.names) if 'батальйон' in name]
+
+        # Кількість посад по кожному підрозділу - одним запитом, піддерева батальйонів - з дерева в пам'яті
+        counts = {
+            unit_id: (total, filled)
+            for unit_id, total, filled in Position.objects.order_by().values('unit').annotate(
+                total=Count('id'), filled=Count('serviceman'),
+            ).values_list('unit', 'total', 'filled')
+        }
         summary = []
 
         for battalion in battalions:
-            positions = Position.objects.filter(
-                Q(unit=battalion) | Q(unit__in=battalion.get_descendants())
-            )
-
-            total = positions.count()
-            filled = positions.filter(serviceman__isnull=False).count()
+            unit_counts = [counts.get(unit_id, (0, 0)) for unit_id in tree.descendant_ids(battalion)]
+            total = sum(count[0] for count in unit_counts)
+            filled = sum(count[1] for count in unit_counts)
 
             summary.append({
-                'battalion': battalion.name,
+                'battalion': tree.name(battalion),
                 'total_positions': total,
                 'filled_positions': filled,
                 'vacant_positions': total - filled,
@@ -136,9 +143,9 @@ class PersonnelReportService:
                 age_groups['46+'] += 1
 
         # По типу служби (контракт/мобілізація)
-        contracts_ending_soon = Contract.objects.filter(
-            end_date__lte=today + timedelta(days=90),
-            end_date__gte=today
+        contracts_ending_soon = Serviceman.objects.filter(
+            contract_end_date__lte=today + timedelta(days=90),
+            contract_end_date__gte=today
         ).count()
 
         return {
@@ -172,7 +179,12 @@ class PersonnelReportService:
 
 
 class ContractReportService:
-    """Сервіс для звітів по контрактах"""
+    """
+    Сервіс для звітів по контрактах.
+
+    Звіти будуються за полями поточного контракту військовослужбовця (contract_end_date),
+    тож кожна особа враховується один раз, а вже продовжені контракти не вважаються протермінованими.
+    """
 
     @staticmethod
     def get_contracts_status() -> Dict[str, Any]:
@@ -180,21 +192,22 @@ class ContractReportService:
         Звіт по статусу контрактів
         """
         today = timezone.now().date()
+        servicemen = Serviceman.objects.select_related('rank', 'position')
 
         # Контракти, що закінчуються
-        ending_30_days = Contract.objects.filter(
-            end_date__gte=today,
-            end_date__lte=today + timedelta(days=30)
-        ).select_related('serviceman', 'serviceman__rank', 'serviceman__position')
+        ending_30_days = servicemen.filter(
+            contract_end_date__gte=today,
+            contract_end_date__lte=today + timedelta(days=30)
+        ).order_by('contract_end_date')
 
-        ending_90_days = Contract.objects.filter(
-            end_date__gte=today + timedelta(days=31),
-            end_date__lte=today + timedelta(days=90)
-        ).select_related('serviceman', 'serviceman__rank', 'serviceman__position')
+        ending_90_days = servicemen.filter(
+            contract_end_date__gte=today + timedelta(days=31),
+            contract_end_date__lte=today + timedelta(days=90)
+        ).order_by('contract_end_date')
 
-        expired = Contract.objects.filter(
-            end_date__lt=today
-        ).select_related('serviceman', 'serviceman__rank', 'serviceman__position')
+        expired = servicemen.filter(
+            contract_end_date__lt=today
+        ).order_by('-contract_end_date')
 
         return {
             'date': today,
@@ -215,26 +228,117 @@ class ContractReportService:
     @staticmethod
     def get_contract_renewal_forecast() -> List[Dict[str, Any]]:
         """
-        Прогноз по закінченню контрактів на наступні 12 місяців
+        Прогноз по закінченню контрактів на наступні 12 місяців (одним запитом)
         """
         today = timezone.now().date()
-        forecast = []
+        periods = [
+            (today + timedelta(days=month * 30), today + timedelta(days=(month + 1) * 30))
+            for month in range(12)
+        ]
+
+        counts = Serviceman.objects.filter(
+            contract_end_date__gte=periods[0][0],
+            contract_end_date__lt=periods[-1][1]
+        ).aggregate(**{
+            f'month_{month}': Count('id', filter=Q(contract_end_date__gte=start_date, contract_end_date__lt=end_date))
+            for month, (start_date, end_date) in enumerate(periods)
+        })
+
+        return [
+            {
+                'month': start_date.strftime('%B %Y'),
+                'count': counts[f'month_{month}'],
+            }
+            for month, (start_date, _) in enumerate(periods)
+        ]
 
-        for month in range(12):
-            start_date = today + timedelta(days=month * 30)
-            end_date = today + timedelta(days=(month + 1) * 30)
 
-            count = Contract.objects.filter(
-                end_date__gte=start_date,
-                end_date__lt=end_date
-            ).count()
+class LossReportService:
+    """
+    Сервіс для статистики безповоротних втрат.
 
-            forecast.append({
-                'month': start_date.strftime('%B %Y'),
-                'count': count,
+    Показники обчислюються лише з таблиці LossStatistic (місяць, вид втрати, підрозділ),
+    яку підтримують сигнали IrrecoverableLoss, без читання всієї історії втрат.
+    """
+
+    # Кількість місяців у ковзній сумі
+    ROLLING_MONTHS = 3
+
+    @staticmethod
+    def get_loss_statistics(unit_id: int = None, months: int = 12) -> Dict[str, Any]:
+        """
+        Втрати за останні months місяців по видах, місяцях (з ковзною сумою) та підрозділах.
+        Якщо задано unit_id - лише піддерево підрозділу, розподіл - за його безпосередніми підпорядкованими.
+        """
+        end_month = month_start(timezone.now().date())
+        start_month = add_months(end_month, 1 - months)
+        # Ковзна сума перших місяців періоду враховує і попередні місяці
+        first_month = add_months(start_month, 1 - LossReportService.ROLLING_MONTHS)
+
+        stats = LossStatistic.objects.filter(month__gte=first_month, month__lte=end_month)
+        unit = None
+        if unit_id:
+            unit = Unit.objects.get(pk=unit_id)
+            stats = stats.filter(unit__tree_id=unit.tree_id, unit__lft__gte=unit.lft, unit__rght__lte=unit.rght)
+            groups = list(unit.get_children())
+        else:
+            groups = list(Unit.objects.root_nodes())
+
+        loss_types = list(IrrecoverableLoss.LossType.choices)
+        type_index = {value: index for index, (value, _) in enumerate(loss_types)}
+
+        def empty():
+            return [0] * len(loss_types)
+
+        by_month = {add_months(first_month, offset): empty() for offset in range(months + LossReportService.ROLLING_MONTHS - 1)}
+        by_group = {group.pk: empty() for group in groups}
+        outside_groups = empty()
+
+        for month, loss_type, tree_id, lft, count in stats.values_list('month', 'loss_type', 'unit__tree_id', 'unit__lft', 'count'):
+            index = type_index[loss_type]
+            by_month[month][index] += count
+            if month < start_month:
+                continue
+            group = next((group for group in groups if group.tree_id == tree_id and group.lft <= lft <= group.rght), None)
+            (by_group[group.pk] if group else outside_groups)[index] += count
+
+        month_rows = []
+        totals = [sum(counts) for counts in by_month.values()]
+        for offset, (month, counts) in enumerate(by_month.items()):
+            if month < start_month:
+                continue
+            month_rows.append({
+                'month': month,
+                'counts': counts,
+                'total': totals[offset],
+                'rolling_total': sum(totals[offset + 1 - LossReportService.ROLLING_MONTHS:offset + 1]),
+            })
+
+        unit_rows = [
+            {'unit': group, 'name': group.name, 'counts': by_group[group.pk], 'total': sum(by_group[group.pk])}
+            for group in groups
+        ]
+        if any(outside_groups):
+            unit_rows.append({
+                'unit': None,
+                'name': f'{unit.name} (без підпорядкованих)' if unit else 'Підрозділ не визначено',
+                'counts': outside_groups,
+                'total': sum(outside_groups),
             })
+        unit_rows.sort(key=lambda row: -row['total'])
 
-        return forecast
+        by_type = [sum(row['counts'][index] for row in month_rows) for index in range(len(loss_types))]
+        return {
+            'unit': unit,
+            'start_month': start_month,
+            'end_month': end_month,
+            'loss_types': [label for _, label in loss_types],
+            'by_type': [{'type': value, 'label': label, 'count': by_type[index]}
+                        for index, (value, label) in enumerate(loss_types)],
+            'by_month': month_rows,
+            'by_unit': unit_rows,
+            'total': sum(by_type),
+        }
 
 
 class ExportService:
@@ -0,0 +1,15 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+
+class LossStatisticsViewTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser(username='admin', password='password'))
+
+    def test_invalid_unit_id_returns_404(self):
+        url = reverse('reporting:loss-statistics')
+        self.assertEqual(self.client.get(url, {'unit_id': 'abc'}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'unit_id': '999999'}).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 200)
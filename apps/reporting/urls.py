@@ -10,6 +10,7 @@ from .views import (
     PersonnelStatisticsView,
     ContractReportView,
     ServiceHistoryReportView,
+    LossStatisticsView,
     ExportReportView,
     ComparisonReportView,
 )
@@ -25,6 +26,7 @@ urlpatterns = [
     path('personnel/', PersonnelStatisticsView.as_view(), name='personnel-statistics'),
     path('contracts/', ContractReportView.as_view(), name='contract-report'),
     path('service-history/', ServiceHistoryReportView.as_view(), name='service-history-report'),
+    path('losses/', LossStatisticsView.as_view(), name='loss-statistics'),
     path('comparison/', ComparisonReportView.as_view(), name='comparison-report'),
 
     # Експорт
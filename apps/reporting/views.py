@@ -5,7 +5,7 @@ Views для звітності та аналітики
 
 from django.views.generic import TemplateView, View
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render, get_object_or_404
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -13,6 +13,7 @@ from .services import (
     StaffingReportService,
     PersonnelReportService,
     ContractReportService,
+    LossReportService,
     ExportService
 )
 from apps.staffing.models import Unit
@@ -131,6 +132,31 @@ class ServiceHistoryReportView(LoginRequiredMixin, PermissionRequiredMixin, Temp
         return context
 
 
+class LossStatisticsView(LoginRequiredMixin, PermissionRequiredMixin, TemplateView):
+    """Статистика безповоротних втрат (з попередньо агрегованої таблиці)"""
+    template_name = 'reporting/loss_statistics.html'
+    permission_required = 'reporting.view_report'
+    period_choices = (6, 12, 24, 36)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        unit_id = self.request.GET.get('unit_id', '')
+        months = self.request.GET.get('months', '12')
+        months = int(months) if months.isdigit() and int(months) in self.period_choices else 12
+
+        if unit_id and not unit_id.isdigit():
+            raise Http404('Некоректний підрозділ.')
+        unit_id = get_object_or_404(Unit, pk=unit_id).pk if unit_id else None
+
+        context['report'] = LossReportService.get_loss_statistics(unit_id, months)
+        context['months'] = months
+        context['period_choices'] = self.period_choices
+        context['units'] = Unit.objects.filter(level__lte=2)
+
+        return context
+
+
 class ExportReportView(LoginRequiredMixin, PermissionRequiredMixin, View):
     """View для експорту звітів"""
     permission_required = 'reporting.export_report'
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from mptt.admin import DraggableMPTTAdmin
-from .models import Unit, MilitarySpecialty, Position
+from .models import Unit, MilitarySpecialty, Position, StaffingTableVersion
+from .versions import capture_snapshot
 
 @admin.register(Unit)
 class UnitAdmin(DraggableMPTTAdmin):
@@ -18,4 +19,20 @@ class PositionAdmin(admin.ModelAdmin):
     list_display = ('name', 'unit', 'position_index', 'category', 'specialty')
     list_filter = ('unit', 'specialty', 'category')
     search_fields = ('name', 'position_index', 'unit__name')
-    autocomplete_fields = ('unit', 'specialty')
\ No newline at end of file
+    autocomplete_fields = ('unit', 'specialty')
+
+@admin.register(StaffingTableVersion)
+class StaffingTableVersionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'order_reference', 'position_count', 'created_at')
+    search_fields = ('name', 'order_reference')
+    readonly_fields = ('position_count', 'created_at')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('snapshot')
+
+    def save_model(self, request, obj, form, change):
+        # Нова версія - знімок штату на момент створення; збережений знімок не змінюється
+        if not change:
+            obj.snapshot = capture_snapshot()
+            obj.position_count = len(obj.snapshot)
+        super().save_model(request, obj, form, change)
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class StaffingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.staffing'
-    verbose_name = 'Штатно-посадовий облік'
\ No newline at end of file
+    verbose_name = 'Штатно-посадовий облік'
+
+    def ready(self):
+        from . import signals  # noqa: F401
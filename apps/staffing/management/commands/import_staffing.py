@@ -0,0 +1,97 @@
+# apps/staffing/management/commands/import_staffing.py
+"""
+Management command для імпорту штату (підрозділи, ВОС, посади) з xlsx або CSV файлу.
+Використання: python manage.py import_staffing /шлях/до/штату.xlsx [--update] [--dry-run] [--save-version "Штат 2026"]
+
+Колонки файлу: Підрозділ (повний шлях через "/"), Індекс посади, Найменування посади,
+Штатно-посадова категорія, Код ВОС, Найменування ВОС (для нових ВОС), Тарифний розряд.
+Імпорт виконується однією транзакцією пакетними запитами (див. apps/staffing/staffing_import.py).
+З --save-version після імпорту зберігається версія штату (apps/staffing/versions.py).
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.personnel.importing import ErrorReport
+from apps.staffing.staffing_import import StaffingImporter, read_staffing_rows
+from apps.staffing.versions import create_staffing_version
+
+
+class Command(BaseCommand):
+    help = 'Імпортує штат (підрозділи, ВОС, посади) з xlsx або CSV файлу'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Шлях до xlsx або CSV файлу штату')
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Оновити існуючі посади, знайдені за індексом посади.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Тестовий запуск без збереження даних до БД.'
+        )
+        parser.add_argument(
+            '--save-version',
+            type=str,
+            dest='version_name',
+            help='Зберегти штат після імпорту як версію з цією назвою.'
+        )
+        parser.add_argument(
+            '--order-reference',
+            type=str,
+            default='',
+            help='Наказ про введення штату в дію (для --save-version).'
+        )
+        parser.add_argument(
+            '--errors-file',
+            type=str,
+            help='Шлях до CSV звіту про відхилені рядки (за замовчуванням <файл>.errors.csv).'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        self.stdout.write(self.style.SUCCESS(f'Починаю імпорт штату з файлу: {path}'))
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('РЕЖИМ ТЕСТОВОГО ЗАПУСКУ: Зміни не буде збережено.'))
+
+        started = time.monotonic()
+        importer = StaffingImporter(update_existing=options['update'])
+        try:
+            rows = list(read_staffing_rows(path))
+            with transaction.atomic():
+                errors = importer.run(rows)
+                version = None
+                if options['version_name']:
+                    version = create_staffing_version(options['version_name'], options['order_reference'])
+                transaction.set_rollback(options['dry_run'])
+        except FileNotFoundError:
+            raise CommandError(f'Файл не знайдено: {path}')
+        except Exception as e:
+            raise CommandError(f'Загальна помилка обробки файлу: {e}')
+
+        # Заголовок файлу штату - у першому рядку, тож звіт пишеться без службових рядків
+        with ErrorReport(options['errors_file'] or f'{path}.errors.csv', title_rows=0) as report:
+            report.write(errors, rows)
+        for line, message in sorted(errors):
+            self.stdout.write(self.style.ERROR(f'Рядок {line}: {message}'))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Відкат транзакції. Жодних змін не було внесено.'))
+
+        counts = importer.counts
+        self.stdout.write(self.style.SUCCESS('----- РЕЗУЛЬТАТИ ІМПОРТУ -----'))
+        self.stdout.write(f'Оброблено рядків: {len(rows)}')
+        self.stdout.write(f'Створено підрозділів: {counts["units"]}')
+        self.stdout.write(f'Створено ВОС: {counts["specialties"]}')
+        self.stdout.write(f'Створено посад: {counts["created"]}')
+        self.stdout.write(f'Оновлено посад: {counts["updated"]}')
+        self.stdout.write(f'Без змін: {counts["unchanged"]}')
+        self.stdout.write(f'Пропущено (посада вже існує): {counts["skipped"]}')
+        self.stdout.write(self.style.ERROR(f'Помилок: {report.count}'))
+        if report.count:
+            self.stdout.write(f'Звіт про відхилені рядки: {report.path}')
+        if version is not None:
+            self.stdout.write(f'Збережено версію штату: {version.name} ({version.position_count} посад)')
+        self.stdout.write(f'Час імпорту: {time.monotonic() - started:.1f} с')
@@ -0,0 +1,223 @@
+# apps/staffing/matching.py
+"""
+Підбір кандидатів на вакантні посади.
+
+Для всіх вакантних посад піддерева підрозділу кандидати оцінюються за один прогін:
+- ВОС: чи обіймав кандидат посади з тією ж ВОС (з історії посад) і як довго;
+- звання: штатно-посадова категорія посади - це звання, тож оцінюється відстань
+  між званням кандидата та категорією (на ступінь нижче - призначення з підвищенням);
+- освіта (найвищий рівень) та загальний стаж на посадах.
+
+Дані про кандидатів завантажуються кількома запитами, після чого в пам'яті будуються
+індекси: списки кандидатів кожного звання та кожної пари (ВОС, звання), відсортовані за
+оцінкою. Для вакансії оцінюються лише перші кандидати зі списків її ВОС та допустимих
+звань, тож прогін не перебирає всіх кандидатів для кожної посади.
+"""
+import heapq
+from collections import defaultdict
+from datetime import date
+
+from apps.personnel.models import Education, PositionHistory, Rank, Serviceman
+
+from .models import Position
+
+# Статуси, з якими військовослужбовця можна призначити на посаду
+CANDIDATE_STATUSES = (Serviceman.Status.ON_DUTY, Serviceman.Status.ON_LEAVE)
+
+SPECIALTY_POINTS = 40
+SPECIALTY_EXPERIENCE_POINTS = 10  # максимум, по балу за рік на посадах з цією ВОС
+# Відстань у ступенях звання (звання кандидата мінус категорія посади): бали
+RANK_POINTS = {0: 30, -1: 20, 1: 10}
+EDUCATION_POINTS = {
+    Education.EducationLevel.SECONDARY: 0,
+    Education.EducationLevel.VOCATIONAL: 2,
+    Education.EducationLevel.JUNIOR_COLLEGE: 4,
+    Education.EducationLevel.BACHELOR: 7,
+    Education.EducationLevel.MASTER: 9,
+    Education.EducationLevel.PHD: 10,
+}
+SERVICE_EXPERIENCE_POINTS = 10  # максимум, по балу за рік на будь-яких посадах
+# Штраф для військовослужбовців, які вже обіймають посаду (переведення замість призначення)
+REASSIGNMENT_PENALTY = 15
+
+
+def _months(start, end, today):
+    return max(((end or today) - start).days, 0) / 30.4
+
+
+class CandidatePool:
+    """
+    Кандидати з ознаками для оцінювання та індексами для швидкого відбору.
+    При include_assigned до кандидатів належать і ті, хто вже обіймає посаду.
+    """
+
+    def __init__(self, include_assigned=False, today=None):
+        today = today or date.today()
+        self.rank_steps = {
+            rank_id: step for step, rank_id in enumerate(Rank.objects.order_by('order').values_list('pk', flat=True))
+        }
+        self.rank_steps_by_name = {
+            name: self.rank_steps[pk] for pk, name in Rank.objects.values_list('pk', 'name')
+        }
+
+        candidates = Serviceman.objects.filter(status__in=CANDIDATE_STATUSES)
+        if not include_assigned:
+            candidates = candidates.filter(position__isnull=True)
+        self.rank = {}
+        self.assigned = set()
+        for pk, rank_id, position_id in candidates.order_by().values_list('pk', 'rank_id', 'position_id'):
+            self.rank[pk] = self.rank_steps[rank_id]
+            if position_id is not None:
+                self.assigned.add(pk)
+
+        candidate_ids = candidates.order_by().values('pk')
+        self.education = {}
+        for serviceman_id, level in Education.objects.filter(
+                serviceman_id__in=candidate_ids).values_list('serviceman_id', 'level'):
+            points = EDUCATION_POINTS.get(level, 0)
+            if points >= self.education.get(serviceman_id, (0, None))[0]:
+                self.education[serviceman_id] = (points, Education.EducationLevel(level).label)
+
+        # Стаж загалом і за кожною ВОС (у місяцях) з історії посад
+        self.service_months = defaultdict(float)
+        self.specialty_months = defaultdict(float)
+        for serviceman_id, specialty_id, start, end in PositionHistory.objects.filter(
+                serviceman_id__in=candidate_ids).values_list(
+                'serviceman_id', 'position__specialty_id', 'start_date', 'end_date'):
+            months = _months(start, end, today)
+            self.service_months[serviceman_id] += months
+            self.specialty_months[serviceman_id, specialty_id] += months
+
+        # Оцінка, що не залежить від посади
+        self.base = {
+            pk: self.education.get(pk, (0, None))[0]
+            + min(self.service_months.get(pk, 0) / 12, SERVICE_EXPERIENCE_POINTS)
+            - (REASSIGNMENT_PENALTY if pk in self.assigned else 0)
+            for pk in self.rank
+        }
+
+        # Індекси: кандидати кожного звання та кожної пари (ВОС, звання), відсортовані так,
+        # що в межах списку порядок збігається з порядком оцінки для будь-якої посади
+        self.by_rank = defaultdict(list)
+        for pk, step in self.rank.items():
+            self.by_rank[step].append(pk)
+        for pks in self.by_rank.values():
+            pks.sort(key=lambda pk: (self.base[pk], -pk), reverse=True)
+
+        self.by_specialty_rank = defaultdict(list)
+        for serviceman_id, specialty_id in self.specialty_months:
+            self.by_specialty_rank[specialty_id, self.rank[serviceman_id]].append(serviceman_id)
+        for (specialty_id, _), pks in self.by_specialty_rank.items():
+            pks.sort(key=lambda pk: (self._specialty_score(pk, specialty_id), -pk), reverse=True)
+
+    def _specialty_score(self, pk, specialty_id):
+        months = self.specialty_months[pk, specialty_id]
+        return self.base[pk] + SPECIALTY_POINTS + min(months / 12, SPECIALTY_EXPERIENCE_POINTS)
+
+    def __len__(self):
+        return len(self.rank)
+
+    def score(self, pk, position, position_step):
+        """(оцінка, [пояснення]) кандидата pk для посади або None, якщо кандидат не підходить за званням."""
+        reasons = []
+        if (pk, position.specialty_id) in self.specialty_months:
+            points = self._specialty_score(pk, position.specialty_id)
+            years = self.specialty_months[pk, position.specialty_id] / 12
+            reasons.append(f'ВОС {position.specialty.code}: {years:.1f} р.')
+        else:
+            points = self.base[pk]
+
+        if position_step is not None:
+            distance = self.rank[pk] - position_step
+            if distance not in RANK_POINTS:
+                return None
+            points += RANK_POINTS[distance]
+            if distance == 0:
+                reasons.append('звання відповідає категорії')
+            elif distance < 0:
+                reasons.append('звання на ступінь нижче (з підвищенням)')
+            else:
+                reasons.append('звання на ступінь вище')
+
+        if pk in self.education:
+            reasons.append(f'освіта: {self.education[pk][1]}')
+        if self.service_months.get(pk):
+            reasons.append(f'стаж на посадах: {self.service_months[pk] / 12:.1f} р.')
+        if pk in self.assigned:
+            reasons.append('обіймає іншу посаду')
+        return points, reasons
+
+    def rank_candidates(self, position, limit):
+        """Найкращі кандидати на посаду: [(оцінка, id, [пояснення])] за спаданням оцінки."""
+        position_step = self.rank_steps_by_name.get(position.category)
+        steps = self.by_rank if position_step is None else [position_step + d for d in RANK_POINTS]
+        scored = []
+        for step in steps:
+            # У межах одного звання бали за звання однакові, тож з кожного списку
+            # досить перших limit кандидатів: спершу з ВОС посади, потім решта
+            for pk in self.by_specialty_rank.get((position.specialty_id, step), ())[:limit]:
+                points, reasons = self.score(pk, position, position_step)
+                scored.append((points, pk, reasons))
+            taken = 0
+            for pk in self.by_rank.get(step, ()):
+                if taken >= limit:
+                    break
+                if (pk, position.specialty_id) in self.specialty_months:
+                    continue
+                points, reasons = self.score(pk, position, position_step)
+                scored.append((points, pk, reasons))
+                taken += 1
+        return heapq.nlargest(limit, scored, key=lambda item: (item[0], -item[1]))
+
+
+def subtree_vacancies(unit):
+    """Вакантні посади підрозділу та всіх підпорядкованих у порядку дерева."""
+    return (
+        Position.objects.filter(
+            unit__tree_id=unit.tree_id, unit__lft__gte=unit.lft, unit__lft__lte=unit.rght,
+            serviceman__isnull=True,
+        )
+        .select_related('unit', 'specialty')
+        .order_by('unit__lft', 'position_index')
+    )
+
+
+def match_vacancies(unit, limit=5, include_assigned=False):
+    """
+    Ранжовані списки кандидатів для всіх вакансій піддерева підрозділу:
+    [{'position', 'candidates': [{'serviceman', 'score', 'reasons'}], 'proposed'}].
+
+    proposed - пропозиція заповнення без повторів: кожен кандидат пропонується
+    не більше ніж на одну посаду, найвищі оцінки розподіляються першими.
+    """
+    vacancies = list(subtree_vacancies(unit))
+    if not vacancies:
+        return []
+    pool = CandidatePool(include_assigned=include_assigned)
+    ranked = [pool.rank_candidates(position, limit) for position in vacancies]
+
+    proposed = {}
+    taken = set()
+    pairs = sorted(
+        ((points, i, pk) for i, candidates in enumerate(ranked) for points, pk, _ in candidates),
+        key=lambda item: (-item[0], item[1], item[2]),
+    )
+    for points, i, pk in pairs:
+        if i not in proposed and pk not in taken:
+            proposed[i] = pk
+            taken.add(pk)
+
+    servicemen = Serviceman.objects.select_related('rank', 'position').in_bulk(
+        {pk for candidates in ranked for _, pk, _ in candidates}
+    )
+    return [
+        {
+            'position': position,
+            'candidates': [
+                {'serviceman': servicemen[pk], 'score': round(points, 1), 'reasons': reasons}
+                for points, pk, reasons in candidates
+            ],
+            'proposed': servicemen.get(proposed.get(i)),
+        }
+        for i, (position, candidates) in enumerate(zip(vacancies, ranked))
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staffing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaffingTableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Назва версії')),
+                ('order_reference', models.CharField(blank=True, max_length=255, verbose_name='Наказ про введення штату в дію')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Створено')),
+                ('position_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='Кількість посад')),
+                ('snapshot', models.JSONField(default=dict, editable=False, verbose_name='Посади')),
+            ],
+            options={
+                'verbose_name': 'Версія штату',
+                'verbose_name_plural': 'Версії штату',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
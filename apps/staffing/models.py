@@ -51,4 +51,23 @@ class Position(models.Model):
         ordering = ['name']
 
     def __str__(self):
-        return f"{self.name} ({self.unit.name})"
\ No newline at end of file
+        return f"{self.name} ({self.unit.name})"
+
+class StaffingTableVersion(models.Model):
+    """
+    Версія штату - знімок усіх посад на момент введення штату в дію.
+    Посади зберігаються компактно: {індекс посади: [значення полів SNAPSHOT_FIELDS]} (див. versions.py).
+    """
+    name = models.CharField("Назва версії", max_length=255)
+    order_reference = models.CharField("Наказ про введення штату в дію", max_length=255, blank=True)
+    created_at = models.DateTimeField("Створено", auto_now_add=True)
+    position_count = models.PositiveIntegerField("Кількість посад", default=0, editable=False)
+    snapshot = models.JSONField("Посади", default=dict, editable=False)
+
+    class Meta:
+        verbose_name = "Версія штату"
+        verbose_name_plural = "Версії штату"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.created_at:%d.%m.%Y})" if self.created_at else self.name
@@ -0,0 +1,101 @@
+# apps/staffing/services.py
+"""
+Зведені показники штату за піддеревом підрозділу.
+
+Піддерево підрозділу в MPTT - це підрозділи того ж дерева з lft у межах [lft, rght],
+тож кількість посад усього піддерева обчислюється одним підзапитом без обходу дерева.
+
+Для всього дерева відразу (сторінка структури) показники рахуються інакше: один
+груповий запит по підрозділах, а суми піддерев - з дерева в пам'яті (unit_tree.py).
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Position
+from .unit_tree import get_unit_tree
+
+
+def subtree_positions():
+    """Посади піддерева зовнішнього підрозділу (для підзапитів з OuterRef)."""
+    return Position.objects.filter(
+        unit__tree_id=OuterRef('tree_id'),
+        unit__lft__gte=OuterRef('lft'),
+        unit__lft__lte=OuterRef('rght'),
+    )
+
+
+def _count(positions):
+    counted = positions.order_by().values('unit__tree_id').annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def with_staffing_rollups(units):
+    """
+    Додає до вибірки підрозділів кількість посад їхнього піддерева:
+    positions_total, positions_filled (зайняті), positions_vacant.
+    """
+    return units.annotate(
+        positions_total=_count(subtree_positions()),
+        positions_filled=_count(subtree_positions().filter(serviceman__isnull=False)),
+    ).annotate(
+        positions_vacant=F('positions_total') - F('positions_filled'),
+    )
+
+
+def subtree_totals_by_category(unit):
+    """
+    Посади піддерева підрозділу по штатно-посадових категоріях одним агрегатом за межами MPTT:
+    [{'category', 'total', 'filled', 'vacant'}] та підсумок {'total', 'filled', 'vacant'}.
+    """
+    rows = list(
+        Position.objects.filter(unit__tree_id=unit.tree_id, unit__lft__gte=unit.lft, unit__lft__lte=unit.rght)
+        .order_by('category').values('category')
+        .annotate(total=Count('pk'), filled=Count('serviceman'))
+    )
+    summary = {'total': 0, 'filled': 0}
+    for row in rows:
+        row['vacant'] = row['total'] - row['filled']
+        summary['total'] += row['total']
+        summary['filled'] += row['filled']
+    summary['vacant'] = summary['total'] - summary['filled']
+    return rows, summary
+
+
+def unit_positions(unit):
+    """Посади підрозділу (без підпорядкованих) лише з полями, що відображаються в ШПО."""
+    return (
+        Position.objects.filter(unit=unit)
+        .select_related('specialty', 'serviceman__rank')
+        .only(
+            'position_index', 'name', 'category', 'tariff_rate', 'unit', 'specialty__code',
+            'serviceman__last_name', 'serviceman__first_name', 'serviceman__middle_name',
+            'serviceman__position', 'serviceman__rank__name',
+        )
+        .order_by('position_index')
+    )
+
+
+def staffing_rollups():
+    """
+    {id підрозділу: (посад усього, укомплектовано)} для піддерев усіх підрозділів.
+    Один запит; підрозділи без посад (і без посад у піддереві) мають (0, 0).
+    """
+    tree = get_unit_tree()
+    totals = [0] * len(tree)
+    filled = [0] * len(tree)
+    index = {pk: i for i, pk in enumerate(tree.ids)}
+    counts = Position.objects.order_by().values('unit').annotate(
+        total=Count('pk'), filled=Count('serviceman'),
+    ).values_list('unit', 'total', 'filled')
+    for unit_id, unit_total, unit_filled in counts:
+        if unit_id in index:
+            totals[index[unit_id]] = unit_total
+            filled[index[unit_id]] = unit_filled
+
+    # Підпорядковані підрозділи йдуть після вищого, тож зворотний прохід додає піддерево до батька
+    for i in range(len(tree) - 1, -1, -1):
+        parent = tree.parents[i]
+        if parent >= 0:
+            totals[parent] += totals[i]
+            filled[parent] += filled[i]
+    return {pk: (totals[i], filled[i]) for i, pk in enumerate(tree.ids)}
@@ -0,0 +1,15 @@
+# apps/staffing/signals.py
+"""
+Обробники сигналів для оновлення кешу дерева підрозділів (unit_tree.py).
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from mptt.signals import node_moved
+
+from .models import Unit
+from .unit_tree import invalidate_unit_tree
+
+
+@receiver([post_save, post_delete, node_moved], sender=Unit)
+def unit_tree_changed(sender, **kwargs):
+    invalidate_unit_tree()
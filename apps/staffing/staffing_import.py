@@ -0,0 +1,201 @@
+# apps/staffing/staffing_import.py
+"""
+Імпорт штату (штатно-посадового розпису) з xlsx або CSV - команда import_staffing.
+
+Один рядок файлу - одна посада. Підрозділ задається повним шляхом від кореня,
+напр. "10 ОМБр / 1 мб / 2 мр"; відсутні підрозділи шляху створюються.
+Імпорт виконується пакетно:
+- підрозділи створюються bulk_create рівень за рівнем (щоб мати id вищих),
+  поля MPTT заповнюються одним Unit.objects.rebuild() наприкінці;
+- відсутні ВОС та нові посади - bulk_create, змінені посади (режим оновлення) - bulk_update.
+Посада визначається за індексом, тож повторний імпорт того ж файлу нічого не змінює.
+"""
+import csv
+
+from apps.personnel.caching import invalidate_serviceman_cards
+from apps.personnel.importing import ERROR_PREFIX
+from apps.personnel.journal_import import cell_text
+from apps.personnel.models import Serviceman
+
+from .models import MilitarySpecialty, Position, Unit
+from .unit_tree import UnitTree, invalidate_unit_tree
+
+BATCH_SIZE = 1000
+
+UNIT_PATH_SEPARATOR = '/'
+
+COL_UNIT = 'Підрозділ'
+COL_POSITION_INDEX = 'Індекс посади'
+COL_POSITION_NAME = 'Найменування посади'
+COL_CATEGORY = 'Штатно-посадова категорія'
+COL_SPECIALTY_CODE = 'Код ВОС'
+COL_SPECIALTY_NAME = 'Найменування ВОС'
+COL_TARIFF_RATE = 'Тарифний розряд'
+
+STAFFING_COLUMNS = [
+    COL_UNIT, COL_POSITION_INDEX, COL_POSITION_NAME, COL_CATEGORY, COL_SPECIALTY_CODE, COL_SPECIALTY_NAME,
+    COL_TARIFF_RATE,
+]
+
+# Поля посади, які імпорт встановлює (і оновлює в режимі --update)
+POSITION_FIELDS = ['unit_id', 'name', 'category', 'specialty_id', 'tariff_rate']
+
+
+def read_staffing_rows(path):
+    """
+    Повертає пари (номер рядка у файлі, рядок-словник) штату з xlsx (перший аркуш)
+    або CSV файлу. Заголовок - перший рядок; порожні рядки пропускаються.
+    """
+    if path.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = [cell_text(value) for value in next(rows, ())]
+            for number, values in enumerate(rows, start=2):
+                if all(value is None or value == '' for value in values):
+                    continue
+                yield number, {column: cell_text(value) for column, value in zip(header, values) if column}
+        finally:
+            wb.close()
+        return
+
+    with open(path, encoding='utf-8-sig', newline='') as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            if not any((value or '').strip() for value in row.values() if isinstance(value, str)):
+                continue
+            yield reader.line_num, {column: (value or '').strip() for column, value in row.items() if column}
+
+
+def parse_staffing_row(row):
+    """Розбирає рядок штату. Шлях підрозділу - кортеж найменувань. При некоректних даних - ValueError."""
+    data = {}
+    for column in STAFFING_COLUMNS:
+        data[column] = (row.get(column) or '').strip()
+        if not data[column] and column != COL_SPECIALTY_NAME:
+            raise ValueError(f"не заповнено колонку '{column}'.")
+
+    unit_path = tuple(name.strip() for name in data[COL_UNIT].split(UNIT_PATH_SEPARATOR))
+    if not all(unit_path):
+        raise ValueError(f"некоректний шлях підрозділу '{data[COL_UNIT]}'.")
+
+    return {
+        'unit_path': unit_path,
+        'position_index': data[COL_POSITION_INDEX],
+        'name': data[COL_POSITION_NAME],
+        'category': data[COL_CATEGORY],
+        'specialty_code': data[COL_SPECIALTY_CODE],
+        'specialty_name': data[COL_SPECIALTY_NAME],
+        'tariff_rate': data[COL_TARIFF_RATE],
+    }
+
+
+class StaffingImporter:
+    """
+    Записує штат до БД. Лічильники - у counts; помилки повертає run()
+    як [(номер рядка, опис)], рядки з помилками пропускаються.
+    """
+
+    def __init__(self, update_existing=False):
+        self.update_existing = update_existing
+        self.counts = {'units': 0, 'specialties': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+
+    def run(self, rows):
+        errors = []
+        parsed = {}
+        for line, row in rows:
+            try:
+                data = parse_staffing_row(row)
+            except ValueError as e:
+                errors.append((line, f'{ERROR_PREFIX}{e}'))
+                continue
+            if data['position_index'] in parsed:
+                errors.append((line, f"{ERROR_PREFIX}індекс посади '{data['position_index']}' повторюється "
+                                     f"(вже є в рядку {parsed[data['position_index']][0]})."))
+                continue
+            parsed[data['position_index']] = (line, data)
+
+        specialties = self._ensure_specialties(parsed, errors)
+        parsed = {index: item for index, item in parsed.items() if item[1]['specialty_code'] in specialties}
+        units = self._ensure_units({data['unit_path'] for _, data in parsed.values()})
+        self._write_positions(parsed, units, specialties)
+        return errors
+
+    def _ensure_units(self, paths):
+        """{шлях: id підрозділу}; відсутні підрозділи (з усіма вищими) створюються."""
+        tree = UnitTree.load()
+        units = {tree.path_names(pk): pk for pk in tree.ids}
+        missing = {path[:depth] for path in paths for depth in range(1, len(path) + 1)} - units.keys()
+        if not missing:
+            return units
+
+        tree_fields = {'lft': 0, 'rght': 0, 'tree_id': 0, 'level': 0}
+        for depth in range(1, max(map(len, missing)) + 1):
+            level = sorted(path for path in missing if len(path) == depth)
+            created = Unit.objects.bulk_create([
+                Unit(name=path[-1], parent_id=units.get(path[:-1]), **tree_fields) for path in level
+            ], batch_size=BATCH_SIZE)
+            units.update(zip(level, (unit.pk for unit in created)))
+
+        # Одне перенумерування дерева замість зсуву lft/rght при вставці кожного підрозділу
+        Unit.objects.rebuild()
+        invalidate_unit_tree()
+        self.counts['units'] = len(missing)
+        return units
+
+    def _ensure_specialties(self, parsed, errors):
+        """{код ВОС: id}; відсутні ВОС створюються з найменуванням з файлу."""
+        specialties = dict(MilitarySpecialty.objects.values_list('code', 'pk'))
+        names = {}
+        for line, data in parsed.values():
+            if data['specialty_code'] not in specialties and data['specialty_name']:
+                names.setdefault(data['specialty_code'], data['specialty_name'])
+
+        MilitarySpecialty.objects.bulk_create(
+            [MilitarySpecialty(code=code, name=name) for code, name in names.items()], batch_size=BATCH_SIZE
+        )
+        self.counts['specialties'] = len(names)
+        specialties.update(MilitarySpecialty.objects.filter(code__in=names).values_list('code', 'pk'))
+
+        for line, data in parsed.values():
+            if data['specialty_code'] not in specialties:
+                errors.append((line, f"{ERROR_PREFIX}ВОС '{data['specialty_code']}' відсутня в довіднику, "
+                                     f"а її найменування не вказано."))
+        return specialties
+
+    def _write_positions(self, parsed, units, specialties):
+        existing = Position.objects.in_bulk(list(parsed), field_name='position_index')
+        to_create = []
+        to_update = []
+        for index, (line, data) in parsed.items():
+            values = {
+                'unit_id': units[data['unit_path']],
+                'name': data['name'],
+                'category': data['category'],
+                'specialty_id': specialties[data['specialty_code']],
+                'tariff_rate': data['tariff_rate'],
+            }
+            position = existing.get(index)
+            if position is None:
+                to_create.append(Position(position_index=index, **values))
+            elif not self.update_existing:
+                self.counts['skipped'] += 1
+            elif all(getattr(position, field) == value for field, value in values.items()):
+                self.counts['unchanged'] += 1
+            else:
+                for field, value in values.items():
+                    setattr(position, field, value)
+                to_update.append(position)
+
+        Position.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        Position.objects.bulk_update(to_update, POSITION_FIELDS, batch_size=BATCH_SIZE)
+        self.counts['created'] += len(to_create)
+        self.counts['updated'] += len(to_update)
+
+        # bulk_update не надсилає сигналів: картки тих, хто обіймає змінені посади, інвалідуємо явно
+        if to_update:
+            invalidate_serviceman_cards(*Serviceman.objects.filter(
+                position__in=[position.pk for position in to_update]
+            ).values_list('pk', flat=True))
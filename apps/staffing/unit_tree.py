@@ -0,0 +1,160 @@
+# apps/staffing/unit_tree.py
+"""
+Кеш дерева підрозділів у пам'яті процесу.
+
+Усе дерево Unit завантажується одним запитом у компактні масиви, впорядковані
+за (tree_id, lft). У такому порядку піддерево підрозділу - це неперервний відрізок
+масивів, тож перевірка "чи є підрозділ підпорядкованим", межі піддерева, предки
+та шлях визначаються без запитів до БД.
+
+Актуальність перевіряється за версією дерева у спільному кеші Django: вона змінюється
+після кожної зміни підрозділів (сигнали в signals.py), а кожен процес перебудовує
+свою копію, побачивши нову версію. Масові операції (bulk_create, QuerySet.update,
+Unit.objects.rebuild) сигналів не надсилають - після них слід викликати
+invalidate_unit_tree() самостійно.
+"""
+import threading
+import time
+from array import array
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Unit
+
+_VERSION_KEY = 'staffing:unit-tree-version'
+
+_lock = threading.Lock()
+_tree = None
+
+
+class UnitTree:
+    """Незмінний знімок дерева підрозділів. Методи приймають id підрозділів."""
+
+    def __init__(self, rows, version=None):
+        # rows: (id, parent_id, tree_id, lft, rght, level, name), впорядковані за (tree_id, lft)
+        self.version = version
+        self.ids = array('q')
+        self.parents = array('q')  # індекс батьківського підрозділу або -1
+        self.tree_ids = array('q')
+        self.lfts = array('q')
+        self.rghts = array('q')
+        self.levels = array('q')
+        self.ends = array('q')  # індекс першого підрозділу після піддерева
+        self.names = []
+        self._index = {}
+        self._ancestors = []  # індекси предків від кореня
+
+        for i, (pk, parent_id, tree_id, lft, rght, level, name) in enumerate(rows):
+            parent = self._index.get(parent_id, -1)
+            self._index[pk] = i
+            self.ids.append(pk)
+            self.parents.append(parent)
+            self.tree_ids.append(tree_id)
+            self.lfts.append(lft)
+            self.rghts.append(rght)
+            self.levels.append(level)
+            # У MPTT піддерево містить (rght - lft - 1) / 2 підпорядкованих підрозділів
+            self.ends.append(i + 1 + (rght - lft - 1) // 2)
+            self.names.append(name)
+            self._ancestors.append(self._ancestors[parent] + (parent,) if parent >= 0 else ())
+        self.names = tuple(self.names)
+        self._ancestors = tuple(self._ancestors)
+
+    @classmethod
+    def load(cls, version=None):
+        rows = Unit.objects.order_by('tree_id', 'lft').values_list(
+            'id', 'parent_id', 'tree_id', 'lft', 'rght', 'level', 'name'
+        )
+        return cls(rows.iterator(), version)
+
+    def __contains__(self, pk):
+        return pk in self._index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def name(self, pk):
+        return self.names[self._index[pk]]
+
+    def level(self, pk):
+        return self.levels[self._index[pk]]
+
+    def parent_id(self, pk):
+        parent = self.parents[self._index[pk]]
+        return self.ids[parent] if parent >= 0 else None
+
+    def subtree_range(self, pk):
+        """(tree_id, lft, rght) підрозділу - для фільтрів за межами MPTT без завантаження підрозділу."""
+        i = self._index[pk]
+        return self.tree_ids[i], self.lfts[i], self.rghts[i]
+
+    def is_descendant(self, pk, ancestor_pk, include_self=True):
+        """Чи належить підрозділ pk до піддерева ancestor_pk."""
+        i, ancestor = self._index[pk], self._index[ancestor_pk]
+        if i == ancestor:
+            return include_self
+        return ancestor < i < self.ends[ancestor]
+
+    def descendant_ids(self, pk, include_self=True):
+        """id підрозділів піддерева у порядку дерева."""
+        i = self._index[pk]
+        return self.ids[i if include_self else i + 1:self.ends[i]].tolist()
+
+    def children_ids(self, pk):
+        i = self._index[pk]
+        level = self.levels[i] + 1
+        return [self.ids[j] for j in range(i + 1, self.ends[i]) if self.levels[j] == level]
+
+    def ancestor_ids(self, pk, include_self=False):
+        """id предків від кореня дерева."""
+        i = self._index[pk]
+        ancestors = [self.ids[j] for j in self._ancestors[i]]
+        if include_self:
+            ancestors.append(pk)
+        return ancestors
+
+    def path_names(self, pk):
+        """Найменування підрозділу та всіх вищих від кореня."""
+        i = self._index[pk]
+        return tuple(self.names[j] for j in self._ancestors[i] + (i,))
+
+    def path(self, pk, separator=' / '):
+        """Повне найменування підрозділу з усіма вищими, напр. "10 ОМБр / 1 мб / 2 мр"."""
+        return separator.join(self.path_names(pk))
+
+
+def unit_tree_version():
+    """Поточна версія дерева підрозділів - для ключів кешу, що залежать від структури."""
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # Часова мітка замість лічильника: після витіснення ключа версія не повториться
+        version = time.time_ns()
+        if not cache.add(_VERSION_KEY, version, None):
+            version = cache.get(_VERSION_KEY, version)
+    return version
+
+
+def get_unit_tree():
+    """Актуальне дерево підрозділів: одне звернення до кешу, запит до БД - лише після змін."""
+    global _tree
+    version = unit_tree_version()
+    tree = _tree
+    if tree is not None and tree.version == version:
+        return tree
+    with _lock:
+        if _tree is None or _tree.version != version:
+            _tree = UnitTree.load(version)
+        return _tree
+
+
+def _bump_version():
+    global _tree
+    cache.set(_VERSION_KEY, time.time_ns(), None)
+    _tree = None
+
+
+def invalidate_unit_tree():
+    """Робить неактуальними копії дерева в усіх процесах після фіксації поточної транзакції."""
+    # До фіксації інший процес міг би завантажити старе дерево вже під новою версією
+    transaction.on_commit(_bump_version)
@@ -1,5 +1,8 @@
 from django.urls import path
-from .views import UnitListView, UnitDetailView, StaffingTableView
+from .views import (
+    UnitListView, UnitDetailView, StaffingTableView, StaffingTableNodeView, VacancyMatchingView,
+    StaffingVersionListView, StaffingVersionDiffView
+)
 
 app_name = 'staffing'
 
@@ -10,6 +13,16 @@ urlpatterns = [
     # Новий маршрут для штатно-посадового обліку (таблиця)
     path('table/', StaffingTableView.as_view(), name='staffing-table'),
 
+    # Посади та підпорядковані підрозділи одного підрозділу ШПО (завантажуються при розгортанні)
+    path('table/<int:pk>/', StaffingTableNodeView.as_view(), name='staffing-table-node'),
+
+    # Версії штату та зміни між ними
+    path('versions/', StaffingVersionListView.as_view(), name='staffing-versions'),
+    path('versions/<int:pk>/diff/', StaffingVersionDiffView.as_view(), name='staffing-version-diff'),
+
     # Детальний перегляд підрозділу
     path('<int:pk>/', UnitDetailView.as_view(), name='unit-detail'),
+
+    # Підбір кандидатів на вакантні посади підрозділу та підпорядкованих
+    path('<int:pk>/matching/', VacancyMatchingView.as_view(), name='vacancy-matching'),
 ]
\ No newline at end of file
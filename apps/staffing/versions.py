@@ -0,0 +1,105 @@
+# apps/staffing/versions.py
+"""
+Версії штату та порівняння між ними.
+
+Знімок версії - словник {індекс посади: [значення полів SNAPSHOT_FIELDS]}, де підрозділ
+збережено повним шляхом, а ВОС - кодом, тож знімок не залежить від подальших змін
+чи видалення підрозділів. Порівняння двох знімків - хеш-з'єднання за індексом посади:
+один прохід по словниках без запитів до БД; запит потрібен лише для пошуку
+військовослужбовців, яких стосуються зміни.
+"""
+from apps.personnel.models import Serviceman
+
+from .models import Position, StaffingTableVersion
+from .unit_tree import UnitTree
+
+SNAPSHOT_FIELDS = ['unit', 'name', 'category', 'specialty', 'tariff_rate']
+
+SNAPSHOT_FIELD_LABELS = {
+    'unit': 'Підрозділ',
+    'name': 'Найменування посади',
+    'category': 'Штатно-посадова категорія',
+    'specialty': 'ВОС',
+    'tariff_rate': 'Тарифний розряд',
+}
+
+
+def capture_snapshot():
+    """Знімок поточного штату двома запитами: посади та дерево підрозділів для їхніх шляхів."""
+    # Дерево читається з БД, а не з кешу: знімок може створюватися в транзакції імпорту,
+    # де кеш ще не бачить нових підрозділів
+    tree = UnitTree.load()
+    paths = {}
+    snapshot = {}
+    rows = Position.objects.order_by('position_index').values_list(
+        'position_index', 'unit_id', 'name', 'category', 'specialty__code', 'tariff_rate'
+    )
+    for index, unit_id, name, category, specialty, tariff_rate in rows.iterator():
+        if unit_id not in paths:
+            paths[unit_id] = tree.path(unit_id) if unit_id in tree else str(unit_id)
+        snapshot[index] = [paths[unit_id], name, category, specialty, tariff_rate]
+    return snapshot
+
+
+def create_staffing_version(name, order_reference=''):
+    """Зберігає версію з поточного штату."""
+    snapshot = capture_snapshot()
+    return StaffingTableVersion.objects.create(
+        name=name, order_reference=order_reference, snapshot=snapshot, position_count=len(snapshot)
+    )
+
+
+def _row(values):
+    return dict(zip(SNAPSHOT_FIELDS, values))
+
+
+def diff_snapshots(old, new):
+    """
+    Порівнює два знімки. Повертає {'added', 'removed', 'changed'}:
+    додані та вилучені - [{'index', 'row'}], змінені - [{'index', 'old', 'new', 'fields'}],
+    де fields - назви змінених полів. Усі списки впорядковано за індексом посади.
+    """
+    added = [{'index': index, 'row': _row(new[index])} for index in sorted(new.keys() - old.keys())]
+    removed = [{'index': index, 'row': _row(old[index])} for index in sorted(old.keys() - new.keys())]
+    changed = []
+    for index in sorted(old.keys() & new.keys()):
+        old_values, new_values = old[index], new[index]
+        if old_values != new_values:
+            changed.append({
+                'index': index,
+                'old': _row(old_values),
+                'new': _row(new_values),
+                'fields': [
+                    SNAPSHOT_FIELD_LABELS[field]
+                    for field, before, after in zip(SNAPSHOT_FIELDS, old_values, new_values) if before != after
+                ],
+            })
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def affected_servicemen(diff):
+    """
+    Військовослужбовці, які зараз обіймають вилучені або змінені посади:
+    [(військовослужбовець, індекс посади, 'removed' | 'changed')] - одним запитом.
+    """
+    kinds = {item['index']: 'removed' for item in diff['removed']}
+    kinds.update((item['index'], 'changed') for item in diff['changed'])
+    if not kinds:
+        return []
+    servicemen = Serviceman.objects.filter(position__position_index__in=kinds).select_related('rank', 'position')
+    return sorted(
+        ((serviceman, serviceman.position.position_index, kinds[serviceman.position.position_index])
+         for serviceman in servicemen),
+        key=lambda item: item[1],
+    )
+
+
+def diff_versions(old_version, new_version=None):
+    """
+    Порівнює версію штату з іншою версією або (new_version=None) з поточним штатом.
+    Результат diff_snapshots доповнено списком 'affected' (affected_servicemen).
+    """
+    new = new_version.snapshot if new_version is not None else capture_snapshot()
+    diff = diff_snapshots(old_version.snapshot, new)
+    diff['affected'] = affected_servicemen(diff)
+    return diff
@@ -1,53 +1,157 @@
-from django.views.generic import ListView, DetailView
-from .models import Unit, Position
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.views.generic import DetailView, ListView, TemplateView
+from .matching import match_vacancies
+from .models import Unit, Position, StaffingTableVersion
+from .services import with_staffing_rollups, unit_positions, staffing_rollups, subtree_totals_by_category
+from .unit_tree import get_unit_tree, unit_tree_version
+from .versions import diff_versions
 
+_UNIT_TREE_KEY = 'staffing:unit-tree-html:{version}'
 
-class UnitListView(ListView):
-    model = Unit
+
+# Показники укомплектованості в дереві можуть відставати від фактичних не більше ніж на цей час;
+# зміни самої структури підрозділів оновлюють дерево одразу (ключ містить версію дерева)
+UNIT_TREE_CACHE_TIMEOUT = 60 * 5
+
+
+class UnitListView(TemplateView):
+    """
+    Структура підрозділів з кількістю вакантних посад у кожному піддереві.
+    Відрендерене дерево береться з кешу; при промаху - два запити (підрозділи та
+    кількість посад по підрозділах), суми піддерев рахуються в пам'яті.
+    """
     template_name = 'staffing/unit_list.html'
-    context_object_name = 'units'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        cache_key = _UNIT_TREE_KEY.format(version=unit_tree_version())
+        tree = cache.get(cache_key)
+        if tree is None:
+            rollups = staffing_rollups()
+            units = list(Unit.objects.all())
+            for unit in units:
+                unit.positions_total, unit.positions_filled = rollups.get(unit.pk, (0, 0))
+                unit.positions_vacant = unit.positions_total - unit.positions_filled
+            tree = render_to_string('staffing/_unit_tree.html', {'units': units})
+            cache.set(cache_key, tree, UNIT_TREE_CACHE_TIMEOUT)
+        context['tree'] = tree
+        return context
 
 
 class UnitDetailView(DetailView):
+    """
+    Підрозділ: його посади з військовослужбовцями, що їх займають, показники
+    піддерева по категоріях та підпорядковані підрозділи зі своїми показниками.
+    Кількість запитів не залежить від кількості посад і підрозділів.
+    """
     model = Unit
     template_name = 'staffing/unit_detail.html'
     context_object_name = 'unit'
 
+    def get_queryset(self):
+        return Unit.objects.select_related('parent').prefetch_related(
+            Prefetch('positions', queryset=Position.objects.select_related(
+                'specialty', 'serviceman__rank'
+            ).order_by('position_index'))
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        unit = self.object
+        context['positions'] = unit.positions.all()
+        context['categories'], context['summary'] = subtree_totals_by_category(unit)
+        context['children'] = with_staffing_rollups(unit.get_children())
+        context['unit_path'] = get_unit_tree().path(unit.pk)
+        return context
+
 
-class StaffingTableView(ListView):
+class StaffingTableView(TemplateView):
     """
     Представлення для відображення штатно-посадового обліку (ШПО).
-    Генерує повний список посад, згрупованих по підрозділах.
+    Спочатку показуються лише підрозділи верхнього рівня зі зведеними показниками;
+    посади та підпорядковані підрозділи завантажуються при розгортанні (StaffingTableNodeView).
     """
-    model = Position
     template_name = 'staffing/staffing_table.html'
-    context_object_name = 'positions'
 
-    def get_queryset(self):
-        """
-        Отримуємо всі посади, відсортовані за структурою підрозділів,
-        а потім за індексом посади. Також одразу завантажуємо пов'язані дані.
-        """
-        return Position.objects.select_related(
-            'unit',
-            'specialty',
-            'serviceman',
-            'serviceman__rank'
-        ).order_by('unit__tree_id', 'unit__lft', 'position_index')
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['units'] = with_staffing_rollups(Unit.objects.root_nodes())
+        context['page_title'] = "Штатно-посадовий облік"
+        return context
+
+
+class StaffingTableNodeView(TemplateView):
+    """
+    Рядки ШПО одного підрозділу: його посади та підпорядковані підрозділи
+    зі зведеними показниками (ще не розгорнуті). Повертає фрагмент таблиці.
+    """
+    template_name = 'staffing/_staffing_node.html'
 
     def get_context_data(self, **kwargs):
-        """
-        Групуємо посади за підрозділами для зручного відображення в шаблоні.
-        """
         context = super().get_context_data(**kwargs)
+        unit = get_object_or_404(Unit, pk=self.kwargs['pk'])
+        context['unit'] = unit
+        context['positions'] = unit_positions(unit)
+        context['units'] = with_staffing_rollups(unit.get_children())
+        return context
 
-        # Створюємо словник, де ключ - це підрозділ, а значення - список його посад
-        units_with_positions = {}
-        for position in context['positions']:
-            if position.unit not in units_with_positions:
-                units_with_positions[position.unit] = []
-            units_with_positions[position.unit].append(position)
 
-        context['units_with_positions'] = units_with_positions
-        context['page_title'] = "Штатно-посадовий облік"
-        return context
\ No newline at end of file
+class VacancyMatchingView(LoginRequiredMixin, DetailView):
+    """
+    Кандидати на всі вакантні посади підрозділу та підпорядкованих, ранжовані за
+    відповідністю ВОС, звання, освіти та стажу (див. matching.py).
+    Параметри: ?limit= (кандидатів на посаду), ?include_assigned=1 (враховувати й тих, хто обіймає посади).
+    """
+    model = Unit
+    template_name = 'staffing/vacancy_matching.html'
+    context_object_name = 'unit'
+    max_limit = 20
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            limit = min(max(int(self.request.GET.get('limit', 5)), 1), self.max_limit)
+        except ValueError:
+            limit = 5
+        include_assigned = self.request.GET.get('include_assigned') == '1'
+        context['matches'] = match_vacancies(self.object, limit=limit, include_assigned=include_assigned)
+        context['limit'] = limit
+        context['include_assigned'] = include_assigned
+        context['page_title'] = f"Підбір кандидатів на вакантні посади: {self.object.name}"
+        return context
+
+
+class StaffingVersionListView(LoginRequiredMixin, ListView):
+    """Збережені версії штату (без знімків посад)."""
+    template_name = 'staffing/staffing_version_list.html'
+    context_object_name = 'versions'
+    queryset = StaffingTableVersion.objects.defer('snapshot')
+
+
+class StaffingVersionDiffView(LoginRequiredMixin, DetailView):
+    """
+    Зміни штату від версії до іншої версії (?against=<id>) або до поточного штату:
+    додані, вилучені та змінені посади і військовослужбовці, яких це стосується.
+    """
+    model = StaffingTableVersion
+    template_name = 'staffing/staffing_version_diff.html'
+    context_object_name = 'version'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        against = None
+        if self.request.GET.get('against'):
+            try:
+                against = StaffingTableVersion.objects.get(pk=int(self.request.GET['against']))
+            except (ValueError, StaffingTableVersion.DoesNotExist):
+                raise Http404("Версію штату для порівняння не знайдено")
+        context['against'] = against
+        context['diff'] = diff_versions(self.object, against)
+        context['versions'] = StaffingTableVersion.objects.exclude(pk=self.object.pk).defer('snapshot')
+        context['page_title'] = f"Зміни штату: {self.object.name}"
+        return context
@@ -92,4 +92,17 @@ CRISPY_TEMPLATE_PACK = "tailwind"
 # === Нові налаштування для автентифікації ===
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'personnel:serviceman-list'
-LOGOUT_REDIRECT_URL = 'users:login'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = 'users:login'
+
+# === Кеш ===
+# Файловий кеш спільний для всіх воркерів gunicorn у контейнері,
+# тому інвалідація версій (картки, дерево підрозділів) видна кожному процесу.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    }
+}